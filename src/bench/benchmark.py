@@ -0,0 +1,192 @@
+# built ins
+import argparse
+import itertools
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+# project modules
+from config import settings
+from bench.fixture_site import FixtureSite
+from helpers.profiling import profiler
+from main import run_queries
+
+
+# settings the benchmark points at the fixture site, put back afterwards
+BENCHMARK_SETTINGS = [
+    "SEARCH_URL",
+    "IMAGE_URL_PREFIX",
+    "OUTPUT_PATH",
+    "ARTICLE_INDEX_PATH",
+    "IMAGE_STORE_PATH",
+    "BROWSER_BACKEND",
+    "WORKER_POOL_SIZE",
+    "CHROME_USER_DATA_DIR",
+    "HTTP_CACHE_MODE",
+]
+
+
+def run_benchmark(
+    site: FixtureSite,
+    backend: str,
+    worker_pool_size: int,
+    query: str,
+    months: int
+) -> Dict[str, Any]:
+    """runs one search against the fixture site with a fresh output folder,
+    no article index and an empty image store so every run does the same work
+
+    #### Parameters
+    ------
+    1. site : FixtureSite
+        - running fixture site
+    2. backend : str
+        - settings.BROWSER_BACKEND to run with
+    3. worker_pool_size : int
+        - settings.WORKER_POOL_SIZE to run with
+    4. query : str
+        - search term
+    5. months : int
+        - number of months to search back
+
+    #### Returns
+    ------
+    - Dict[str, Any]
+        - backend, worker_pool_size, status, cards, seconds, cards_per_second,
+            first_card_seconds,
+            the latency histogram of each stage (see helpers.profiling),
+            peak python heap and peak rss
+    """
+    run_folder = tempfile.mkdtemp(prefix="bench-")
+    settings.SEARCH_URL = f"{site.url}/search"
+    settings.IMAGE_URL_PREFIX = f"{site.url}/images/"
+    settings.OUTPUT_PATH = run_folder
+    settings.ARTICLE_INDEX_PATH = ""
+    settings.IMAGE_STORE_PATH = f"{run_folder}/images"
+    # every run starts cold
+    settings.CHROME_USER_DATA_DIR = ""
+    settings.HTTP_CACHE_MODE = "off"
+    settings.BROWSER_BACKEND = backend
+    settings.WORKER_POOL_SIZE = worker_pool_size
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = run_queries(
+            [{"search_query": query, "months": months}], started=started)[0]
+    finally:
+        seconds = time.perf_counter() - started
+        _, peak_heap = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        shutil.rmtree(run_folder, ignore_errors=True)
+
+    return {
+        "backend": backend,
+        "worker_pool_size": worker_pool_size,
+        "status": result["status"],
+        "cards": result["articles"],
+        "seconds": round(seconds, 3),
+        "cards_per_second": round(result["articles"] / seconds, 3),
+        "first_card_seconds": profiler.milestones.get("first_card"),
+        "stages": profiler.report(),
+        "peak_heap_mb": round(peak_heap / 1024 / 1024, 2),
+        # kb on linux. chrome runs in child processes so this is only ours,
+        # and it is the peak of the whole process not just this run
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        "requests": dict(site.requests)
+    }
+
+
+def run_benchmarks(
+    backends: List[str],
+    worker_pool_sizes: List[int],
+    results: int,
+    latency: float,
+    static_results: bool,
+    metadata: str,
+    card_dates: bool,
+    query: str,
+    months: int
+) -> List[Dict[str, Any]]:
+    """runs every backend and worker pool size combination against one
+    fixture site
+
+    #### Returns
+    ------
+    - List[Dict[str, Any]]
+        - the result of each run (see run_benchmark)
+    """
+    original_settings = {
+        name: getattr(settings, name) for name in BENCHMARK_SETTINGS}
+    site = FixtureSite(
+        results=results,
+        latency=latency,
+        static_results=static_results,
+        metadata=metadata,
+        card_dates=card_dates
+    )
+    site.start()
+    benchmarks = []
+    try:
+        for backend, worker_pool_size in itertools.product(
+                backends, worker_pool_sizes):
+            site.requests.clear()
+            benchmarks.append(run_benchmark(
+                site, backend, worker_pool_size, query, months))
+    finally:
+        site.stop()
+        for name, value in original_settings.items():
+            setattr(settings, name, value)
+    return benchmarks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="benchmarks the scraper against the local fixture site")
+    parser.add_argument(
+        "--backends", nargs="+", default=["selenium", "http"])
+    parser.add_argument(
+        "--worker-pool-sizes", nargs="+", type=int, default=[0, 2])
+    parser.add_argument("--results", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--js-results", action="store_true")
+    parser.add_argument(
+        "--metadata", choices=["json_ld", "meta", "none"], default="json_ld")
+    parser.add_argument("--card-dates", action="store_true")
+    parser.add_argument("--query", default="dog")
+    parser.add_argument("--months", type=int, default=1)
+    parser.add_argument(
+        "--output", default=f"{settings.OUTPUT_PATH}/benchmark.json")
+    args = parser.parse_args()
+
+    benchmarks = run_benchmarks(
+        backends=args.backends,
+        worker_pool_sizes=args.worker_pool_sizes,
+        results=args.results,
+        latency=args.latency,
+        static_results=not args.js_results,
+        metadata=args.metadata,
+        card_dates=args.card_dates,
+        query=args.query,
+        months=args.months
+    )
+
+    for benchmark in benchmarks:
+        print(
+            f"{benchmark['backend']:>8} pool={benchmark['worker_pool_size']} "
+            f"{benchmark['status']} {benchmark['cards']} cards in "
+            f"{benchmark['seconds']}s ({benchmark['cards_per_second']}/s), "
+            f"peak heap {benchmark['peak_heap_mb']}mb"
+        )
+
+    folder = os.path.dirname(args.output)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(benchmarks, output_file, indent=4)
@@ -0,0 +1,356 @@
+# built ins
+import argparse
+import hashlib
+import html
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, quote, urlparse
+
+
+# the search form submits on enter like the real search page, "Load More"
+# appends the next page of cards from /api/cards and disappears at the end
+SEARCH_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Search - Fixture Gothamist</title></head>
+<body>
+<form action="/search" method="get">
+    <input class="search-page-input" name="q" value="{query}" />
+</form>
+<div id="resultList">{cards}</div>
+{load_more}
+<script>
+const query = {query_json};
+let offset = {offset};
+const button = document.getElementById('loadMore');
+const addCards = (data) => {{
+    document.getElementById('resultList')
+        .insertAdjacentHTML('beforeend', data.cards);
+    offset = data.offset;
+    if (data.done) {{
+        const loadMore = document.getElementById('loadMore');
+        if (loadMore) loadMore.remove();
+    }}
+}};
+const loadCards = () => fetch(
+    '/api/cards?q=' + encodeURIComponent(query) + '&offset=' + offset
+).then(response => response.json()).then(addCards);
+if (button) button.addEventListener('click', loadCards);
+if (query && offset === 0) loadCards();
+</script>
+</body>
+</html>
+"""
+
+LOAD_MORE_BUTTON = '<button id="loadMore"><span>Load More</span></button>'
+
+CARD = """<div class="gothamist-card">
+    <a class="image-with-caption-image-link" href="/articles/{number}">
+        <img class="image native-image prime-img-class" src="/img/{number}" />
+    </a>
+    <div class="h2">{title}</div>
+    <p class="desc">{description}</p>{date_label}
+</div>"""
+
+DATE_LABEL = '\n    <p class="card-date">{label}</p>'
+
+ARTICLE_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>{title}</title>{metadata}</head>
+<body>
+<h1>{title}</h1>
+<div class="date-published"><p class="type-caption">{published}</p></div>
+<p>{description}</p>
+</body>
+</html>
+"""
+
+
+class FixtureSite(object):
+    """local stand in for gothamist with the markup NewsBrowser depends on,
+    so the scraper can be benchmarked without going to the live site. card
+    n links to /articles/n, published n * hours_between_articles hours ago,
+    and its image /img/n redirects to /images/card-n.jpg"""
+
+    def __init__(
+            self,
+            results: int = 200,
+            page_size: int = 10,
+            latency: float = 0.05,
+            hours_between_articles: float = 6.0,
+            static_results: bool = True,
+            metadata: str = "json_ld",
+            card_dates: bool = False,
+            host: str = "127.0.0.1",
+            port: int = 0
+        ):
+        """
+        #### Parameters
+        ------
+        1. results : int, (default 200)
+            - number of search results for any query
+        2. page_size : int, (default 10)
+            - cards per page and per "Load More"
+        3. latency : float, (default 0.05)
+            - seconds added to every response
+        4. hours_between_articles : float, (default 6.0)
+            - gap between the published dates of consecutive results
+        5. static_results : bool, (default True)
+            - whether the first page of cards is in the search page html,
+                otherwise it's rendered by javascript like the live site
+        6. metadata : str, (default "json_ld")
+            - how article pages carry their publish time besides the
+                caption, "json_ld", "meta" or "none"
+        7. card_dates : bool, (default False)
+            - whether cards carry a relative date label ("3 days ago")
+        8. host : str, (default "127.0.0.1")
+            - host to listen on
+        9. port : int, (default 0)
+            - port to listen on, 0 picks a free one
+        """
+        self.results = results
+        self.page_size = page_size
+        self.latency = latency
+        self.hours_between_articles = hours_between_articles
+        self.static_results = static_results
+        self.metadata = metadata
+        self.card_dates = card_dates
+        self.host = host
+        self.port = port
+        self.now = datetime.now()
+        self.requests: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    def start(self) -> str:
+        """starts serving on a background thread
+
+        #### Returns
+        ------
+        - str
+            - base url of the site
+        """
+        site = self
+
+        class Handler(FixtureRequestHandler):
+            fixture_site = site
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever,
+            name="fixture-site",
+            daemon=True
+        )
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        """stops serving
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def count_request(self, route: str):
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def published(self, number: int) -> datetime:
+        return self.now - timedelta(
+            hours=number * self.hours_between_articles)
+
+    def title(self, query: str, number: int) -> str:
+        return f"{query.title()} story number {number}"
+
+    def description(self, query: str, number: int) -> str:
+        # every fifth article mentions money so money_value_present varies
+        if number % 5 == 0:
+            return f"The {query} costs $1,{number:03d}.50 to look after."
+        return f"Everything you need to know about this {query}."
+
+    def date_label(self, number: int) -> str:
+        if not self.card_dates:
+            return ""
+        hours = int((self.now - self.published(number)).total_seconds() // 3600)
+        if hours < 24:
+            label = f"{hours} hours ago"
+        else:
+            label = f"{hours // 24} days ago"
+        return DATE_LABEL.format(label=label)
+
+    def render_cards(self, query: str, offset: int) -> List[str]:
+        end = min(offset + self.page_size, self.results)
+        return [
+            CARD.format(
+                number=number,
+                title=html.escape(self.title(query, number)),
+                description=html.escape(self.description(query, number)),
+                date_label=self.date_label(number)
+            )
+            for number in range(offset + 1, end + 1)
+        ]
+
+    def search_page(self, query: str) -> str:
+        offset = 0
+        cards: List[str] = []
+        if query and self.static_results:
+            cards = self.render_cards(query, 0)
+            offset = len(cards)
+        done = not query or offset >= self.results
+        return SEARCH_PAGE.format(
+            query=html.escape(query),
+            query_json=json.dumps(query),
+            cards="\n".join(cards),
+            offset=offset,
+            load_more="" if done else LOAD_MORE_BUTTON
+        )
+
+    def cards_page(self, query: str, offset: int) -> Dict[str, Any]:
+        cards = self.render_cards(query, offset)
+        offset += len(cards)
+        return {
+            "cards": "\n".join(cards),
+            "offset": offset,
+            "done": offset >= self.results
+        }
+
+    def article_page(self, number: int) -> str:
+        published = self.published(number)
+        metadata = ""
+        if self.metadata == "json_ld":
+            metadata = (
+                '<script type="application/ld+json">'
+                + json.dumps({
+                    "@context": "https://schema.org",
+                    "@type": "NewsArticle",
+                    "headline": self.title("fixture", number),
+                    "datePublished": published.isoformat(timespec="seconds")
+                })
+                + "</script>"
+            )
+        elif self.metadata == "meta":
+            metadata = (
+                '<meta property="article:published_time" '
+                f'content="{published.isoformat(timespec="seconds")}" />'
+            )
+        return ARTICLE_PAGE.format(
+            metadata=metadata,
+            title=html.escape(self.title("fixture", number)),
+            description=html.escape(self.description("fixture", number)),
+            published=(
+                f"Published {published:%B} {published.day}, {published:%Y} "
+                "at 5:00 p.m."
+            )
+        )
+
+    def image(self, name: str) -> bytes:
+        # a few kb of deterministic bytes, enough to exercise the downloads
+        return hashlib.sha256(name.encode()).digest() * 128
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    fixture_site: FixtureSite = None
+
+    def log_message(self, format: str, *args: Any):
+        # the scraper logs enough on its own
+        pass
+
+    def do_GET(self):
+        site = self.fixture_site
+        if site.latency:
+            time.sleep(site.latency)
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        query = params.get("q", [""])[0]
+        parts = [part for part in url.path.split("/") if part]
+        route = parts[0] if parts else ""
+        site.count_request(route)
+
+        if route == "search":
+            self.send_body(site.search_page(query).encode(), "text/html")
+        elif parts == ["api", "cards"]:
+            offset = int(params.get("offset", ["0"])[0])
+            self.send_body(
+                json.dumps(site.cards_page(query, offset)).encode(),
+                "application/json"
+            )
+        elif route == "articles" and len(parts) == 2 and parts[1].isdigit():
+            self.send_body(
+                site.article_page(int(parts[1])).encode(), "text/html")
+        elif route == "img" and len(parts) == 2:
+            self.send_response(302)
+            self.send_header(
+                "Location", f"/images/card-{quote(parts[1])}.jpg")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif route == "images" and len(parts) == 2:
+            etag = f'"{hashlib.md5(parts[1].encode()).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_body(
+                site.image(parts[1]), "image/jpeg", {"ETag": etag})
+        else:
+            self.send_error(404)
+
+    def send_body(
+            self,
+            body: bytes,
+            content_type: str,
+            headers: Dict[str, str] = {}
+        ):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="serves the fixture gothamist site")
+    parser.add_argument("--results", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--hours-between-articles", type=float, default=6.0)
+    parser.add_argument("--js-results", action="store_true")
+    parser.add_argument(
+        "--metadata", choices=["json_ld", "meta", "none"], default="json_ld")
+    parser.add_argument("--card-dates", action="store_true")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    fixture_site = FixtureSite(
+        results=args.results,
+        page_size=args.page_size,
+        latency=args.latency,
+        hours_between_articles=args.hours_between_articles,
+        static_results=not args.js_results,
+        metadata=args.metadata,
+        card_dates=args.card_dates,
+        port=args.port
+    )
+    print(f"serving fixture site at {fixture_site.start()}/search")
+    try:
+        fixture_site.thread.join()
+    except KeyboardInterrupt:
+        fixture_site.stop()
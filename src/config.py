@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from loguru import logger
 from pydantic_settings import BaseSettings
 
@@ -10,12 +12,144 @@ class Settings(BaseSettings):
     LOGGING_FILE: str = "logs/rpa_project.log"
     STARTUP_FAIL_LOG_FILE_PATH: str = "logs/startup_failure.log"
     LOGGING_LEVEL: str = "INFO"
+    # log records are written from a background thread instead of the
+    # scraping threads
+    LOGGING_ENQUEUE: bool = True
+    # the log files roll over at this size, the last few are kept compressed
+    LOGGING_ROTATION: str = "50 MB"
+    LOGGING_RETENTION: int = 5
+    LOGGING_COMPRESSION: str = "gz"
+    # json lines copy of the log (message, level, time, thread, card and
+    # query), empty string turns it off
+    LOGGING_JSON_FILE: str = ""
+    # below WARNING only every nth card's messages are logged, 1 logs them all
+    LOGGING_CARD_SAMPLE_EVERY: int = 10
+    # card errors that keep their traceback, later ones only log the message
+    LOGGING_CARD_TRACEBACKS: int = 5
+    # one json line per card (outcome and timing) in the output folder,
+    # empty string turns it off
+    CARD_LOG_FILE: str = "cards.jsonl"
     SCREENSHOT_FOLDER_PATH: str = "screenshots"
-    DEFAULT_SLEEP: float = 0.05
+    # folder of persistent chrome profiles (one per open session) so chrome's
+    # http cache and the consent cookies carry over between runs, empty
+    # string starts every browser with a fresh profile
+    CHROME_USER_DATA_DIR: str = "index/chrome"
+    # host:port of a long lived local chrome started with
+    # --remote-debugging-port, the first session attaches to it instead of
+    # starting its own. empty string turns it off
+    CHROME_DEBUGGER_ADDRESS: str = ""
+    # resources chrome doesn't load, "none", "standard" (ads, trackers, video
+    # embeds and fonts) or "minimal" (only documents and scripts)
+    BLOCK_PROFILE: str = "standard"
+    # waits return as soon as the page is ready, this is only extra human
+    # delay after each action if we want it
+    DEFAULT_SLEEP: float = 0.0
     DEFAULT_TIMEOUT: int = 20
+    # element waits adapt to each locator once it has this many hits: p99 of
+    # its latency times the factor, no lower than the minimum and no higher
+    # than DEFAULT_TIMEOUT
+    LOCATOR_MIN_SAMPLES: int = 20
+    LOCATOR_TIMEOUT_FACTOR: float = 3.0
+    LOCATOR_MIN_TIMEOUT: float = 2.0
+    # latencies kept per locator for the percentiles
+    LOCATOR_SAMPLE_SIZE: int = 1000
+    # wait for fields a card may not have (image, description) until the
+    # locator has enough samples to adapt
+    OPTIONAL_FIELD_TIMEOUT: float = 2.0
+    # times a search restarts a crashed chrome and resumes before giving up
+    MAX_BROWSER_RESTARTS: int = 3
+    # how often WebDriverWait re-checks its condition (selenium default 0.5)
+    WAIT_POLL_FREQUENCY: float = 0.05
+    # how long the result list has to stay unchanged with no "Load More"
+    # button before we treat it as the end of the results
+    END_OF_RESULTS_QUIET_PERIOD: float = 1.0
+    # timing spans around the helpers and search stages, written to
+    # output/profile.json at the end of the run
+    PROFILING: bool = True
+    # durations kept per span for the percentiles, counts and max are exact
+    PROFILE_SAMPLE_SIZE: int = 10000
     OUTPUT_PATH: str = "output"
+    # "xlsx" writes one workbook per query, "parquet" and "jsonl" add a part
+    # file per run to a dataset partitioned by query and run date
+    OUTPUT_FORMAT: str = "xlsx"
+    # the dataset for each format goes in <folder>_<format>, e.g.
+    # articles_parquet
+    OUTPUT_DATASET_FOLDER: str = "articles"
+    # rows between flushes of the output journal (row groups for parquet)
+    OUTPUT_FLUSH_EVERY: int = 10
+    SEARCH_URL: str = "https://gothamist.com/search"
+    # "selenium" drives chrome for everything, "http" fetches pages with a
+    # pooled http client and only uses chrome when a page needs javascript
+    BROWSER_BACKEND: str = "selenium"
+    HTTP_POOL_SIZE: int = 10
+    # fetches in flight per host adapt between these with AIMD feedback from
+    # latency, errors and 429/503 responses (see helpers.rate_control)
+    RATE_CONTROL: bool = True
+    RATE_MIN_CONCURRENCY: int = 1
+    RATE_INITIAL_CONCURRENCY: int = 4
+    RATE_MAX_CONCURRENCY: int = 16
+    # limit multiplier on a throttled response, error or latency spike
+    RATE_DECREASE_FACTOR: float = 0.5
+    # moving average latency over the best seen that counts as a spike
+    RATE_LATENCY_FACTOR: float = 3.0
+    # seconds to hold off a throttled host that didn't send Retry-After, and
+    # the most we'll honour one for
+    RATE_DEFAULT_BACKOFF: float = 5.0
+    RATE_MAX_RETRY_AFTER: float = 120.0
+    # times a throttled fetch is retried after its backoff
+    RATE_MAX_RETRIES: int = 3
+    # "off", "cache" (responses kept for their ttl in a size bounded lru
+    # cache), "record" (the run's responses saved to the archive) or
+    # "replay" (served from the archive only, no network, needs
+    # BROWSER_BACKEND "http" since chrome's page loads can't be replayed)
+    HTTP_CACHE_MODE: str = "off"
+    HTTP_CACHE_PATH: str = "index/http_cache.sqlite"
+    HTTP_ARCHIVE_PATH: str = "index/http_archive.sqlite"
+    # seconds a cached page or image is served before it's fetched again
+    HTTP_CACHE_TTL: int = 900
+    HTTP_CACHE_IMAGE_TTL: int = 7 * 24 * 60 * 60
+    # least recently used responses are evicted past this size
+    HTTP_CACHE_MAX_MB: int = 500
+    # max number of card images downloading at the same time
+    IMAGE_DOWNLOAD_CONCURRENCY: int = 4
+    IMAGE_URL_PREFIX: str = "https://images-prod.gothamist.com/images/"
+    # content addressed store the output images are hardlinked from, kept
+    # between runs so unchanged images are only revalidated. empty string
+    # writes the images straight to the output folder
+    IMAGE_STORE_PATH: str = "index/images"
+    # article tabs kept loading ahead of the one being read in the sequential
+    # selenium search, adapts between 1 and this. 0 loads one at a time
+    PREFETCH_MAX_TABS: int = 4
+    # seconds reading a prefetched article can take before we count it as
+    # not loaded in time and prefetch further ahead
+    PREFETCH_SLOW_READ: float = 0.25
+    # empty the processed cards in the result list after every batch so the
+    # page stays the same size however long the search runs
+    PRUNE_PROCESSED_CARDS: bool = True
+    # "batched" reads all loaded cards with one injected script, "elements"
+    # waits on each field of each card element
+    CARD_EXTRACTION_MODE: str = "batched"
+    # results in a row published before the search window that are
+    # tolerated before the search stops, in case they're out of date order
+    PAGINATION_OVERSHOOT: int = 3
+    # skip opening cards whose date label or url date is before the window
+    PAGINATION_DATE_HINTS: bool = True
+    # sqlite index of processed articles so later runs skip them, empty
+    # string turns it off
+    ARTICLE_INDEX_PATH: str = "index/articles.sqlite"
+    # input work items searched at the same time, each on its own session
+    QUERY_CONCURRENCY: int = 2
+    # extra phrases per query that count towards search_phrase_count, e.g.
+    # {"dog": ["puppy", "canine"]}
+    ANALYSIS_SYNONYMS: Dict[str, List[str]] = {}
+    # search_phrase_count matching, case sensitive substrings by default
+    ANALYSIS_CASE_SENSITIVE: bool = True
+    ANALYSIS_WHOLE_WORDS: bool = False
     SEARCH_QUERY: str = "dog"
     MONTHS: int = 2
+    # number of extra headless sessions that process article/image urls in
+    # parallel while the main session paginates, 0 keeps it all on one session
+    WORKER_POOL_SIZE: int = 0
 
 
 try:
@@ -0,0 +1,236 @@
+# built ins
+import functools
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# project modules
+from config import settings
+
+
+MONEY_PATTERN = re.compile(r"\$\d+(,\d{3})*(\.\d{1,2})?|\d+ dollars|\d+ USD")
+
+
+class TermMatcher(object):
+    """aho-corasick automaton over a set of terms, counts every term in one
+    pass over the text however many terms there are. like str.count matches
+    don't overlap, and that holds across terms too: where matches overlap
+    the leftmost one counts, and the longest of those (so "dogs" counts once
+    for "dogs" and not also for "dog")"""
+
+    def __init__(
+            self,
+            terms: Iterable[str],
+            case_sensitive: bool = True,
+            whole_words: bool = False
+        ):
+        """
+        #### Parameters
+        ------
+        1. terms : Iterable[str]
+            - terms to count, empty ones are ignored
+        2. case_sensitive : bool, (default True)
+            - whether "Dog" and "dog" are different terms
+        3. whole_words : bool, (default False)
+            - only count matches that aren't part of a longer word
+        """
+        self.case_sensitive = case_sensitive
+        self.whole_words = whole_words
+        self.terms: List[str] = list(dict.fromkeys(
+            term for term in terms if term))
+
+        # state 0 is the root, outputs are (term index, term length)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[List[Tuple[int, int]]] = [[]]
+        for term_index, term in enumerate(self.terms):
+            state = 0
+            # the length in the text being searched, which casefold can
+            # change (e.g. "ß" is "ss")
+            term = self._normalise(term)
+            for char in term:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.outputs[state].append((term_index, len(term)))
+
+        # breadth first so every fail link points at a finished state
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.outputs[next_state] = (
+                    self.outputs[next_state] + self.outputs[self.fail[next_state]])
+
+    def _normalise(self, text: str) -> str:
+        return text if self.case_sensitive else text.casefold()
+
+    def _is_boundary(self, text: str, position: int) -> bool:
+        return (position < 0 or position >= len(text)
+                or not (text[position].isalnum() or text[position] == "_"))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """counts every term in the text
+
+        #### Parameters
+        ------
+        1. text : str
+            - text to search
+
+        #### Returns
+        ------
+        - Dict[str, int]
+            - number of matches of each term, 0 for terms not found
+        """
+        counts = [0] * len(self.terms)
+        normalised = self._normalise(text)
+        # casefold can change the length of a few characters, the boundary
+        # checks are then done on the folded text
+        boundary_text = text if len(normalised) == len(text) else normalised
+
+        # (start, end, term index) of every match
+        matches: List[Tuple[int, int, int]] = []
+        state = 0
+        for position, char in enumerate(normalised):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for term_index, length in self.outputs[state]:
+                start = position - length + 1
+                if self.whole_words and not (
+                        self._is_boundary(boundary_text, start - 1)
+                        and self._is_boundary(boundary_text, position + 1)):
+                    continue
+                matches.append((start, position + 1, term_index))
+
+        # leftmost first and the longest of those, skipping whatever overlaps
+        # a match already counted
+        last_end = 0
+        for start, end, term_index in sorted(
+                matches, key=lambda match: (match[0], -match[1])):
+            if start < last_end:
+                continue
+            counts[term_index] += 1
+            last_end = end
+
+        return dict(zip(self.terms, counts))
+
+    def count_many(self, texts: Iterable[str]) -> List[Dict[str, int]]:
+        """counts every term in each of the texts with the one automaton
+
+        #### Parameters
+        ------
+        1. texts : Iterable[str]
+            - texts to search
+
+        #### Returns
+        ------
+        - List[Dict[str, int]]
+            - the counts of each text (see count), in the same order
+        """
+        return [self.count(text) for text in texts]
+
+
+class ArticleAnalyser(object):
+    """works out search_phrase_count and money_value_present for a query.
+    the query and its settings.ANALYSIS_SYNONYMS are compiled into one
+    TermMatcher up front so each article is a single pass"""
+
+    def __init__(
+            self,
+            query: str,
+            synonyms: Optional[List[str]] = None,
+            case_sensitive: bool = settings.ANALYSIS_CASE_SENSITIVE,
+            whole_words: bool = settings.ANALYSIS_WHOLE_WORDS
+        ):
+        """
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+        2. synonyms : Optional[List[str]], (default None)
+            - extra phrases that count towards search_phrase_count, defaults
+                to settings.ANALYSIS_SYNONYMS for the query
+        3. case_sensitive : bool, (default settings.ANALYSIS_CASE_SENSITIVE)
+            - see TermMatcher
+        4. whole_words : bool, (default settings.ANALYSIS_WHOLE_WORDS)
+            - see TermMatcher
+        """
+        if synonyms is None:
+            synonyms = settings.ANALYSIS_SYNONYMS.get(query, [])
+        self.query = query
+        self.matcher = TermMatcher(
+            [query] + list(synonyms),
+            case_sensitive=case_sensitive,
+            whole_words=whole_words
+        )
+
+    def analyse(self, article_details: Dict[str, Any]) -> Dict[str, Any]:
+        """adds search_phrase_count, money_value_present and, when there are
+        synonyms, the term_counts of each phrase
+
+        #### Parameters
+        ------
+        1. article_details : Dict[str, Any]
+            - article details with title and description
+
+        #### Returns
+        ------
+        - Dict[str, Any]
+            - the same article details
+        """
+        # separated so a match can't run from the title into the description
+        text = "\n".join([
+            article_details.get("title") or "",
+            article_details.get("description") or ""
+        ])
+        term_counts = self.matcher.count(text)
+        article_details["search_phrase_count"] = sum(term_counts.values())
+        article_details["money_value_present"] = bool(MONEY_PATTERN.search(text))
+        if len(term_counts) > 1:
+            article_details["term_counts"] = term_counts
+        return article_details
+
+    def analyse_batch(
+            self,
+            articles: Iterable[Dict[str, Any]]
+        ) -> List[Dict[str, Any]]:
+        """analyses every article (see analyse)
+
+        #### Parameters
+        ------
+        1. articles : Iterable[Dict[str, Any]]
+            - article details with title and description
+
+        #### Returns
+        ------
+        - List[Dict[str, Any]]
+            - the same article details, in the same order
+        """
+        return [self.analyse(article_details) for article_details in articles]
+
+
+@functools.lru_cache(maxsize=None)
+def get_analyser(query: str) -> ArticleAnalyser:
+    """the analyser for the query, compiled on first use and shared by every
+    session after that
+
+    #### Parameters
+    ------
+    1. query : str
+        - search term
+
+    #### Returns
+    ------
+    - ArticleAnalyser
+        - analyser built from the settings
+    """
+    return ArticleAnalyser(query)
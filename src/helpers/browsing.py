@@ -1,27 +1,50 @@
 # built ins
-import re
+import json
+import os
 import time
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+from urllib.parse import quote_plus
 from dateutil.relativedelta import relativedelta
 
 # installed libs
-from RPA.Browser.Selenium import (
-    Selenium,
-    expected_conditions as EC,
-    By
-)
-from RPA.HTTP import HTTP
+# RPA.Browser.Selenium is only imported once a browser is opened (see
+# open_browser), the rest are the plain selenium modules it re-exports
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common import keys
+from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebElement
-from selenium.common.exceptions import (
-    NoSuchElementException,
-    NoSuchWindowException
-)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 
 # project modules
 from config import settings
 from logger import Logger
+from helpers.analysis import get_analyser
+from helpers.chrome import (
+    claim_debugger_address,
+    claim_user_data_dir,
+    release_debugger_address,
+    release_user_data_dir
+)
+from helpers.downloads import FAILED_IMAGE_NAME, ImageDownloader
+from helpers.index import ArticleIndex
+from helpers.metadata import METADATA_SCRIPT, date_from_metadata, date_sources
+from helpers.network import (
+    add_block_options,
+    apply_block_profile,
+    open_blocked_tab
+)
+from helpers.pagination import OUT_OF_WINDOW, DateWindowPlanner
+from helpers.pool import BrowserPool
+from helpers.prefetch import DOCUMENT_READY_SCRIPT, TabPrefetcher
+from helpers.popups import suppress_popups
+from helpers.profiling import profiler
+from helpers.rate_control import NAVIGATION_SCRIPT, THROTTLED_STATUSES, rate_limits
+from helpers.sinks import OUTPUT_COLUMNS
+from helpers.waits import LOAD_MORE_XPATH, wait_for_more_cards, wait_stats
 from helpers.util import (
     wait_and_retrieve_item,
     interact_with_element,
@@ -29,17 +52,125 @@ from helpers.util import (
 )
 
 
+# result standing in for a card an earlier pass of the search already took
+# (see HttpNewsBrowser.search_articles), neither a success nor a failure
+ALREADY_SEEN = object()
+
+# reads every loaded card in one round trip, returns plain values so nothing
+# goes stale when "Load More" re-renders the result list. pruned cards come
+# back as null so the rest keep their index. date_hint is the card's date
+# label if it has one, see helpers.pagination
+CARD_EXTRACTION_SCRIPT = """
+const text = (card, selector) => {
+    const element = card.querySelector(selector);
+    return element ? element.innerText : null;
+};
+return Array.from(
+    document.querySelectorAll('#resultList .gothamist-card')
+).map(card => {
+    if (card.classList.contains('pruned-card')) return null;
+    const image = card.querySelector('.image.native-image.prime-img-class');
+    const link = card.querySelector('.image-with-caption-image-link');
+    const date = card.querySelector(
+        'time, [datetime], [class*="date"], [class*="timestamp"]');
+    return {
+        image_url: image ? image.src : null,
+        title: text(card, '.h2'),
+        description: text(card, '.desc'),
+        article_link: link ? link.href : null,
+        date_hint: date
+            ? date.getAttribute('datetime') || date.innerText : null
+    };
+});
+"""
+
+
+# empties the first count cards once they're processed so the result list
+# doesn't keep growing in memory. the card nodes themselves stay (with only
+# their link) so the card count and indexes don't change and the page's own
+# scripts still find the nodes they rendered. returns the page's size after
+PRUNE_CARDS_SCRIPT = """
+const [count] = arguments;
+const cards = document.querySelectorAll('#resultList .gothamist-card');
+let pruned = 0;
+for (let i = 0; i < Math.min(count, cards.length); i++) {
+    const card = cards[i];
+    if (card.classList.contains('pruned-card')) continue;
+    const link = card.querySelector('.image-with-caption-image-link');
+    if (link) card.dataset.articleLink = link.href;
+    card.replaceChildren();
+    card.classList.add('pruned-card');
+    pruned++;
+}
+return {
+    pruned: pruned,
+    dom_nodes: document.getElementsByTagName('*').length,
+    js_heap_mb: performance.memory
+        ? performance.memory.usedJSHeapSize / 1024 / 1024 : null
+};
+"""
+
+
+class BrowserCrashed(Exception):
+    """chrome or its webdriver session died while processing a card"""
+
+
 class NewsBrowser(object):
-    def __init__(self, logger: Logger):
+    # whether articles are read in chrome tabs worth loading ahead of time
+    prefetches_articles = True
+
+    def __init__(
+            self,
+            logger: Logger,
+            downloader: Optional[ImageDownloader] = None,
+            index: Optional[ArticleIndex] = None,
+            pool: Optional[BrowserPool] = None
+        ):
         # no try-except here because parent wrapped in try catch and will log
         # and crash there if something goes wrong here
-        self.browser = Selenium()
+        # created in open_browser so sessions that never need chrome (the
+        # http backend) don't pay for importing RPA.Browser.Selenium
+        self.browser = None
+        self.url = settings.SEARCH_URL
+        self.main_window = None
+        self.user_data_dir = None
+        self.attached = False
         self.logger = logger
         self.ENV = settings.ENV
         self.logger.info("NewsBrowser initialized")
-        self.RPA_HTTP = HTTP()
+        # pool workers share the main session's downloader so the download
+        # concurrency limit holds across all of them
+        self.owns_downloader = downloader is None
+        self.downloader = downloader or ImageDownloader(logger=logger)
+        # only main sessions get a pool, workers are plain sessions. the pool
+        # and index can be shared between the sessions of concurrent queries,
+        # whoever opened them closes them
+        self.pool = pool
+        self.owns_pool = False
+        # article links already handled elsewhere, cards linking to these are
+        # skipped without loading anything
+        self.skip_links: Set[str] = set()
+        self.index = index
+        self.owns_index = False
+        # sequential search only, set up in _process_batch
+        self.prefetcher: Optional[TabPrefetcher] = None
+        # articles served from the index this run
+        self.indexed_links: Set[str] = set()
+        # whether this session has run a search yet, later ones don't need
+        # the search page (see _submit_search)
+        self.searched = False
+        # set up for each search in _start_search
+        self.planner: Optional[DateWindowPlanner] = None
+        self.run_started: Optional[datetime] = None
+        self.articles_start_date: Optional[datetime] = None
+        self.coverage: Optional[Tuple[datetime, datetime]] = None
+        self.reached_indexed = False
+        # kept instead of looking through the output so a streaming sink
+        # doesn't have to hold on to its rows
+        self.output_links: Set[str] = set()
 
     # defining open and close methods separately to re-initialize on crashes
+    # (see restart_browser)
 
     def open_browser(self, url: str):
         """sets the browser options and attempts to open it to the specified url
@@ -59,46 +190,215 @@ class NewsBrowser(object):
                 - when failing to open the browser
         """
         try:
-        
-            # options for the headless browser
-            options = webdriver.ChromeOptions()
-            # local usage
-            options.add_argument("--headless")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            # popup blocking
-            # options.add_experimental_option("prefs", {
-            #     "profile.default_content_setting_values.notifications": 2,
-            #     "download.prompt_for_download": True,
-            #     "download.directory_upgrade": True,
-            #     "safebrowsing.enabled": True
-            # })
-            # using WSL locally with headless chrome so want to be able to have
-            # this work locally and in the cloud based on options
-            if self.ENV == "local":
-                service = webdriver.ChromeService(
-                    executable_path="/usr/bin/chromedriver",
-                    log_output="logs/chrome_driver.log"
-                )
+            self.url = url
+            if self.browser is None:
+                from RPA.Browser.Selenium import Selenium
+                self.browser = Selenium()
 
-                driver = webdriver.Chrome(options=options, service=service)
-                driver_id = self.browser.register_driver(driver, "my_driver")
-                self.browser.switch_browser(driver_id)
+            debugger_address = claim_debugger_address(
+                settings.CHROME_DEBUGGER_ADDRESS)
+            if debugger_address is not None:
+                self._attach_browser(debugger_address)
             else:
-                self.browser.open_available_browser(
-                    options=options,
-                    browser_selection="chrome"
-                )
-            
-            # setting a specific size for consistent handling
-            self.browser.set_window_size(1024, 768)
-            self.browser.go_to(url)
+                self._start_browser()
+            self.main_window = self.browser.driver.current_window_handle
 
+            # handles consent and close popups for the whole session so we
+            # don't have to look for them before every interaction
+            suppress_popups(self.logger, self.browser.driver)
+            apply_block_profile(
+                self.logger, self.browser.driver, settings.BLOCK_PROFILE)
+            self.browser.go_to(url)
+            profiler.milestone("browser_open")
 
         except Exception as e:
             self.logger.exception(f"Failed to open browser, reason: {e}")
             raise Exception("failed to open browser")
 
+    def _start_browser(self):
+        # options for the headless browser
+        options = webdriver.ChromeOptions()
+        # local usage
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        # keeps chrome from loading ads, trackers, fonts etc we never use
+        add_block_options(options, settings.BLOCK_PROFILE)
+        # a persistent profile keeps chrome's http cache and the consent
+        # cookies from the last run
+        self.user_data_dir = claim_user_data_dir(settings.CHROME_USER_DATA_DIR)
+        if self.user_data_dir is not None:
+            options.add_argument(f"--user-data-dir={self.user_data_dir}")
+        # popup blocking
+        # options.add_experimental_option("prefs", {
+        #     "profile.default_content_setting_values.notifications": 2,
+        #     "download.prompt_for_download": True,
+        #     "download.directory_upgrade": True,
+        #     "safebrowsing.enabled": True
+        # })
+        # using WSL locally with headless chrome so want to be able to have
+        # this work locally and in the cloud based on options
+        if self.ENV == "local":
+            service = webdriver.ChromeService(
+                executable_path="/usr/bin/chromedriver",
+                log_output="logs/chrome_driver.log"
+            )
+
+            driver = webdriver.Chrome(options=options, service=service)
+            driver_id = self.browser.register_driver(driver, "my_driver")
+            self.browser.switch_browser(driver_id)
+        else:
+            self.browser.open_available_browser(
+                options=options,
+                browser_selection="chrome"
+            )
+
+        # setting a specific size for consistent handling
+        self.browser.set_window_size(1024, 768)
+
+    def _attach_browser(self, debugger_address: str):
+        # a long lived chrome started with --remote-debugging-port, it keeps
+        # its own launch flags so the block profile's host rules only apply
+        # if it was started with them
+        self.logger.info(f"attaching to chrome at {debugger_address}")
+        options = webdriver.ChromeOptions()
+        options.debugger_address = debugger_address
+        try:
+            driver = webdriver.Chrome(options=options)
+        except Exception:
+            release_debugger_address()
+            raise
+        driver_id = self.browser.register_driver(driver, "attached_driver")
+        self.browser.switch_browser(driver_id)
+        # work in our own tab and leave whatever else is open alone
+        driver.switch_to.new_window("tab")
+        self.attached = True
+
+    def _close_chrome(self):
+        try:
+            if self.attached:
+                # leave the long lived chrome running, only our tab goes
+                self.switch_to_main_window()
+                self.browser.driver.close()
+                self.browser.driver.service.stop()
+            elif self.browser is not None:
+                self.browser.close_all_browsers()
+        finally:
+            # its tabs went with chrome
+            self.prefetcher = None
+            if self.attached:
+                self.attached = False
+                release_debugger_address()
+            release_user_data_dir(self.user_data_dir)
+            self.user_data_dir = None
+            self.main_window = None
+
+    def browser_crashed(self) -> bool:
+        """whether the chrome this session opened has gone away, its search
+        tab closed, the webdriver session lost or chrome itself exited
+
+        #### Returns
+        ------
+        - bool
+            - False when chrome is fine or was never opened
+        """
+        if self.browser is None or self.main_window is None:
+            return False
+        try:
+            return self.main_window not in self.browser.driver.window_handles
+        except Exception:
+            return True
+
+    def restart_browser(self):
+        """replaces a crashed chrome with a new one on the same url, the
+        pool, downloader and index are left as they are
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the new browser
+        """
+        self.logger.warning("restarting crashed browser")
+        try:
+            self._close_chrome()
+        except Exception as e:
+            self.logger.warning(f"Failed to close crashed browser, reason: {e}")
+        NewsBrowser.open_browser(self, url=self.url)
+
+    def switch_to_main_window(self):
+        """switches back to the tab with the search results, does nothing
+        when chrome isn't open
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.browser is not None and self.main_window is not None:
+            self.browser.driver.switch_to.window(self.main_window)
+
+    def open_index(self, path: str = settings.ARTICLE_INDEX_PATH):
+        """opens the on disk article index so known articles aren't loaded
+        again, does nothing for an empty path
+
+        #### Parameters
+        ------
+        1. path : str, (default defined at settings.ARTICLE_INDEX_PATH)
+            - path to the sqlite index
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the index
+        """
+        if not path:
+            return
+
+        self.index = ArticleIndex(logger=self.logger, path=path)
+        self.index.open()
+        self.owns_index = True
+
+    def open_pool(self, size: int = settings.WORKER_POOL_SIZE):
+        """opens the worker sessions used to process articles in parallel,
+        does nothing for a size of 0
+
+        #### Parameters
+        ------
+        1. size : int, (default defined at settings.WORKER_POOL_SIZE)
+            - number of extra headless sessions to open
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the pool
+        """
+        if size < 1:
+            return
+
+        self.logger.info(f"opening browser pool with {size} workers")
+        self.pool = BrowserPool(
+            logger=self.logger,
+            size=size,
+            # workers use the same backend as the main session
+            factory=lambda: type(self)(
+                logger=self.logger,
+                downloader=self.downloader
+            )
+        )
+        self.pool.open()
+        self.owns_pool = True
+
     def close_browsers(self):
         """closes all open browsers
         
@@ -112,18 +412,32 @@ class NewsBrowser(object):
                 - when failing to close the browser
         """
         try:
-            self.browser.close_all_browsers()
+            if self.owns_pool:
+                self.pool.close()
+                self.pool = None
+                self.owns_pool = False
+            if self.owns_downloader:
+                self.downloader.close()
+            # after the downloader so late image names still get indexed
+            if self.owns_index:
+                self.index.close()
+                self.index = None
+                self.owns_index = False
+            self._close_chrome()
         except Exception as e:
             self.logger.exception(f"Failed to close browser, reason: {e}")
             raise Exception(
                 "Failed to close browser - see above for error info")
     
-    def load_more_cards(self):
+    def load_more_cards(self) -> bool:
         """loads more cards on the Gothamist website
         
         #### Returns
         ------
-            - None
+            - bool
+                - whether there was a "Load More" button to click, False
+                    means it didn't show up within the quiet period and
+                    we're likely at the end of the results
             
         #### Raises
         ------
@@ -131,46 +445,640 @@ class NewsBrowser(object):
                 - when failing to load more cards
         """
         try:
-            button_path = "//button/span[contains(text(), 'Load More')]"
-            load_more_button: WebElement = wait_and_retrieve_item(
-                self.logger,
-                driver=self.browser.driver,
-                expected_condition=EC.presence_of_element_located,
-                by=By.XPATH,
-                identifier=button_path
-            )
+            # the button re-renders after the cards of the last batch, so
+            # give it the quiet period to come back before calling it the end
+            try:
+                with wait_stats.waiting("load_more_button"):
+                    WebDriverWait(
+                        self.browser.driver,
+                        settings.END_OF_RESULTS_QUIET_PERIOD,
+                        poll_frequency=settings.WAIT_POLL_FREQUENCY
+                    ).until(EC.presence_of_element_located(
+                        (By.XPATH, LOAD_MORE_XPATH)))
+            except TimeoutException:
+                self.logger.info("No more cards to load.")
+                return False
 
-            _: WebElement = wait_and_retrieve_item(
+            load_more_button: WebElement = wait_and_retrieve_item(
                 self.logger,
                 driver=self.browser.driver,
                 expected_condition=EC.element_to_be_clickable,
                 by=By.XPATH,
-                identifier=button_path
+                identifier=LOAD_MORE_XPATH
             )
 
-            
             interact_with_element(
-                driver=self.browser.driver,
                 logger=self.logger,
                 element_interaction=load_more_button.click
             )
+            return True
 
-            # this loads very quickly so just loop through all of them until no
-            # more cards before starting processing
-            time.sleep(settings.DEFAULT_SLEEP)
-        
-        except NoSuchElementException:
-            self.logger.info("No more cards to load.")
         except Exception as e:
             self.logger.exception(
                 f"Failed to load more cards, reason: {e}")
             raise Exception(
                 "Failed to load more cards - see above for error info")
 
+    def get_cards(self, articles: WebElement) -> List[Union[WebElement, Dict[str, Any]]]:
+        """retrieves every card currently loaded in the result list
+
+        #### Parameters
+        ------
+        1. articles : WebElement
+            - the #resultList element
+
+        #### Returns
+        ------
+        - List[Union[WebElement, Dict[str, Any]]]
+            - card details dicts with settings.CARD_EXTRACTION_MODE "batched"
+                (one execute_script call for all of them, None for pruned
+                cards), the card elements with "elements"
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to retrieve the cards
+        """
+        if settings.CARD_EXTRACTION_MODE == "batched":
+            try:
+                return self.browser.driver.execute_script(
+                    CARD_EXTRACTION_SCRIPT)
+            except Exception as e:
+                self.logger.exception(
+                    f"Failed to extract cards, reason: {e}")
+                raise Exception(
+                    "Failed to extract cards - see above for error info")
+
+        return wait_and_retrieve_item(
+            self.logger,
+            driver=articles,
+            expected_condition=EC.presence_of_all_elements_located,
+            by=By.CLASS_NAME,
+            identifier="gothamist-card"
+        )
+
+    def prune_cards(self, count: int):
+        """empties the first count cards of the result list (see
+        PRUNE_CARDS_SCRIPT) and records the page's dom size and js heap so
+        we can see it stays flat over a long search
+
+        #### Parameters
+        ------
+        1. count : int
+            - number of cards processed so far
+
+        #### Returns
+        ------
+            - None
+        """
+        try:
+            with profiler.span("search.prune_cards"):
+                result = self.browser.driver.execute_script(
+                    PRUNE_CARDS_SCRIPT, count)
+        except Exception as e:
+            # pruning only saves memory, the search carries on without it
+            self.logger.warning(f"Failed to prune cards, reason: {e}")
+            return
+
+        profiler.sample("dom_nodes", result["dom_nodes"])
+        if result["js_heap_mb"] is not None:
+            profiler.sample("js_heap_mb", round(result["js_heap_mb"], 2))
+        self.logger.debug(
+            f"pruned {result['pruned']} cards, page now has "
+            f"{result['dom_nodes']} nodes and {result['js_heap_mb']}mb js heap")
+
+    def read_card(self, card: Union[WebElement, Dict[str, Any]]) -> Dict[str, Any]:
+        """reads the urls and text we need off a search result card, kept
+        separate from the article processing so that part can be handed to
+        another session
+
+        #### Parameters
+        ------
+        1. card : Union[WebElement, Dict[str, Any]]
+            - gothamist-card element from the search results, or the details
+                already extracted by the batched script
+
+        #### Returns
+        ------
+        - Dict[str, Any]
+            - image_url, title and description of the card, plus the
+                article_link the article is opened and indexed by
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to read the card
+        """
+        if isinstance(card, dict):
+            # cards without an image still get processed, the downloader
+            # records the missing image name
+            if not card.get("article_link"):
+                raise Exception("card has no article link")
+            article_details = dict(card)
+            # only the planner needs it, it isn't part of the output
+            article_details.pop("date_hint", None)
+            return article_details
+
+        article_details = {}
+
+        # retrieve the image url, plenty of cards have no image so this
+        # gives up quickly and the downloader records the missing name
+        image = wait_and_retrieve_item(
+            self.logger,
+            driver=card,
+            expected_condition=EC.presence_of_element_located,
+            by=By.CSS_SELECTOR,
+            identifier=".image.native-image.prime-img-class",
+            optional=True
+        )
+        article_details["image_url"] = (
+            image.get_attribute('src') if image is not None else None)
+
+        article_details["title"] = wait_and_retrieve_item(
+            self.logger,
+            driver=card,
+            expected_condition=EC.presence_of_element_located,
+            by=By.CLASS_NAME,
+            identifier="h2"
+        ).text
+
+        description = wait_and_retrieve_item(
+            self.logger,
+            driver=card,
+            expected_condition=EC.presence_of_element_located,
+            by=By.CLASS_NAME,
+            identifier="desc",
+            optional=True
+        )
+        article_details["description"] = (
+            description.text if description is not None else "")
+
+        # not an output column, the article is opened and indexed by it
+        article_details["article_link"] = wait_and_retrieve_item(
+            self.logger,
+            driver=card,
+            expected_condition=EC.presence_of_element_located,
+            by=By.CLASS_NAME,
+            identifier="image-with-caption-image-link"
+        ).get_attribute('href')
+
+        return article_details
+
+    def read_date_published(self, article_link: str) -> datetime:
+        """opens the article in a new tab and reads the published date from
+        its json-ld or meta tags as soon as the document is parsed, only
+        waiting for the date caption to render when they don't have it
+
+        #### Parameters
+        ------
+        1. article_link : str
+            - url of the article
+
+        #### Returns
+        ------
+        - datetime
+            - date the article was published
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to read the date
+        """
+        # prefetched tabs are bounded by the rate limit when they're filled,
+        # otherwise every session loading articles takes a slot
+        with (nullcontext() if self.prefetcher is not None
+                else rate_limits.get(article_link).slot()):
+            return self._read_date_published(article_link)
+
+    def _read_date_published(self, article_link: str) -> datetime:
+        with profiler.span("tab_switch"):
+            if self.prefetcher is not None:
+                self.prefetcher.open(article_link)
+            else:
+                open_blocked_tab(
+                    self.logger, self.browser.driver, settings.BLOCK_PROFILE)
+                # doesn't wait for the page to load, read_metadata_date
+                # waits for just the document
+                self.browser.driver.execute_script(
+                    "window.location.href = arguments[0];", article_link)
+
+        read_started = time.perf_counter()
+        try:
+            date_published, source = self.read_metadata_date(article_link)
+            if date_published is None:
+                date_published_element: WebElement = wait_and_retrieve_item(
+                    self.logger,
+                    driver=self.browser.driver,
+                    expected_condition=EC.presence_of_element_located,
+                    by=By.CSS_SELECTOR,
+                    identifier=".date-published p.type-caption"
+                )
+
+                _ = wait_and_retrieve_item(
+                    self.logger,
+                    driver=self.browser.driver,
+                    expected_condition=EC.text_to_be_present_in_element,
+                    by=By.CSS_SELECTOR,
+                    identifier=".date-published p.type-caption",
+                    additional_params=[date_published_element.text]
+                )
+
+                date_published = extract_date(
+                    logger=self.logger,
+                    published_string=date_published_element.get_attribute(
+                        "textContent")
+                )
+                source = "rendered"
+        finally:
+            with profiler.span("tab_switch"):
+                if self.prefetcher is not None:
+                    # the tab is kept for the next prefetch
+                    self.prefetcher.release(
+                        article_link, time.perf_counter() - read_started)
+                else:
+                    self.browser.driver.close()
+                    self.switch_to_main_window()
+
+        date_sources.record(source)
+        return date_published
+
+    def read_metadata_date(
+            self,
+            article_link: str
+        ) -> Tuple[Optional[datetime], Optional[str]]:
+        """reads the published date from the json-ld and meta tags of the
+        current tab once its document has been parsed. how the page load went
+        is fed to the site's rate controller, a throttled page is reloaded
+        once its backoff has passed
+
+        #### Parameters
+        ------
+        1. article_link : str
+            - url of the article loading in the current tab
+
+        #### Returns
+        ------
+        - Tuple[Optional[datetime], Optional[str]]
+            - the date and where it came from, (None, None) when the page
+                doesn't have it (see helpers.metadata.date_from_metadata)
+        """
+        controller = rate_limits.get(article_link)
+        try:
+            for attempt in range(settings.RATE_MAX_RETRIES + 1):
+                with wait_stats.waiting("document"):
+                    WebDriverWait(
+                        self.browser.driver,
+                        settings.DEFAULT_TIMEOUT,
+                        poll_frequency=settings.WAIT_POLL_FREQUENCY
+                    ).until(lambda driver: driver.execute_script(
+                        DOCUMENT_READY_SCRIPT))
+                navigation = self.browser.driver.execute_script(
+                    NAVIGATION_SCRIPT) or {}
+                status = navigation.get("status")
+                # chrome doesn't expose the Retry-After header, the default
+                # backoff applies
+                controller.observe(navigation.get("seconds"), status=status)
+                if (status not in THROTTLED_STATUSES or not controller.enabled
+                        or attempt == settings.RATE_MAX_RETRIES):
+                    break
+                self.logger.warning(
+                    f"{article_link} was throttled ({status}), reloading")
+                controller.wait()
+                self.browser.driver.refresh()
+            metadata = self.browser.driver.execute_script(METADATA_SCRIPT)
+            return date_from_metadata(metadata["json_ld"], metadata["meta"])
+        except Exception as e:
+            # the rendered caption is still there to fall back on
+            self.logger.warning(f"Failed to read article metadata, reason: {e}")
+            return None, None
+
+    def process_article(
+            self,
+            article_details: Dict[str, Any],
+            query: str
+        ) -> Dict[str, Any]:
+        """queues the card image download and loads the article page for the
+        published date on this session, fills in the rest of article_details
+
+        #### Parameters
+        ------
+        1. article_details : Dict[str, Any]
+            - card details as returned by read_card
+        2. query : str
+            - search term, used for the search phrase count
+
+        #### Returns
+        ------
+        - Dict[str, Any]
+            - the output columns in order, image_name being a Future until
+                the search resolves it, followed by article_link
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to process the article
+        """
+        # queued, the name gets filled in once the search is done
+        article_details["image_name"] = self.downloader.submit(
+            article_details["image_url"])
+
+        self.analyse_article(article_details, query)
+
+        article_details["date_published"] = self.read_date_published(
+            article_details["article_link"])
+
+        # output columns first and in their order, article_link and the
+        # analysis extras trail behind and aren't written out
+        output = {name: article_details.pop(name) for name in OUTPUT_COLUMNS}
+        output.update(article_details)
+        return output
+
+    def analyse_article(self, article_details: Dict[str, Any], query: str):
+        """adds the search_phrase_count and money_value_present fields worked
+        out from the title and description, see helpers.analysis
+
+        #### Parameters
+        ------
+        1. article_details : Dict[str, Any]
+            - article details with title and description
+        2. query : str
+            - search term to count
+
+        #### Returns
+        ------
+            - None
+        """
+        get_analyser(query).analyse(article_details)
+
+    def _from_index(self, indexed: Dict[str, Any]) -> Dict[str, Any]:
+        # the analysis depends on the query so callers redo it, the image is
+        # fetched again if this runner doesn't have it on disk
+        image_name = indexed["image_name"]
+        if (indexed["image_url"] and (image_name == FAILED_IMAGE_NAME
+                or not os.path.exists(f"{settings.OUTPUT_PATH}/{image_name}"))):
+            indexed["image_name"] = self.downloader.submit(indexed["image_url"])
+        self.indexed_links.add(indexed["article_link"])
+        return indexed
+
+    def _process_details(
+            self,
+            browser: "NewsBrowser",
+            article_details: Dict[str, Any],
+            query: str,
+            index: int
+        ) -> Optional[Dict[str, Any]]:
+        # shared by the sequential and pool paths, browser is whichever
+        # session does the page loads
+        started = time.perf_counter()
+        article_link = article_details["article_link"]
+        if article_link in self.skip_links:
+            self.log_card(query, index, article_link, "skipped", started)
+            return ALREADY_SEEN
+
+        if self.index is not None:
+            with profiler.span("index.get"):
+                indexed = self.index.get(article_link)
+            if indexed is not None:
+                self.logger.info(f"card {index} already indexed")
+                self.analyse_article(indexed, query)
+                self.log_card(query, index, article_link, "indexed", started)
+                return self._from_index(indexed)
+
+        self.logger.info(f"on card {index}")
+        with profiler.span("search.process_article"):
+            article_details = browser.process_article(article_details, query)
+        if self.index is not None:
+            self.index.add(article_details, query)
+        profiler.milestone("first_card")
+        self.log_card(query, index, article_link, "processed", started)
+        return article_details
+
+    def log_card(
+            self,
+            query: str,
+            index: int,
+            article_link: Optional[str],
+            outcome: str,
+            started: float,
+            error: Optional[Exception] = None
+        ):
+        """writes the compact record of one card to settings.CARD_LOG_FILE,
+        every card gets one however much of the log is sampled away
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term the card was found with
+        2. index : int
+            - position of the card in the results
+        3. article_link : Optional[str]
+            - url of the article, None when the card couldn't be read
+        4. outcome : str
+            - "processed", "indexed", "skipped", "out_of_window" or "failed"
+        5. started : float
+            - time.perf_counter() when work on the card started
+        6. error : Optional[Exception], (default None)
+            - why the card failed
+
+        #### Returns
+        ------
+            - None
+        """
+        self.logger.bind(card_record=True).info(json.dumps({
+            "query": query,
+            "card": index,
+            "article_link": article_link,
+            "outcome": outcome,
+            "seconds": round(time.perf_counter() - started, 4),
+            "error": str(error) if error is not None else None
+        }))
+
+    def _process_details_restarting(
+            self,
+            browser: "NewsBrowser",
+            article_details: Dict[str, Any],
+            query: str,
+            index: int
+        ) -> Optional[Dict[str, Any]]:
+        # for sessions that don't paginate (pool workers, the http backend's
+        # fallback chrome) a crash only costs the card, so chrome is restarted
+        # and the card tried once more
+        try:
+            return self._process_details(browser, article_details, query, index)
+        except Exception:
+            if not browser.browser_crashed():
+                raise
+            self.logger.warning(
+                f"browser crashed on card {index}, restarting it")
+            browser.restart_browser()
+            return self._process_details(browser, article_details, query, index)
+
+    def _process_card(
+            self,
+            card: Union[WebElement, Dict[str, Any]],
+            query: str,
+            index: int
+        ):
+        # sequential path, everything happens on the main session. whatever
+        # is logged while on the card carries it for the sampling in logger
+        with self.logger.contextualize(card=index, query=query):
+            started = time.perf_counter()
+            try:
+                article_details = self.read_card(card)
+                return self._process_details(self, article_details, query, index)
+            except Exception as e:
+                if self.browser_crashed():
+                    # the supervisor in search_articles restarts chrome and
+                    # comes back to this card
+                    raise BrowserCrashed(
+                        f"browser crashed on card {index}") from e
+                self.logger.exception(
+                    f"Failed to process card {index}, reason: {e}")
+                self.log_card(
+                    query, index, self._card_link(card), "failed", started, e)
+                self.logger.info("continuing to process the rest of the cards...")
+                # make sure we're back on the search results for the next card
+                self.switch_to_main_window()
+                return None
+
+    def _card_link(self, card: Union[WebElement, Dict[str, Any], None]) -> Optional[str]:
+        # only batched cards have their link without another lookup
+        return card.get("article_link") if isinstance(card, dict) else None
+
+    def _skip_card(
+            self,
+            card: Union[WebElement, Dict[str, Any]],
+            query: str,
+            index: int
+        ) -> Optional[object]:
+        # cards that don't need reading, ALREADY_SEEN for ones an earlier
+        # pass of the search took (so the planner doesn't see them twice) and
+        # OUT_OF_WINDOW for ones their date hint puts before the window
+        link = self._card_link(card)
+        if link is not None and link in self.skip_links:
+            self.log_card(query, index, link, "skipped", time.perf_counter())
+            return ALREADY_SEEN
+        if self.planner is not None and self.planner.out_of_window(card):
+            self.log_card(
+                query, index, link, "out_of_window", time.perf_counter())
+            return OUT_OF_WINDOW
+        return None
+
+    def _process_batch_in_pool(
+            self,
+            cards: List[Union[WebElement, Dict[str, Any]]],
+            query: str,
+            start_index: int
+        ) -> List[Optional[Dict[str, Any]]]:
+        # the main session only reads the cards, the article and image loads
+        # are spread over the worker sessions
+        batch = []
+        for offset, card in enumerate(cards):
+            index = start_index + offset + 1
+            skipped = self._skip_card(card, query, index)
+            if skipped is not None:
+                batch.append((index, skipped))
+                continue
+            with self.logger.contextualize(card=index, query=query):
+                started = time.perf_counter()
+                try:
+                    batch.append((index, self.read_card(card)))
+                except Exception as e:
+                    self.logger.exception(
+                        f"Failed to read card {index}, reason: {e}")
+                    self.log_card(
+                        query, index, self._card_link(card), "failed",
+                        started, e)
+                    batch.append((index, None))
+
+        def process(worker: "NewsBrowser", item):
+            index, article_details = item
+            if (article_details is None or article_details is OUT_OF_WINDOW
+                    or article_details is ALREADY_SEEN):
+                return article_details
+            with self.logger.contextualize(card=index, query=query):
+                started = time.perf_counter()
+                try:
+                    return self._process_details_restarting(
+                        worker, article_details, query, index)
+                except Exception as e:
+                    self.logger.exception(
+                        f"Failed to process card {index}, reason: {e}")
+                    self.log_card(
+                        query, index, article_details["article_link"],
+                        "failed", started, e)
+                    # leave the worker on its base window for the next card
+                    try:
+                        worker.switch_to_main_window()
+                    except Exception:
+                        pass
+                    return None
+
+        return self.pool.map(process, batch)
+
+    def _process_batch(
+            self,
+            cards: List[Union[WebElement, Dict[str, Any]]],
+            query: str,
+            start_index: int
+        ) -> Iterator[Optional[Dict[str, Any]]]:
+        """yields the processed article details of the cards in order, None
+        for cards that failed, helpers.pagination.OUT_OF_WINDOW for cards
+        the planner skipped and ALREADY_SEEN for ones already taken. lazy in
+        sequential mode so we stop loading articles as soon as the caller
+        stops iterating"""
+        if self.pool is not None:
+            yield from self._process_batch_in_pool(cards, query, start_index)
+            return
+
+        if (self.prefetcher is None and self.prefetches_articles
+                and settings.PREFETCH_MAX_TABS > 0
+                and self.main_window is not None):
+            self.prefetcher = TabPrefetcher(
+                self.logger,
+                driver=self.browser.driver,
+                main_window=self.main_window,
+                max_tabs=settings.PREFETCH_MAX_TABS
+            )
+
+        for offset, card in enumerate(cards):
+            skipped = self._skip_card(card, query, start_index + offset + 1)
+            if skipped is not None:
+                yield skipped
+                continue
+            if self.prefetcher is not None:
+                self._prefetch(cards[offset:])
+            yield self._process_card(card, query, start_index + offset + 1)
+
+    def _prefetch(self, cards: List[Union[WebElement, Dict[str, Any]]]):
+        # only batched cards have their links before they're read, cards
+        # that will be skipped or served from the index aren't loaded
+        links = []
+        for card in cards:
+            if (len(links) >= self.prefetcher.max_tabs
+                    or not isinstance(card, dict)):
+                break
+            link = card.get("article_link")
+            if (not link or link in self.skip_links
+                    or (self.planner is not None
+                        and self.planner.out_of_window(card))
+                    or (self.index is not None
+                        and self.index.get(link) is not None)):
+                continue
+            links.append(link)
+
+        try:
+            self.prefetcher.fill(links)
+        except Exception as e:
+            if self.browser_crashed():
+                raise BrowserCrashed("browser crashed while prefetching") from e
+            self.logger.warning(f"Failed to prefetch articles, reason: {e}")
+
     def search_articles(
             self,
             query: str,
-            months: int = 1
+            months: int = 1,
+            sink: Optional[Any] = None
         ):
         """
         Search for articles on the Gothamist website based on the query
@@ -181,13 +1089,17 @@ class NewsBrowser(object):
         - search term to search for
         2. months : int, (default=1)
         - number of months to search back for articles
+        3. sink : Optional[Any], (default=None)
+        - anything with an append method (e.g. helpers.sinks.ExcelRowSink),
+            each article is appended as soon as it is processed. the sink
+            resolves the image names itself
         
         #### Returns
         ------
         - List[Dict[str, Any]]
             - list of dictionaries containing the article details
             - (title, description, search_phrase_count, money_value_present,
-            - date_published)
+            - date_published), or the sink when one was passed
             
         #### Raises
         ------
@@ -198,32 +1110,268 @@ class NewsBrowser(object):
         try:
             self.logger.info("entering search function")
 
-            search_bar: WebElement = wait_and_retrieve_item(
-                self.logger,
-                driver=self.browser.driver,
-                expected_condition=EC.presence_of_element_located,
-                by=By.CLASS_NAME,
-                identifier="search-page-input"
-            )
-            
-            interact_with_element(
-                driver=self.browser.driver,
-                logger=self.logger,
-                element_interaction=search_bar.click
-            )
-            interact_with_element(
-                driver=self.browser.driver,
-                logger=self.logger,
-                element_interaction=search_bar.send_keys,
-                params=[query]
-            )
+            output_data = sink if sink is not None else []
+            self._start_search(query, months)
+            ended = self._search_pages(query, output_data)
+            self._finish_search(query, ended)
+            self.logger.info(f"search complete for {query}")
 
-            interact_with_element(
-                driver=self.browser.driver,
-                logger=self.logger,
-                element_interaction=search_bar.send_keys,
-                params=[keys.Keys.ENTER]
+            if sink is not None:
+                return sink
+            return self.downloader.resolve(output_data)
+
+        except Exception as e:
+            self.logger.exception(
+                f"Failed to search for articles, reason: {e}")
+            raise Exception(
+                "Failed to search for articles - see above for error info")
+
+    def _start_search(self, query: str, months: int):
+        """sets up the planner and index bookkeeping for a search, shared by
+        every way of going through the results (see HttpNewsBrowser)
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term to search for
+        2. months : int
+            - number of months to search back for articles
+
+        #### Returns
+        ------
+            - None
+        """
+        self.run_started = datetime.now()
+        self.articles_start_date = self.run_started - relativedelta(months=months)
+        self.planner = DateWindowPlanner(
+            self.logger, self.articles_start_date, now=self.run_started)
+        self.output_links = set()
+        # the session can be reused for another query, what the last one
+        # took or served from the index says nothing about this one
+        self.skip_links = set()
+        self.indexed_links = set()
+        self.reached_indexed = False
+        self.coverage = None
+        if self.index is not None:
+            self.index.start_search(query)
+            self.coverage = self.index.coverage(query)
+
+    @property
+    def search_done(self) -> bool:
+        """whether the search has what it needs from the result list"""
+        return self.reached_indexed or self.planner.finished
+
+    def _take_result(
+            self,
+            article_details: Any,
+            query: str,
+            output_data: Any
+        ) -> bool:
+        """adds the next result in card order to the output and feeds it to
+        the planner, taking the rest of the window from the index once the
+        results reach what a completed run indexed
+
+        #### Parameters
+        ------
+        1. article_details : Any
+            - processed article details, None for a card that failed,
+                OUT_OF_WINDOW or ALREADY_SEEN
+        2. query : str
+            - search term
+        3. output_data : Any
+            - list or sink the articles are appended to
+
+        #### Returns
+        ------
+        - bool
+            - False once the search is done with the result list
+        """
+        if article_details is ALREADY_SEEN:
+            return True
+        if article_details is None:
+            # the rest of the window isn't covered past a card that failed
+            self.planner.fail()
+            return True
+        if article_details is OUT_OF_WINDOW:
+            return self.planner.observe(False, skipped=True)
+
+        published = article_details["date_published"]
+        in_window = published > self.articles_start_date
+        if in_window:
+            output_data.append(article_details)
+            self.output_links.add(article_details["article_link"])
+        # a few results past the window are tolerated in case the results
+        # aren't strictly in date order
+        if not self.planner.observe(in_window, published=published):
+            return False
+
+        if (in_window
+                and self.coverage is not None
+                and self.coverage[0] <= self.articles_start_date
+                and published <= self.coverage[1]
+                and article_details["article_link"] in self.indexed_links):
+            # a completed run indexed everything from here back, no need to
+            # paginate further
+            self.logger.info(
+                "reached indexed results, taking the rest of the window from "
+                "the index")
+            remaining = [
+                indexed
+                for indexed in self.index.search_results(
+                    query, self.articles_start_date)
+                if indexed["article_link"] not in self.output_links
+            ]
+            for indexed in get_analyser(query).analyse_batch(remaining):
+                output_data.append(self._from_index(indexed))
+            self.reached_indexed = True
+            return False
+        return True
+
+    def _search_pages(self, query: str, output_data: Any) -> bool:
+        """goes through the selenium search results, loading more until the
+        search is done or the results end. chrome is restarted and the
+        search resumed where it was if it crashes
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term to search for
+        2. output_data : Any
+            - list or sink the articles are appended to
+
+        #### Returns
+        ------
+        - bool
+            - whether the results really ended (rather than the wait for more
+                cards timing out or the search being done early)
+        """
+        articles = self._submit_search(query)
+        cards = self.get_cards(articles)
+        cards_length = len(cards)
+        # number of cards processed so far, where we resume after a crash
+        index = 0
+        # only a result list that stopped growing with no "Load More" left
+        # counts, not a wait for more cards that timed out
+        results_ended = False
+
+        self.logger.info("going through cards")
+
+        restarts = 0
+        while True:
+            try:
+                while not self.search_done and index < cards_length:
+                    # load more cards whenever we start processing a batch
+                    # so we can grab new ones at the end of it
+                    with profiler.span("search.load_more"):
+                        more_requested = self.load_more_cards()
+
+                    for article_details in self._process_batch(
+                            cards[index:cards_length], query, index):
+                        index += 1
+                        if not self._take_result(
+                                article_details, query, output_data):
+                            break
+
+                    if not self.search_done:
+                        # make sure we're on the correct window before
+                        # attempting to interact with cards
+                        self.switch_to_main_window()
+                        if settings.PRUNE_PROCESSED_CARDS:
+                            self.prune_cards(index)
+                        with profiler.span("search.refresh_cards"):
+                            if more_requested:
+                                new_cards_length, ended = wait_for_more_cards(
+                                    self.logger,
+                                    driver=self.browser.driver,
+                                    count=cards_length
+                                )
+                            else:
+                                # no button doesn't mean the end yet, it
+                                # only counts once the list has stayed quiet
+                                # without one (see wait_for_more_cards)
+                                new_cards_length, ended = wait_for_more_cards(
+                                    self.logger,
+                                    driver=self.browser.driver,
+                                    count=cards_length
+                                )
+
+                        if new_cards_length > cards_length:
+                            with profiler.span("search.get_cards"):
+                                cards = self.get_cards(articles)
+                            cards_length = len(cards)
+                        elif ended:
+                            # index == cards_length so the loop stops here
+                            results_ended = True
+                            self.logger.info(
+                                f"reached the end of results for {query}")
+                return results_ended
+
+            except Exception as e:
+                if not self.browser_crashed():
+                    raise
+                restarts += 1
+                if restarts > settings.MAX_BROWSER_RESTARTS:
+                    raise Exception(
+                        f"browser crashed {restarts} times, giving up") from e
+                self.logger.warning(
+                    f"browser crashed after {index} cards, restarting it "
+                    f"and resuming ({restarts} of "
+                    f"{settings.MAX_BROWSER_RESTARTS} restarts)")
+                self.restart_browser()
+                articles, cards = self._resume_search(query, depth=index)
+                cards_length = len(cards)
+
+    def _finish_search(self, query: str, ended: bool):
+        """records what the search covered in the index and reports the
+        planner
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+        2. ended : bool
+            - whether the results really ended
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.index is not None:
+            # the whole window only counts as covered when every card made
+            # it and the search didn't stop short of its end
+            self.index.finish_search(
+                query,
+                self.planner.covered_from(ended or self.reached_indexed),
+                self.run_started
             )
+        self.planner.report()
+
+    def _submit_search(self, query: str) -> WebElement:
+        """types the query into the search bar and waits for the first cards
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term to search for
+
+        #### Returns
+        ------
+        - WebElement
+            - the #resultList element
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to search
+        """
+        with profiler.span("search.submit_query"):
+            if self.searched:
+                # the tab is still on the last query's results, the results
+                # url is what the search bar submits so go straight there
+                self.browser.go_to(f"{self.url}?q={quote_plus(query)}")
+            else:
+                self._type_query(query)
+            self.searched = True
 
             articles: WebElement = wait_and_retrieve_item(
                 self.logger,
@@ -232,210 +1380,87 @@ class NewsBrowser(object):
                 by=By.ID,
                 identifier="resultList"
             )
-            
-            cards: WebElement = wait_and_retrieve_item(
+
+            # wait for the first cards to render before reading them
+            _ = wait_and_retrieve_item(
                 self.logger,
                 driver=articles,
                 expected_condition=EC.presence_of_all_elements_located,
                 by=By.CLASS_NAME,
                 identifier="gothamist-card"
             )
-            cards_length = len(cards)
+        return articles
 
-            output_data = []
-            index = 0
-            latest_date = datetime.now()
-            articles_start_date = latest_date - relativedelta(months=months)
+    def _type_query(self, query: str):
+        # types the query into the search bar of the page the browser was
+        # opened on
+        search_bar: WebElement = wait_and_retrieve_item(
+            self.logger,
+            driver=self.browser.driver,
+            expected_condition=EC.presence_of_element_located,
+            by=By.CLASS_NAME,
+            identifier="search-page-input"
+        )
 
-            self.logger.info("going through cards")
+        interact_with_element(
+            logger=self.logger,
+            element_interaction=search_bar.click
+        )
+        interact_with_element(
+            logger=self.logger,
+            element_interaction=search_bar.send_keys,
+            params=[query]
+        )
 
-            fresh_retrieval = True
-            while latest_date > articles_start_date and index < cards_length:
-                if fresh_retrieval:
-                    # load more cards whenever we start processing them
-                    # so we can grab new ones at the end of the batch
-                    self.load_more_cards()
-                    fresh_retrieval = False
-                        
-
-                card = cards[index]
-                index += 1
-                self.logger.info(f"on card {index}")
-
-                try:
-                    article_details = {}
-
-                    # retrieve the image url
-                    image_url: WebElement = wait_and_retrieve_item(
-                        self.logger,
-                        driver=card,
-                        expected_condition=EC.presence_of_element_located,
-                        by=By.CSS_SELECTOR,
-                        identifier=".image.native-image.prime-img-class"
-                    ).get_attribute('src')
-                    article_details["image_url"] = image_url
-                    self.browser.execute_javascript(
-                        f"window.open('{image_url}');"
-                        )
-                    
-                    self.browser.driver.switch_to.window(
-                        self.browser.driver.window_handles[-1])
-                    
-                    # get the image name after the url redirect (need to load
-                    # the page to get the image name)
-                    if self.browser.driver.current_url == 'about:blank':
-                        img_name = "failed to retrieve image name"
-                    else:
-                        img_name = self.browser.driver.current_url.split(
-                        'https://images-prod.gothamist.com/images/', 1)[1]
-                        
-                        self.RPA_HTTP.download(
-                            image_url,
-                            f"{settings.OUTPUT_PATH}/{img_name}"
-                        )
-
-
-                    article_details["image_name"] = img_name
-
-                    self.browser.driver.close()
-                    self.browser.driver.switch_to.window(
-                        self.browser.driver.window_handles[0])
-
-                    
-                    # we load the article and image url as early as possible here
-                    # so that we can get to them after the rest of the processing
-                    # because it takes a while to load in the date (happens after
-                    # everything else is done)
-                    article_link: WebElement = wait_and_retrieve_item(
-                        self.logger,
-                        driver=card,
-                        expected_condition=EC.presence_of_element_located,
-                        by=By.CLASS_NAME,
-                        identifier="image-with-caption-image-link"
-                    ).get_attribute('href')
-                    self.browser.execute_javascript(
-                        f"window.open('{article_link}');")
-
-
-                    title: WebElement = wait_and_retrieve_item(
-                        self.logger,
-                        driver=card,
-                        expected_condition=EC.presence_of_element_located,
-                        by=By.CLASS_NAME,
-                        identifier="h2"
-                    ).text
-                    
-
-                    article_details["title"] = title
-
-                    description: WebElement = wait_and_retrieve_item(
-                        self.logger,
-                        driver=card,
-                        expected_condition=EC.presence_of_element_located,
-                        by=By.CLASS_NAME,
-                        identifier="desc"
-                    ).text
-                    
-
-                    article_details["description"] = description
-
-                    combined_title_description = title + description
-
-                    search_phrase_count = combined_title_description.count(query)
-                    article_details["search_phrase_count"] = search_phrase_count
-
-                    money_regex = r"\$\d+(,\d{3})*(\.\d{1,2})?|\d+ dollars|\d+ USD"
-
-                    money_value_present = bool(
-                        re.search(money_regex, combined_title_description))
-
-                    article_details["money_value_present"] = money_value_present
-
-                    # go and get the details of the article page we opened earlier
-                    self.browser.driver.switch_to.window(
-                        self.browser.driver.window_handles[-1])
-                    # get the image name after the url (need to load the page to
-                    # get the image name)
-                    date_published_element: WebElement = wait_and_retrieve_item(
-                        self.logger,
-                        driver=self.browser.driver,
-                        expected_condition=EC.presence_of_element_located,
-                        by=By.CSS_SELECTOR,
-                        identifier=".date-published p.type-caption"
-                    )
-
-                    _ = wait_and_retrieve_item(
-                        self.logger,
-                        driver=self.browser.driver,
-                        expected_condition=EC.text_to_be_present_in_element,
-                        by=By.CSS_SELECTOR,
-                        identifier=".date-published p.type-caption",
-                        additional_params=[date_published_element.text]
-                    )
-
-
-                    date_published = date_published_element.get_attribute(
-                        "textContent")
-
-                    article_details["date_published"] = extract_date(
-                        logger=self.logger,
-                        published_string=date_published
-                    )
-                    
-                    self.browser.driver.close()
-                    self.browser.driver.switch_to.window(
-                        self.browser.driver.window_handles[0])
-                    
-                    
-                    latest_date = article_details["date_published"]
-
-                    if latest_date > articles_start_date:
-                        output_data.append(article_details)
-                    
-                except Exception as e:
-                    self.logger.exception(
-                        f"Failed to process card {index}, reason: {e}")
-                    self.logger.info("continuing to process the rest of the cards...")
-                    
-
-                if index == cards_length:
-                    # make sure we're on the correct window before attempting
-                    # to interact with cards
-                    self.browser.driver.switch_to.window(
-                        self.browser.driver.window_handles[0])
-                    new_card_request_count = 0
-                    while True:
-                        cards: WebElement = wait_and_retrieve_item(
-                            self.logger,
-                            driver=articles,
-                            expected_condition=EC.presence_of_all_elements_located,
-                            by=By.CLASS_NAME,
-                            identifier="gothamist-card"
-                        )
-
-                        new_cards_length = len(cards)
+        interact_with_element(
+            logger=self.logger,
+            element_interaction=search_bar.send_keys,
+            params=[keys.Keys.ENTER]
+        )
 
-                        if new_cards_length > cards_length:
-                            fresh_retrieval = True
-                            cards_length = new_cards_length
-                            break
+    def _resume_search(
+            self,
+            query: str,
+            depth: int
+        ) -> Tuple[WebElement, List[Union[WebElement, Dict[str, Any]]]]:
+        """runs the search again on a fresh browser and clicks "Load More"
+        until more than depth cards are loaded (or the results end), so the
+        search can carry on from card depth
 
-                        new_card_request_count += 1
-                        time.sleep(1)
-                
-            self.logger.info(f"search complete for {query}")
+        #### Parameters
+        ------
+        1. query : str
+            - search term to search for
+        2. depth : int
+            - number of cards already processed
 
-            return output_data
+        #### Returns
+        ------
+        - Tuple[WebElement, List[Union[WebElement, Dict[str, Any]]]]
+            - the #resultList element and its cards (see get_cards)
 
-        except NoSuchWindowException:
-            # happens when certain images fail to download, we want to continue
-            # with the other cards in this case
-            pass
-        except Exception as e:
-            self.logger.exception(
-                f"Failed to search for articles, reason: {e}")
-            raise Exception(
-                "Failed to search for articles - see above for error info")
+        #### Raises
+        ------
+        - Exception
+            - when failing to get back to depth
+        """
+        with profiler.span("search.resume"):
+            articles = self._submit_search(query)
+            cards = self.get_cards(articles)
+            while len(cards) <= depth and self.load_more_cards():
+                count, ended = wait_for_more_cards(
+                    self.logger,
+                    driver=self.browser.driver,
+                    count=len(cards)
+                )
+                if count <= len(cards):
+                    # ended, or timed out waiting for more
+                    break
+                cards = self.get_cards(articles)
+            self.logger.info(
+                f"resumed {query} with {len(cards)} cards loaded, carrying on "
+                f"from card {depth + 1}")
+            return articles, cards
 
     def screenshot(self, title: str = f"{settings.PROJECT_TITLE}-screenshot"):
         """takes a screenshot of the current page
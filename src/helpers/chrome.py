@@ -0,0 +1,97 @@
+# built ins
+import os
+import threading
+from typing import Optional, Set
+
+# project modules
+from config import settings
+
+
+# chrome locks its user data dir, so every open session gets its own one
+# under settings.CHROME_USER_DATA_DIR and later sessions reuse the same dirs
+_lock = threading.Lock()
+_claimed_user_data_dirs: Set[str] = set()
+_debugger_attached = False
+
+
+def claim_user_data_dir(root: str = settings.CHROME_USER_DATA_DIR) -> Optional[str]:
+    """claims the first persistent profile dir under root no other session
+    is using, so the http cache and consent cookies carry over between runs
+
+    #### Parameters
+    ------
+    1. root : str, (default defined at settings.CHROME_USER_DATA_DIR)
+        - folder holding the profiles, empty string turns them off
+
+    #### Returns
+    ------
+    - Optional[str]
+        - absolute path of the profile dir, None when turned off
+    """
+    if not root:
+        return None
+    with _lock:
+        number = 0
+        while True:
+            path = os.path.abspath(f"{root}/profile-{number}")
+            if path not in _claimed_user_data_dirs:
+                _claimed_user_data_dirs.add(path)
+                break
+            number += 1
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def release_user_data_dir(path: Optional[str]):
+    """hands the profile dir back once its browser has closed
+
+    #### Parameters
+    ------
+    1. path : Optional[str]
+        - path from claim_user_data_dir
+
+    #### Returns
+    ------
+        - None
+    """
+    with _lock:
+        _claimed_user_data_dirs.discard(path)
+
+
+def claim_debugger_address(
+    address: str = settings.CHROME_DEBUGGER_ADDRESS
+) -> Optional[str]:
+    """one session at a time can drive the long lived local chrome at
+    address, the others start their own
+
+    #### Parameters
+    ------
+    1. address : str, (default defined at settings.CHROME_DEBUGGER_ADDRESS)
+        - host:port of chrome's remote debugging port, empty string turns
+            attaching off
+
+    #### Returns
+    ------
+    - Optional[str]
+        - the address when this session gets to attach, None otherwise
+    """
+    global _debugger_attached
+    if not address:
+        return None
+    with _lock:
+        if _debugger_attached:
+            return None
+        _debugger_attached = True
+    return address
+
+
+def release_debugger_address():
+    """lets the next session attach to the long lived chrome
+
+    #### Returns
+    ------
+        - None
+    """
+    global _debugger_attached
+    with _lock:
+        _debugger_attached = False
@@ -0,0 +1,131 @@
+# built ins
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.image_store import ImageStore
+from helpers.profiling import profiler
+from helpers.util import create_http_session
+
+
+FAILED_IMAGE_NAME = "failed to retrieve image name"
+
+
+class ImageDownloader(object):
+    """downloads card images in the background so the card loop only has to
+    queue the url. the image name comes from the url images-prod redirects
+    to, so we don't need to load the image in a browser tab for it. with
+    settings.IMAGE_STORE_PATH set the images go through the ImageStore"""
+
+    def __init__(
+            self,
+            logger: Logger,
+            concurrency: int = settings.IMAGE_DOWNLOAD_CONCURRENCY
+        ):
+        # no try-except here because parent wrapped in try catch and will log
+        # and crash there if something goes wrong here
+        self.logger = logger
+        self.session = create_http_session(pool_size=concurrency)
+        # the executor's worker count is the bound on in-flight downloads
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="image-download"
+        )
+        self.store = None
+        if settings.IMAGE_STORE_PATH:
+            self.store = ImageStore(
+                logger=logger, root=settings.IMAGE_STORE_PATH)
+            self.store.open()
+
+    def submit(self, image_url: str) -> Future:
+        """queues the image for download
+
+        #### Parameters
+        ------
+        1. image_url : str
+            - src of the card image
+
+        #### Returns
+        ------
+        - Future
+            - resolves to the name the image was saved under
+        """
+        return self.executor.submit(self.download, image_url)
+
+    @profiler.timed("image_download")
+    def download(self, image_url: str) -> str:
+        """follows the image redirects for the image name and streams the
+        image to the output folder
+
+        #### Parameters
+        ------
+        1. image_url : str
+            - src of the card image
+
+        #### Returns
+        ------
+        - str
+            - name the image was saved under, FAILED_IMAGE_NAME if it couldn't
+                be downloaded
+        """
+        if not image_url:
+            return FAILED_IMAGE_NAME
+
+        try:
+            if self.store is not None:
+                img_name = self.store.download(self.session, image_url)
+                return img_name if img_name is not None else FAILED_IMAGE_NAME
+
+            with self.session.get(
+                    image_url,
+                    stream=True,
+                    timeout=settings.DEFAULT_TIMEOUT) as response:
+                response.raise_for_status()
+                if not response.url.startswith(settings.IMAGE_URL_PREFIX):
+                    return FAILED_IMAGE_NAME
+
+                img_name = response.url.split(settings.IMAGE_URL_PREFIX, 1)[1]
+                with open(f"{settings.OUTPUT_PATH}/{img_name}", "wb") as image_file:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        image_file.write(chunk)
+
+            return img_name
+        except Exception as e:
+            self.logger.exception(
+                f"Failed to download image {image_url}, reason: {e}")
+            return FAILED_IMAGE_NAME
+
+    def resolve(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """waits for the queued downloads and swaps the futures in the
+        image_name fields for the image names
+
+        #### Parameters
+        ------
+        1. data : List[Dict[str, Any]]
+            - article details with image_name futures
+
+        #### Returns
+        ------
+        - List[Dict[str, Any]]
+            - the same article details with image_name filled in
+        """
+        for article_details in data:
+            image_name = article_details.get("image_name")
+            if isinstance(image_name, Future):
+                article_details["image_name"] = image_name.result()
+        return data
+
+    def close(self):
+        """waits for outstanding downloads, saves the image store manifest
+        and closes the http session
+
+        #### Returns
+        ------
+            - None
+        """
+        self.executor.shutdown(wait=True)
+        if self.store is not None:
+            self.store.close()
+        self.session.close()
@@ -0,0 +1,366 @@
+# built ins
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote_plus, urljoin
+
+# installed libs
+from lxml import html
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.browsing import NewsBrowser
+from helpers.downloads import ImageDownloader
+from helpers.http_cache import http_cache
+from helpers.index import ArticleIndex
+from helpers.metadata import date_sources, parse_metadata
+from helpers.pagination import OUT_OF_WINDOW
+from helpers.pool import BrowserPool
+from helpers.profiling import profiler
+from helpers.util import create_http_session, extract_date
+from helpers.waits import LOAD_MORE_XPATH
+
+
+def has_class(name: str) -> str:
+    """xpath predicate matching elements that have the css class name, so we
+    can use the same class based locators as the selenium backend"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def parse_cards(page: str, base_url: str) -> List[Dict[str, Any]]:
+    """parses the gothamist-card elements out of a search results page
+
+    #### Parameters
+    ------
+    1. page : str
+        - html of the search results page
+    2. base_url : str
+        - url the page was fetched from, to resolve relative links
+
+    #### Returns
+    ------
+    - List[Dict[str, Any]]
+        - image_url, title, description, article_link and date_hint (see
+            helpers.pagination) of each card, empty when the results are
+            rendered by javascript
+    """
+    tree = html.fromstring(page)
+    cards = []
+    for card in tree.xpath(f"//*[@id='resultList']//*[{has_class('gothamist-card')}]"):
+        links = card.xpath(f".//*[{has_class('image-with-caption-image-link')}]/@href")
+        if not links:
+            continue
+
+        images = card.xpath(
+            f".//*[{has_class('image')} and {has_class('native-image')}"
+            f" and {has_class('prime-img-class')}]/@src"
+        )
+        titles = card.xpath(f".//*[{has_class('h2')}]")
+        descriptions = card.xpath(f".//*[{has_class('desc')}]")
+        # same date label lookup as CARD_EXTRACTION_SCRIPT
+        dates = card.xpath(
+            ".//*[self::time or @datetime or contains(@class, 'date')"
+            " or contains(@class, 'timestamp')]")
+
+        cards.append({
+            "image_url": urljoin(base_url, images[0]) if images else None,
+            "title": titles[0].text_content().strip() if titles else "",
+            "description": (
+                descriptions[0].text_content().strip() if descriptions else ""
+            ),
+            "article_link": urljoin(base_url, links[0]),
+            "date_hint": (
+                (dates[0].get("datetime") or dates[0].text_content().strip())
+                if dates else None
+            )
+        })
+    return cards
+
+
+def has_more_results(page: str) -> bool:
+    """whether a search results page has more results than the cards in it,
+    a "Load More" button or a rel="next" link
+
+    #### Parameters
+    ------
+    1. page : str
+        - html of the search results page
+
+    #### Returns
+    ------
+    - bool
+        - True when the rest of the results need loading
+    """
+    tree = html.fromstring(page)
+    return bool(
+        tree.xpath(LOAD_MORE_XPATH)
+        or tree.xpath("//link[@rel='next'] | //a[@rel='next']")
+    )
+
+
+def parse_date_published(page: str) -> Optional[str]:
+    """reads the published caption out of an article page
+
+    #### Parameters
+    ------
+    1. page : str
+        - html of the article page
+
+    #### Returns
+    ------
+    - Optional[str]
+        - the caption text (e.g. "Published May 13, 2024 at 5:00 p.m."),
+            None when it isn't in the static html
+    """
+    tree = html.fromstring(page)
+    captions = tree.xpath(
+        f"//*[{has_class('date-published')}]//p[{has_class('type-caption')}]")
+    for caption in captions:
+        text = caption.text_content().strip()
+        if text.startswith("Published"):
+            return text
+    return None
+
+
+class HttpNewsBrowser(NewsBrowser):
+    """same interface as NewsBrowser but fetches the search results and
+    articles with a pooled http client. the selenium session is only
+    started when a page needs javascript to render what we need"""
+
+    # articles are fetched over http, chrome only renders the odd one
+    prefetches_articles = False
+
+    def __init__(
+            self,
+            logger: Logger,
+            downloader: Optional[ImageDownloader] = None,
+            index: Optional[ArticleIndex] = None,
+            pool: Optional[BrowserPool] = None
+        ):
+        super().__init__(
+            logger=logger,
+            downloader=downloader,
+            index=index,
+            pool=pool
+        )
+        self.session = create_http_session()
+        self.browser_open = False
+
+    def open_browser(self, url: str):
+        """stores the url, chrome is only opened once a page needs it
+
+        #### Parameters
+        ------
+        1. url : str
+            - url to open chrome on if we fall back to selenium
+
+        #### Returns
+        ------
+            - None
+        """
+        self.url = url
+
+    def ensure_browser(self):
+        """opens the selenium session if it isn't open yet
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the browser, or when replaying the
+                    http archive
+        """
+        if not self.browser_open:
+            if http_cache.mode == "replay":
+                # chrome loads its pages itself, a replay that fell back to
+                # it would quietly go to the network
+                raise Exception(
+                    "page needs javascript, chrome can't be used while "
+                    "replaying the http archive")
+            self.logger.info("page needs javascript, starting chrome")
+            super().open_browser(url=self.url)
+            self.browser_open = True
+
+    def close_browsers(self):
+        """closes the http session and chrome if it was opened
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to close the browser
+        """
+        self.session.close()
+        # the base class closes the pool and downloader along with chrome,
+        # close_all_browsers is a no-op when chrome was never started
+        super().close_browsers()
+        self.browser_open = False
+
+    def read_date_published(self, article_link: str) -> datetime:
+        """reads the published date from the json-ld or meta tags of the
+        static article html, then its date caption, and falls back to
+        rendering the article in chrome when neither is there
+
+        #### Parameters
+        ------
+        1. article_link : str
+            - url of the article
+
+        #### Returns
+        ------
+        - datetime
+            - date the article was published
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to read the date
+        """
+        with profiler.span("http_fetch.article"):
+            response = self.session.get(
+                article_link, timeout=settings.DEFAULT_TIMEOUT)
+            response.raise_for_status()
+
+        date_published, source = parse_metadata(response.text)
+        if date_published is not None:
+            date_sources.record(source)
+            return date_published
+
+        caption = parse_date_published(response.text)
+        if caption is None:
+            self.ensure_browser()
+            return super().read_date_published(article_link)
+
+        date_sources.record("caption")
+        return extract_date(
+            logger=self.logger,
+            published_string=caption
+        )
+
+    def search_articles(
+            self,
+            query: str,
+            months: int = 1,
+            sink: Optional[Any] = None
+        ):
+        """
+        Search for articles on the Gothamist website based on the query, uses
+        the static search results when the page has them and the selenium
+        search otherwise
+
+        #### Parameters
+        ------
+        1. query : str
+        - search term to search for
+        2. months : int, (default=1)
+        - number of months to search back for articles
+        3. sink : Optional[Any], (default=None)
+        - anything with an append method, see NewsBrowser.search_articles
+
+        #### Returns
+        ------
+        - List[Dict[str, Any]]
+            - list of dictionaries containing the article details
+            - (title, description, search_phrase_count, money_value_present,
+            - date_published), or the sink when one was passed
+
+        #### Raises
+        ------
+        - Exception
+            - when failing to search for articles
+        """
+        try:
+            self.logger.info("entering http search function")
+
+            search_url = f"{self.url}?q={quote_plus(query)}"
+            with profiler.span("http_fetch.search"):
+                response = self.session.get(
+                    search_url, timeout=settings.DEFAULT_TIMEOUT)
+                response.raise_for_status()
+            cards = parse_cards(response.text, response.url)
+            more_results = has_more_results(response.text)
+
+            output_data = sink if sink is not None else []
+            # the static cards and the chrome fallback are one search as far
+            # as the planner and the index are concerned
+            self._start_search(query, months)
+            ended = not more_results
+
+            if cards:
+                self.logger.info(f"going through {len(cards)} static cards")
+                for article_details in self._process_card_details(cards, query):
+                    if not self._take_result(article_details, query, output_data):
+                        break
+
+            if not self.search_done and (more_results or not cards):
+                if cards:
+                    # "Load More" needs javascript so the rest of the window
+                    # comes from the selenium search, skipping what we
+                    # already have
+                    self.logger.info(
+                        "static results exhausted, continuing in chrome")
+                    self.skip_links.update(card["article_link"] for card in cards)
+                # otherwise the results are rendered client side, selenium
+                # does the listing but the articles and images still go over
+                # http
+                self.ensure_browser()
+                ended = self._search_pages(query, output_data)
+            elif not self.search_done:
+                self.logger.info(f"reached the end of results for {query}")
+
+            self._finish_search(query, ended)
+            self.logger.info(f"search complete for {query}")
+
+            if sink is not None:
+                return sink
+            return self.downloader.resolve(output_data)
+
+        except Exception as e:
+            self.logger.exception(
+                f"Failed to search for articles, reason: {e}")
+            raise Exception(
+                "Failed to search for articles - see above for error info")
+
+    def _process_card_details(self, cards: List[Dict[str, Any]], query: str):
+        def process(browser: NewsBrowser, item):
+            index, article_details = item
+            if article_details is OUT_OF_WINDOW:
+                return article_details
+            with self.logger.contextualize(card=index, query=query):
+                started = time.perf_counter()
+                try:
+                    return self._process_details_restarting(
+                        browser, article_details, query, index)
+                except Exception as e:
+                    self.logger.exception(
+                        f"Failed to process card {index}, reason: {e}")
+                    self.log_card(
+                        query, index, article_details["article_link"],
+                        "failed", started, e)
+                    return None
+
+        items = []
+        for index, card in enumerate(cards, start=1):
+            if self.planner.out_of_window(card):
+                self.log_card(
+                    query, index, card["article_link"], "out_of_window",
+                    time.perf_counter())
+                items.append((index, OUT_OF_WINDOW))
+            else:
+                items.append((index, {
+                    key: value for key, value in card.items()
+                    if key != "date_hint"
+                }))
+        if self.pool is not None:
+            yield from self.pool.map(process, items)
+            return
+
+        for item in items:
+            yield process(self, item)
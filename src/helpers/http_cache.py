@@ -0,0 +1,432 @@
+# built ins
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from hashlib import sha256
+from typing import Any, Callable, Dict, Optional
+
+# installed libs
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.rate_control import THROTTLED_STATUSES, rate_limits
+
+
+# "off" goes to the network for everything, "cache" keeps responses for
+# their ttl in a size bounded lru cache, "record" fetches live and saves
+# every response to the archive, "replay" only serves from the archive
+HTTP_CACHE_MODES = ["off", "cache", "record", "replay"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+# responses that are the same on the next request, redirects included so a
+# replayed image url still ends up at its image name
+CACHEABLE_STATUSES = {200, 203, 300, 301, 302, 307, 308, 404, 410}
+
+# headers that would make the server answer 304 without a body, dropped
+# when recording so the archive has the full response
+CONDITIONAL_HEADERS = ["If-None-Match", "If-Modified-Since"]
+
+
+class ReplayMiss(requests.ConnectionError):
+    """the request isn't in the archive being replayed"""
+
+
+class HttpCache(object):
+    """on disk cache of GET responses for the http sessions from
+    helpers.util.create_http_session, one sqlite file holding the bodies
+    so a hit costs a single indexed read. the same store doubles as the
+    record/replay archive, which never expires or evicts anything"""
+
+    def __init__(self):
+        self.logger = None
+        self.mode = "off"
+        self.path = None
+        self.connection = None
+        self.ttl = self.image_ttl = None
+        self.max_bytes = 0
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.size = 0
+            self.stats: Dict[str, int] = {
+                "hits": 0,
+                "not_modified": 0,
+                "misses": 0,
+                "stored": 0,
+                "evicted": 0
+            }
+
+    def open(
+            self,
+            logger: Logger,
+            mode: Optional[str] = None
+        ):
+        """opens the cache, or the archive when recording or replaying
+
+        #### Parameters
+        ------
+        1. logger : Logger
+            - logger instance
+        2. mode : Optional[str], (default None)
+            - one of HTTP_CACHE_MODES, defaults to settings.HTTP_CACHE_MODE
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - ValueError
+                - when the mode doesn't exist, or is replay without the http
+                    browser backend
+            - Exception
+                - when failing to open the cache
+        """
+        self.logger = logger
+        self.mode = mode or settings.HTTP_CACHE_MODE
+        self.reset()
+        if self.mode not in HTTP_CACHE_MODES:
+            raise ValueError(
+                f"unknown http cache mode {self.mode}, "
+                f"expected one of {HTTP_CACHE_MODES}")
+        if self.mode == "off":
+            return
+        if self.mode == "replay" and settings.BROWSER_BACKEND != "http":
+            # chrome loads its pages itself, a replay would still go to the
+            # network for everything but the images
+            raise ValueError(
+                "http cache replay needs BROWSER_BACKEND \"http\", chrome's "
+                "page loads can't be replayed")
+
+        archive = self.mode in ("record", "replay")
+        self.path = settings.HTTP_ARCHIVE_PATH if archive else settings.HTTP_CACHE_PATH
+        # without expiry or eviction the archive replays exactly what was
+        # recorded, however old
+        self.ttl = None if archive else settings.HTTP_CACHE_TTL
+        self.image_ttl = None if archive else settings.HTTP_CACHE_IMAGE_TTL
+        self.max_bytes = 0 if archive else settings.HTTP_CACHE_MAX_MB * 1024 * 1024
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            if self.mode == "record" and os.path.exists(self.path):
+                # an archive holds one run
+                os.remove(self.path)
+            self.connection = sqlite3.connect(
+                self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            self.size = self.connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self.logger.info(
+                f"http cache opened in {self.mode} mode at {self.path}, "
+                f"{round(self.size / 1024 / 1024, 2)}mb stored")
+        except Exception as e:
+            self.logger.exception(f"Failed to open http cache, reason: {e}")
+            raise Exception(
+                "Failed to open http cache - see above for error info")
+
+    def close(self):
+        """closes the cache
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.connection is not None
+
+    def key(self, url: str) -> str:
+        return sha256(f"GET {url}".encode()).hexdigest()
+
+    def ttl_for(self, headers: Dict[str, str]) -> Optional[float]:
+        """images change far less often than the pages linking to them"""
+        content_type = CaseInsensitiveDict(headers).get("Content-Type", "")
+        if content_type.startswith("image/"):
+            return self.image_ttl
+        return self.ttl
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """looks up a stored response
+
+        #### Parameters
+        ------
+        1. url : str
+            - requested url
+
+        #### Returns
+        ------
+        - Optional[Dict[str, Any]]
+            - status, headers and body, None when it isn't stored or has
+                expired
+        """
+        key = self.key(url)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT status, headers, body, stored_at FROM responses "
+                "WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            status, headers, body, stored_at = row
+            headers = json.loads(headers)
+            ttl = self.ttl_for(headers)
+            if ttl is not None and time.time() - stored_at > ttl:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["hits"] += 1
+            if self.max_bytes:
+                # only the lru order needs it
+                self.connection.execute(
+                    "UPDATE responses SET used_at = ? WHERE key = ?",
+                    (time.time(), key))
+                self.connection.commit()
+        return {"status": status, "headers": headers, "body": body}
+
+    def put(
+            self,
+            url: str,
+            status: int,
+            headers: Dict[str, str],
+            body: bytes
+        ):
+        """stores a response, evicting the least recently used ones when the
+        cache is over settings.HTTP_CACHE_MAX_MB
+
+        #### Parameters
+        ------
+        1. url : str
+            - requested url
+        2. status : int
+            - response status code
+        3. headers : Dict[str, str]
+            - response headers
+        4. body : bytes
+            - response body
+
+        #### Returns
+        ------
+            - None
+        """
+        key = self.key(url)
+        now = time.time()
+        with self.lock:
+            replaced = self.connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, body, size, stored_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(headers), body, len(body), now, now)
+            )
+            self.size += len(body) - (replaced[0] if replaced else 0)
+            self.stats["stored"] += 1
+
+            while self.max_bytes and self.size > self.max_bytes:
+                rows = self.connection.execute(
+                    "SELECT key, size FROM responses "
+                    "WHERE key != ? ORDER BY used_at LIMIT 100",
+                    (key,)
+                ).fetchall()
+                if not rows:
+                    break
+                for evicted_key, size in rows:
+                    self.connection.execute(
+                        "DELETE FROM responses WHERE key = ?", (evicted_key,))
+                    self.size -= size
+                    self.stats["evicted"] += 1
+                    if self.size <= self.max_bytes:
+                        break
+            self.connection.commit()
+
+    def report(self, logger: Optional[Logger] = None) -> Dict[str, Any]:
+        """hit and eviction counts of the run, logged when a logger is passed
+
+        #### Parameters
+        ------
+        1. logger : Optional[Logger], (default None)
+            - logger instance
+
+        #### Returns
+        ------
+        - Dict[str, Any]
+            - mode, counts and stored megabytes
+        """
+        with self.lock:
+            report = dict(
+                self.stats,
+                mode=self.mode,
+                stored_mb=round(self.size / 1024 / 1024, 2)
+            )
+        if logger is not None and self.mode != "off":
+            logger.info(
+                f"http cache: {report['hits']} hits, {report['misses']} "
+                f"misses, {report['evicted']} evicted")
+        return report
+
+
+def hold_until_read(response: requests.Response, release: Callable[[], None]):
+    """keeps the fetch's rate slot until its body has been read. the body
+    is only read after the adapter returns (by the session, or by the caller
+    when streaming), urllib3 gives the connection back once it's all read or
+    the response is closed
+
+    #### Parameters
+    ------
+    1. response : requests.Response
+        - response straight from the network
+    2. release : Callable[[], None]
+        - gives the slot back, see RateController.acquire
+
+    #### Returns
+    ------
+        - None
+    """
+    raw = response.raw
+    release_conn = getattr(raw, "release_conn", None)
+    if release_conn is None:
+        release()
+        return
+
+    def release_conn_and_slot():
+        try:
+            release_conn()
+        finally:
+            release()
+    raw.release_conn = release_conn_and_slot
+    # a response dropped without being read or closed still frees the slot
+    weakref.finalize(raw, release)
+
+
+class CachingAdapter(HTTPAdapter):
+    """transport adapter answering GET requests from the http cache, the
+    session's redirect handling, cookies and streaming work the same on
+    cached responses. whatever goes to the network goes through the host's
+    helpers.rate_control controller"""
+
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        cache = self.cache
+        if request.method != "GET" or not cache.enabled:
+            return self.fetch(request, **kwargs)
+
+        if cache.mode in ("cache", "replay"):
+            entry = cache.get(request.url)
+            if entry is not None:
+                return self.cached_response(request, entry)
+            if cache.mode == "replay":
+                raise ReplayMiss(
+                    f"{request.url} isn't in the archive being replayed",
+                    request=request)
+
+        if cache.mode == "record":
+            for header in CONDITIONAL_HEADERS:
+                request.headers.pop(header, None)
+
+        response = self.fetch(request, **kwargs)
+        cache_control = response.headers.get("Cache-Control", "")
+        if (response.status_code in CACHEABLE_STATUSES
+                and (cache.mode == "record" or "no-store" not in cache_control)):
+            # reads the whole body, a streamed response then iterates over
+            # what was read
+            cache.put(
+                request.url,
+                response.status_code,
+                dict(response.headers),
+                response.content
+            )
+        return response
+
+    def fetch(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """sends the request within the host's rate limit, throttled
+        responses are retried once their Retry-After has passed"""
+        controller = rate_limits.get(request.url)
+        retries = settings.RATE_MAX_RETRIES if controller.enabled else 0
+        for attempt in range(retries + 1):
+            release = controller.acquire()
+            started = time.perf_counter()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception:
+                release()
+                controller.observe(None, error=True)
+                raise
+            # time to the response headers, streamed bodies come later
+            controller.observe(
+                time.perf_counter() - started,
+                status=response.status_code,
+                retry_after=response.headers.get("Retry-After")
+            )
+            hold_until_read(response, release)
+            if response.status_code not in THROTTLED_STATUSES or attempt == retries:
+                return response
+            response.close()
+        return response
+
+    def cached_response(
+            self,
+            request: requests.PreparedRequest,
+            entry: Dict[str, Any]
+        ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = entry["body"]
+        # already read, iter_content slices the body instead of streaming it
+        response._content_consumed = True
+
+        etag = response.headers.get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            # the caller already has this version
+            with self.cache.lock:
+                self.cache.stats["not_modified"] += 1
+            response.status_code = 304
+            response._content = b""
+
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = "Cached"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+
+http_cache = HttpCache()
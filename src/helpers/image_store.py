@@ -0,0 +1,194 @@
+# built ins
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+# installed libs
+import requests
+
+# project modules
+from config import settings
+from logger import Logger
+
+
+class ImageStore(object):
+    """content addressed image store. each distinct image is kept once under
+    its sha256, the friendly image names in the output folder are hardlinks
+    to it and a manifest maps the image urls to their blob, name and caching
+    headers so unchanged images are only revalidated, never re-written"""
+
+    def __init__(self, logger: Logger, root: str = settings.IMAGE_STORE_PATH):
+        # no try-except here because parent wrapped in try catch and will log
+        # and crash there if something goes wrong here
+        self.logger = logger
+        self.root = root
+        self.manifest_path = f"{root}/manifest.json"
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.unsaved_changes = 0
+
+    def open(self):
+        """creates the store folder and loads the manifest
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the store
+        """
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path) as manifest_file:
+                    self.manifest = json.load(manifest_file)
+            self.logger.info(
+                f"image store opened at {self.root}, "
+                f"{len(self.manifest)} images known")
+        except Exception as e:
+            self.logger.exception(f"Failed to open image store, reason: {e}")
+            raise Exception(
+                "Failed to open image store - see above for error info")
+
+    def close(self):
+        """saves the manifest
+
+        #### Returns
+        ------
+            - None
+        """
+        self.save_manifest()
+
+    def save_manifest(self):
+        """writes the manifest atomically so a crash can't leave it half
+        written
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            temp_path = f"{self.manifest_path}.tmp"
+            with open(temp_path, "w") as manifest_file:
+                json.dump(self.manifest, manifest_file, indent=4)
+            os.replace(temp_path, self.manifest_path)
+            self.unsaved_changes = 0
+
+    def blob_path(self, sha256: str, extension: str) -> str:
+        """where the image with the given hash is stored"""
+        return f"{self.root}/{sha256[:2]}/{sha256}{extension}"
+
+    def download(self, session: requests.Session, image_url: str) -> Optional[str]:
+        """downloads the image into the store and links it into the output
+        folder under its image name. known images are requested with their
+        ETag/Last-Modified so an unchanged image costs one round trip and no
+        writes
+
+        #### Parameters
+        ------
+        1. session : requests.Session
+            - http session to download with
+        2. image_url : str
+            - src of the card image
+
+        #### Returns
+        ------
+        - Optional[str]
+            - the image name, None when the url doesn't redirect to an image
+
+        #### Raises
+        ------
+        - Exception
+            - when the request fails
+        """
+        with self.lock:
+            entry = self.manifest.get(image_url)
+
+        headers = {}
+        if entry is not None and os.path.exists(entry["blob"]):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with session.get(
+                image_url,
+                headers=headers,
+                stream=True,
+                timeout=settings.DEFAULT_TIMEOUT) as response:
+            if response.status_code == 304 and headers:
+                self.link(entry["blob"], entry["image_name"])
+                return entry["image_name"]
+
+            response.raise_for_status()
+            if not response.url.startswith(settings.IMAGE_URL_PREFIX):
+                return None
+
+            img_name = response.url.split(settings.IMAGE_URL_PREFIX, 1)[1]
+
+            # hashed while streaming, the name is only known at the end
+            temp_path = f"{self.root}/{uuid.uuid4().hex}.tmp"
+            sha256 = hashlib.sha256()
+            with open(temp_path, "wb") as image_file:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    sha256.update(chunk)
+                    image_file.write(chunk)
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        blob = self.blob_path(sha256.hexdigest(), os.path.splitext(img_name)[1])
+        if os.path.exists(blob):
+            # same image under another name (or url), keep the one copy
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(temp_path, blob)
+
+        self.link(blob, img_name)
+
+        with self.lock:
+            self.manifest[image_url] = {
+                "image_name": img_name,
+                "blob": blob,
+                "sha256": sha256.hexdigest(),
+                "etag": etag,
+                "last_modified": last_modified
+            }
+            self.unsaved_changes += 1
+            save = self.unsaved_changes >= settings.OUTPUT_FLUSH_EVERY
+        if save:
+            self.save_manifest()
+
+        return img_name
+
+    def link(self, blob: str, img_name: str):
+        """points the image name in the output folder at the stored blob
+
+        #### Parameters
+        ------
+        1. blob : str
+            - path of the stored image
+        2. img_name : str
+            - friendly name of the image
+
+        #### Returns
+        ------
+            - None
+        """
+        target = f"{settings.OUTPUT_PATH}/{img_name}"
+        if os.path.exists(target):
+            if os.path.samefile(target, blob):
+                return
+            os.remove(target)
+        try:
+            os.link(blob, target)
+        except OSError:
+            # hardlinks don't work across filesystems, fall back to a copy
+            shutil.copyfile(blob, target)
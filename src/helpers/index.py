@@ -0,0 +1,324 @@
+# built ins
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# project modules
+from config import settings
+from logger import Logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_link TEXT PRIMARY KEY,
+    image_url TEXT,
+    image_name TEXT,
+    title TEXT,
+    description TEXT,
+    date_published TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_results (
+    query TEXT NOT NULL,
+    article_link TEXT NOT NULL,
+    PRIMARY KEY (query, article_link)
+);
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT PRIMARY KEY,
+    -- completed runs indexed everything published between these two dates
+    covered_from TEXT,
+    covered_until TEXT,
+    -- 0 while a run is in progress, so a crashed run is visible
+    complete INTEGER NOT NULL,
+    processed INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# fields we store, the analysis fields depend on the query so they're worked
+# out again whenever an article comes out of the index
+INDEXED_FIELDS = [
+    "article_link",
+    "image_url",
+    "image_name",
+    "title",
+    "description",
+    "date_published"
+]
+
+
+class ArticleIndex(object):
+    """on disk index of processed articles keyed by article url. every card
+    is written as soon as it is processed so it doubles as the checkpoint a
+    crashed run resumes from"""
+
+    def __init__(self, logger: Logger, path: str = settings.ARTICLE_INDEX_PATH):
+        # no try-except here because parent wrapped in try catch and will log
+        # and crash there if something goes wrong here
+        self.logger = logger
+        self.path = path
+        self.connection = None
+        # pool workers and image download callbacks write from other threads
+        self.lock = threading.Lock()
+
+    def open(self):
+        """opens (and creates if needed) the index database
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open the index
+        """
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.connection = sqlite3.connect(
+                self.path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+            self.connection.commit()
+            self.logger.info(f"article index opened at {self.path}")
+        except Exception as e:
+            self.logger.exception(f"Failed to open article index, reason: {e}")
+            raise Exception(
+                "Failed to open article index - see above for error info")
+
+    def close(self):
+        """closes the index database
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.connection is not None:
+            with self.lock:
+                self.connection.close()
+                self.connection = None
+
+    def get(self, article_link: str) -> Optional[Dict[str, Any]]:
+        """looks up an indexed article
+
+        #### Parameters
+        ------
+        1. article_link : str
+            - url of the article
+
+        #### Returns
+        ------
+        - Optional[Dict[str, Any]]
+            - the stored article fields, None when the article isn't indexed
+        """
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {', '.join(INDEXED_FIELDS)} FROM articles "
+                "WHERE article_link = ?",
+                (article_link,)
+            ).fetchone()
+        return self._to_details(row) if row else None
+
+    def add(self, article_details: Dict[str, Any], query: str):
+        """writes a processed article to the index, an image_name that is
+        still downloading gets written once the download finishes
+
+        #### Parameters
+        ------
+        1. article_details : Dict[str, Any]
+            - processed article details
+        2. query : str
+            - search term the article was found with
+
+        #### Returns
+        ------
+            - None
+        """
+        image_name = article_details.get("image_name")
+        if isinstance(image_name, Future):
+            # copy now, the caller swaps the future out of the dict later
+            details = dict(article_details)
+            image_name.add_done_callback(
+                lambda future: self.add(
+                    dict(details, image_name=future.result()), query)
+            )
+            return
+
+        try:
+            with self.lock:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        article_details["article_link"],
+                        article_details.get("image_url"),
+                        image_name,
+                        article_details.get("title"),
+                        article_details.get("description"),
+                        article_details["date_published"].isoformat(),
+                        datetime.now().isoformat()
+                    )
+                )
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO search_results VALUES (?, ?)",
+                    (query, article_details["article_link"])
+                )
+                self.connection.execute(
+                    "UPDATE searches SET processed = processed + 1, "
+                    "updated_at = ? WHERE query = ?",
+                    (datetime.now().isoformat(), query)
+                )
+                self.connection.commit()
+        except Exception as e:
+            # losing an index entry only costs a reload next run
+            self.logger.exception(
+                f"Failed to index {article_details.get('article_link')}, "
+                f"reason: {e}")
+
+    def start_search(self, query: str):
+        """marks a run for the query as in progress, keeps what previous
+        completed runs covered
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            previous = self.connection.execute(
+                "SELECT complete, processed FROM searches WHERE query = ?",
+                (query,)
+            ).fetchone()
+            if previous is not None and not previous[0]:
+                self.logger.info(
+                    f"resuming crashed run for {query}, {previous[1]} cards "
+                    "were checkpointed")
+
+            self.connection.execute(
+                "INSERT INTO searches VALUES (?, NULL, NULL, 0, 0, ?) "
+                "ON CONFLICT(query) DO UPDATE SET complete = 0, "
+                "updated_at = excluded.updated_at",
+                (query, datetime.now().isoformat())
+            )
+            self.connection.commit()
+
+    def finish_search(
+            self,
+            query: str,
+            window_start: Optional[datetime],
+            run_started: datetime
+        ):
+        """marks the run for the query as complete, everything published
+        between window_start and run_started is indexed
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+        2. window_start : Optional[datetime]
+            - oldest date the run indexed everything back to (see
+                helpers.pagination.DateWindowPlanner.covered_from), None
+                keeps what previous runs covered
+        3. run_started : datetime
+            - when the run started searching
+
+        #### Returns
+        ------
+            - None
+        """
+        if window_start is None:
+            with self.lock:
+                self.connection.execute(
+                    "UPDATE searches SET complete = 1, processed = 0, "
+                    "updated_at = ? WHERE query = ?",
+                    (datetime.now().isoformat(), query)
+                )
+                self.connection.commit()
+            return
+
+        coverage = self.coverage(query)
+        if coverage is not None and coverage[1] >= window_start:
+            # the run reached the range a previous run covered (or stopped
+            # at it) so the two join up
+            window_start = min(window_start, coverage[0])
+
+        with self.lock:
+            self.connection.execute(
+                "UPDATE searches SET covered_from = ?, covered_until = ?, "
+                "complete = 1, processed = 0, updated_at = ? WHERE query = ?",
+                (
+                    window_start.isoformat(),
+                    run_started.isoformat(),
+                    datetime.now().isoformat(),
+                    query
+                )
+            )
+            self.connection.commit()
+
+    def coverage(self, query: str) -> Optional[Tuple[datetime, datetime]]:
+        """range completed runs for the query indexed everything in
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+
+        #### Returns
+        ------
+        - Optional[Tuple[datetime, datetime]]
+            - (covered_from, covered_until), None when no run for the query
+                has completed
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT covered_from, covered_until FROM searches "
+                "WHERE query = ?",
+                (query,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+
+    def search_results(
+            self,
+            query: str,
+            window_start: datetime
+        ) -> List[Dict[str, Any]]:
+        """indexed articles found with the query published after window_start,
+        newest first like the search results
+
+        #### Parameters
+        ------
+        1. query : str
+            - search term
+        2. window_start : datetime
+            - only articles published after this are returned
+
+        #### Returns
+        ------
+        - List[Dict[str, Any]]
+            - the stored article fields
+        """
+        columns = ", ".join(f"articles.{field}" for field in INDEXED_FIELDS)
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {columns} FROM articles JOIN search_results "
+                "ON articles.article_link = search_results.article_link "
+                "WHERE search_results.query = ? AND articles.date_published > ? "
+                "ORDER BY articles.date_published DESC",
+                (query, window_start.isoformat())
+            ).fetchall()
+        return [self._to_details(row) for row in rows]
+
+    def _to_details(self, row: tuple) -> Dict[str, Any]:
+        article_details = dict(zip(INDEXED_FIELDS, row))
+        article_details["date_published"] = datetime.fromisoformat(
+            article_details["date_published"])
+        return article_details
@@ -0,0 +1,190 @@
+# built ins
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# installed libs
+from lxml import html
+
+# project modules
+from logger import Logger
+
+
+# what the article's initial html says about itself, readable as soon as the
+# document is parsed, long before the date caption is rendered
+METADATA_SCRIPT = """
+return {
+    json_ld: Array.from(
+        document.querySelectorAll('script[type="application/ld+json"]')
+    ).map(script => script.textContent),
+    meta: Object.fromEntries(Array.from(
+        document.querySelectorAll('meta[property], meta[name], meta[itemprop]')
+    ).map(meta => [
+        meta.getAttribute('property') || meta.getAttribute('name')
+            || meta.getAttribute('itemprop'),
+        meta.getAttribute('content')
+    ]))
+};
+"""
+
+# meta tags that carry the publish time, in order of preference
+PUBLISHED_META_KEYS = [
+    "article:published_time",
+    "og:article:published_time",
+    "datePublished",
+    "pubdate",
+]
+
+
+def _json_ld_objects(value: Any) -> Iterator[Dict[str, Any]]:
+    # json-ld can be one object, a list of them or a @graph of them
+    if isinstance(value, list):
+        for item in value:
+            yield from _json_ld_objects(item)
+    elif isinstance(value, dict):
+        yield value
+        if "@graph" in value:
+            yield from _json_ld_objects(value["@graph"])
+
+
+def parse_published(value: str) -> Optional[datetime]:
+    """parses an iso 8601 publish time to the date it was published on in
+    the publisher's timezone, the same value extract_date gets from the
+    rendered caption so both paths index and output the same date
+
+    #### Parameters
+    ------
+    1. value : str
+        - e.g. "2024-05-13T17:00:00-04:00"
+
+    #### Returns
+    ------
+    - Optional[datetime]
+        - midnight of the publish date, None when it can't be parsed
+    """
+    try:
+        published = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return datetime(published.year, published.month, published.day)
+
+
+def date_from_metadata(
+    json_ld: List[str],
+    meta: Dict[str, str]
+) -> Tuple[Optional[datetime], Optional[str]]:
+    """finds the publish date in the page's json-ld, then its meta tags
+
+    #### Parameters
+    ------
+    1. json_ld : List[str]
+        - text of each application/ld+json script
+    2. meta : Dict[str, str]
+        - content of each meta tag by property, name or itemprop
+
+    #### Returns
+    ------
+    - Tuple[Optional[datetime], Optional[str]]
+        - the date and where it came from ("json_ld" or "meta"), (None, None)
+            when neither has it
+    """
+    for text in json_ld:
+        try:
+            value = json.loads(text)
+        except ValueError:
+            continue
+        for item in _json_ld_objects(value):
+            published = parse_published(item.get("datePublished"))
+            if published is not None:
+                return published, "json_ld"
+
+    for key in PUBLISHED_META_KEYS:
+        published = parse_published(meta.get(key))
+        if published is not None:
+            return published, "meta"
+
+    return None, None
+
+
+def parse_metadata(page: str) -> Tuple[Optional[datetime], Optional[str]]:
+    """date_from_metadata for an article's html
+
+    #### Parameters
+    ------
+    1. page : str
+        - html of the article page
+
+    #### Returns
+    ------
+    - Tuple[Optional[datetime], Optional[str]]
+        - see date_from_metadata
+    """
+    tree = html.fromstring(page)
+    json_ld = tree.xpath("//script[@type='application/ld+json']/text()")
+    meta = {}
+    for element in tree.xpath("//meta[@content]"):
+        key = (element.get("property") or element.get("name")
+               or element.get("itemprop"))
+        if key:
+            meta[key] = element.get("content")
+    return date_from_metadata(json_ld, meta)
+
+
+class DateSourceStats(object):
+    """counts where each date_published came from, "json_ld" and "meta" are
+    read from the initial html, "caption" from the static html caption and
+    "rendered" is the slow path waiting on the rendered caption"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """starts a new run
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.sources: Dict[str, int] = {}
+
+    def record(self, source: str):
+        """counts one date read from source
+
+        #### Parameters
+        ------
+        1. source : str
+            - "json_ld", "meta", "caption" or "rendered"
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def report(self, logger: Optional[Logger] = None) -> Dict[str, int]:
+        """number of dates read from each source, logged when a logger is
+        passed
+
+        #### Parameters
+        ------
+        1. logger : Optional[Logger], (default None)
+            - logger instance
+
+        #### Returns
+        ------
+        - Dict[str, int]
+            - count per source
+        """
+        with self.lock:
+            sources = dict(self.sources)
+        if logger is not None and sources:
+            logger.info("date_published sources: " + ", ".join(
+                f"{source} {count}" for source, count in sorted(sources.items())))
+        return sources
+
+
+date_sources = DateSourceStats()
@@ -0,0 +1,216 @@
+# built ins
+from typing import Dict, List, Optional
+
+# installed libs
+from selenium import webdriver
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# project modules
+from logger import Logger
+
+
+# third party hosts the scraper never needs, resolved to nowhere for every tab
+# in the browser (CDP blocking only applies to the tab it is sent to and the
+# articles open in new tabs)
+AD_AND_TRACKER_HOSTS = [
+    "*.doubleclick.net",
+    "*.googlesyndication.com",
+    "*.googletagservices.com",
+    "*.googletagmanager.com",
+    "*.google-analytics.com",
+    "*.amazon-adsystem.com",
+    "*.adnxs.com",
+    "*.scorecardresearch.com",
+    "*.chartbeat.com",
+    "*.chartbeat.net",
+    "*.quantserve.com",
+    "*.facebook.net",
+    "*.taboola.com",
+    "*.outbrain.com",
+    "*.hotjar.com",
+    "*.nr-data.net",
+]
+
+VIDEO_HOSTS = [
+    "*.youtube.com",
+    "*.ytimg.com",
+    "*.jwplayer.com",
+    "*.jwpcdn.com",
+    "*.vimeo.com",
+]
+
+FONT_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf"]
+MEDIA_PATTERNS = ["*.mp4", "*.webm", "*.m3u8", "*.mp3"]
+IMAGE_PATTERNS = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg"]
+STYLE_PATTERNS = ["*.css"]
+
+# blocked_hosts apply browser wide, blocked_urls are set over CDP on every
+# tab we open (the search tab, article tabs, prefetch tabs and the pool
+# sessions' tabs), block_images turns images off in chrome's content settings
+BLOCK_PROFILES: Dict[str, Dict] = {
+    "none": {
+        "blocked_hosts": [],
+        "blocked_urls": [],
+        "block_images": False
+    },
+    # drops ads, trackers, video embeds and web fonts
+    "standard": {
+        "blocked_hosts": AD_AND_TRACKER_HOSTS + VIDEO_HOSTS,
+        "blocked_urls": FONT_PATTERNS + MEDIA_PATTERNS,
+        "block_images": False
+    },
+    # only documents and scripts, images are downloaded over http so the
+    # browser never needs them
+    "minimal": {
+        "blocked_hosts": AD_AND_TRACKER_HOSTS + VIDEO_HOSTS,
+        "blocked_urls": (
+            FONT_PATTERNS + MEDIA_PATTERNS + IMAGE_PATTERNS + STYLE_PATTERNS),
+        "block_images": True
+    },
+}
+
+
+def get_block_profile(profile: str) -> Dict:
+    """looks up a block profile by name
+
+    #### Parameters
+    ------
+    1. profile : str
+        - one of the BLOCK_PROFILES names
+
+    #### Returns
+    ------
+    - Dict
+        - the profile
+
+    #### Raises
+    ------
+    - ValueError
+        - when the profile doesn't exist
+    """
+    if profile not in BLOCK_PROFILES:
+        raise ValueError(
+            f"Unknown block profile {profile}, expected one of "
+            f"{', '.join(BLOCK_PROFILES)}")
+    return BLOCK_PROFILES[profile]
+
+
+def add_block_options(options: webdriver.ChromeOptions, profile: str):
+    """adds the browser wide parts of the block profile to the chrome
+    options, has to happen before the browser starts
+
+    #### Parameters
+    ------
+    1. options : webdriver.ChromeOptions
+        - options the browser is going to be started with
+    2. profile : str
+        - one of the BLOCK_PROFILES names
+
+    #### Returns
+    ------
+        - None
+    """
+    block_profile = get_block_profile(profile)
+
+    blocked_hosts: List[str] = block_profile["blocked_hosts"]
+    if blocked_hosts:
+        rules = ", ".join(f"MAP {host} ~NOTFOUND" for host in blocked_hosts)
+        options.add_argument(f"--host-resolver-rules={rules}")
+
+    if block_profile["block_images"]:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2
+        })
+
+    if block_profile["blocked_urls"]:
+        # nothing we load needs sound or autoplaying video
+        options.add_argument("--mute-audio")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+
+
+def apply_block_profile(logger: Logger, driver: WebDriver, profile: str):
+    """blocks the profile's url patterns on the current tab over CDP
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. driver : WebDriver
+        - chrome webdriver instance
+    3. profile : str
+        - one of the BLOCK_PROFILES names
+
+    #### Returns
+    ------
+        - None
+
+    #### Raises
+    ------
+        - Exception
+            - when failing to set the blocked urls
+    """
+    blocked_urls = get_block_profile(profile)["blocked_urls"]
+    if not blocked_urls:
+        return
+
+    try:
+        _block_urls(driver, blocked_urls)
+        logger.info(
+            f"{profile} block profile applied, {len(blocked_urls)} url "
+            "patterns blocked")
+    except Exception as e:
+        logger.exception(f"Failed to apply block profile, reason: {e}")
+        raise Exception(
+            "Failed to apply block profile - see above for error info")
+
+
+def open_blocked_tab(
+    logger: Logger,
+    driver: WebDriver,
+    profile: str,
+    name: Optional[str] = None
+) -> str:
+    """opens a blank tab and switches to it with the profile's url patterns
+    already blocked, CDP blocking only applies to the tab it is sent to so
+    a tab opened straight onto an article would load everything
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. driver : WebDriver
+        - chrome webdriver instance, on the tab the new one is opened from
+    3. profile : str
+        - one of the BLOCK_PROFILES names
+    4. name : Optional[str], (default None)
+        - window name, a named window.open loads into it later
+
+    #### Returns
+    ------
+    - str
+        - handle of the new tab
+
+    #### Raises
+    ------
+        - Exception
+            - when failing to open the tab
+    """
+    try:
+        handles = set(driver.window_handles)
+        driver.execute_script(
+            "window.open('about:blank', arguments[0]);", name or "_blank")
+        handle = (set(driver.window_handles) - handles).pop()
+        driver.switch_to.window(handle)
+        blocked_urls = get_block_profile(profile)["blocked_urls"]
+        if blocked_urls:
+            _block_urls(driver, blocked_urls)
+        return handle
+    except Exception as e:
+        logger.exception(f"Failed to open tab, reason: {e}")
+        raise Exception("Failed to open tab - see above for error info")
+
+
+def _block_urls(driver: WebDriver, blocked_urls: List[str]):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
@@ -0,0 +1,253 @@
+# built ins
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+# installed libs
+from dateutil.relativedelta import relativedelta
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.metadata import parse_published
+
+
+# result standing in for a card the planner skipped without opening it
+OUT_OF_WINDOW = object()
+
+RELATIVE_DATE_PATTERN = re.compile(
+    r"\b(\d+|an?|one)\s+(minute|hour|day|week|month|year)s?\s+ago\b",
+    re.IGNORECASE
+)
+ABSOLUTE_DATE_PATTERN = re.compile(
+    r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+    r"\s+(\d{1,2}),\s+(\d{4})\b",
+    re.IGNORECASE
+)
+# /2024/05/13/ or 2024-05-13 in an article url
+SLUG_DATE_PATTERN = re.compile(r"(?:^|/|-)(\d{4})[/-](\d{2})[/-](\d{2})(?:/|-|$)")
+
+RELATIVE_UNITS = {
+    "minute": relativedelta(minutes=1),
+    "hour": relativedelta(hours=1),
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "year": relativedelta(years=1),
+}
+
+
+def latest_possible_date(
+    date_hint: Optional[str],
+    article_link: Optional[str],
+    now: datetime
+) -> Optional[datetime]:
+    """the latest an article can have been published going by the date
+    label on its card or the date in its url. the hints are rounded
+    ("3 days ago", "May 13, 2024") so this leans late, a card is only
+    skipped when even the latest reading of its hint is out of the window
+
+    #### Parameters
+    ------
+    1. date_hint : Optional[str]
+        - text or datetime attribute of the card's date label
+    2. article_link : Optional[str]
+        - url of the article
+    3. now : datetime
+        - when the search started, relative labels count back from it
+
+    #### Returns
+    ------
+    - Optional[datetime]
+        - the latest possible publish time, None when there is no hint
+    """
+    if date_hint:
+        published = parse_published(date_hint)
+        if published is not None:
+            return published + timedelta(days=1)
+
+        match = RELATIVE_DATE_PATTERN.search(date_hint)
+        if match:
+            amount = match.group(1).lower()
+            amount = int(amount) if amount.isdigit() else 1
+            # labels round down ("3 days" for 3.9 days) but allow for ones
+            # that round to the nearest unit
+            return now - RELATIVE_UNITS[match.group(2).lower()] * max(amount - 1, 0)
+
+        if re.search(r"\byesterday\b", date_hint, re.IGNORECASE):
+            return now
+
+        match = ABSOLUTE_DATE_PATTERN.search(date_hint)
+        if match:
+            try:
+                published = datetime.strptime(
+                    f"{match.group(1)[:3]} {match.group(2)} {match.group(3)}",
+                    "%b %d %Y")
+                return published + timedelta(days=1)
+            except ValueError:
+                pass
+
+    if article_link:
+        match = SLUG_DATE_PATTERN.search(urlparse(article_link).path)
+        if match:
+            try:
+                published = datetime(*(int(part) for part in match.groups()))
+                return published + timedelta(days=1)
+            except ValueError:
+                pass
+
+    return None
+
+
+class DateWindowPlanner(object):
+    """decides which cards of a search are worth opening and when the search
+    has gone past the date window. cards whose date hint puts them before
+    the window are skipped without loading the article, and the search only
+    stops once more than overshoot results in a row fall outside the window
+    so one out of order result doesn't cut it short. it also keeps track of
+    how far back the search got without a failed card, which is what the
+    index can count as covered"""
+
+    def __init__(
+            self,
+            logger: Logger,
+            start_date: datetime,
+            overshoot: int = settings.PAGINATION_OVERSHOOT,
+            use_hints: bool = settings.PAGINATION_DATE_HINTS,
+            now: Optional[datetime] = None
+        ):
+        """
+        #### Parameters
+        ------
+        1. logger : Logger
+            - logger instance
+        2. start_date : datetime
+            - articles published before this are out of the window
+        3. overshoot : int, (default defined at settings.PAGINATION_OVERSHOOT)
+            - out of window results in a row tolerated before stopping, 0
+                stops at the first one
+        4. use_hints : bool, (default defined at settings.PAGINATION_DATE_HINTS)
+            - whether cards are skipped on their date hints
+        5. now : Optional[datetime], (default None)
+            - when the search started, defaults to now
+        """
+        self.logger = logger
+        self.start_date = start_date
+        self.overshoot = overshoot
+        self.use_hints = use_hints
+        self.now = now or datetime.now()
+        self.lock = threading.Lock()
+        self.out_of_window_streak = 0
+        self.finished = False
+        self.loads_saved = 0
+        # publish date of the last result before the first failed card
+        self.contiguous_until: Optional[datetime] = None
+        self.failures = 0
+
+    def out_of_window(self, card: Any) -> bool:
+        """whether the card's date hint puts it before the window
+
+        #### Parameters
+        ------
+        1. card : Any
+            - card details from the batched extraction, other cards (e.g.
+                WebElements) have no hint and are never skipped
+
+        #### Returns
+        ------
+        - bool
+            - True when the card doesn't need to be opened
+        """
+        if not self.use_hints or not isinstance(card, dict):
+            return False
+        latest = latest_possible_date(
+            card.get("date_hint"), card.get("article_link"), self.now)
+        return latest is not None and latest <= self.start_date
+
+    def observe(
+            self,
+            in_window: bool,
+            skipped: bool = False,
+            published: Optional[datetime] = None
+        ) -> bool:
+        """records the next result in card order
+
+        #### Parameters
+        ------
+        1. in_window : bool
+            - whether the result was published inside the window
+        2. skipped : bool, (default False)
+            - whether it was skipped on its date hint without being opened
+        3. published : Optional[datetime], (default None)
+            - when the result was published, for the processed ones
+
+        #### Returns
+        ------
+        - bool
+            - False once the search has gone past the window
+        """
+        with self.lock:
+            if skipped:
+                self.loads_saved += 1
+            if published is not None and not self.failures:
+                self.contiguous_until = published
+            if in_window:
+                self.out_of_window_streak = 0
+            else:
+                self.out_of_window_streak += 1
+                if self.out_of_window_streak > self.overshoot:
+                    self.finished = True
+            return not self.finished
+
+    def fail(self):
+        """records that the next card in card order couldn't be processed,
+        nothing from here on counts as covered
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.failures += 1
+
+    def covered_from(self, ended: bool) -> Optional[datetime]:
+        """start of the range the search indexed everything in, up to when
+        it started
+
+        #### Parameters
+        ------
+        1. ended : bool
+            - whether the results really ended (rather than the wait for
+                more timing out)
+
+        #### Returns
+        ------
+        - Optional[datetime]
+            - the window start when no card failed and the search went past
+                the window or to the end of the results, otherwise the publish
+                date of the last result before the first failure. None when
+                there is no such result
+        """
+        with self.lock:
+            if not self.failures and (self.finished or ended):
+                return self.start_date
+            if self.contiguous_until is None:
+                return None
+            # cards skipped on their hints past the window weren't indexed
+            return max(self.contiguous_until, self.start_date)
+
+    def report(self) -> Dict[str, int]:
+        """logs and returns how many article loads the date hints saved
+
+        #### Returns
+        ------
+        - Dict[str, int]
+            - loads_saved
+        """
+        with self.lock:
+            loads_saved = self.loads_saved
+        self.logger.info(
+            f"date hints skipped {loads_saved} out of window article loads")
+        return {"loads_saved": loads_saved}
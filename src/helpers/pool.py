@@ -0,0 +1,98 @@
+# built ins
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+
+# project modules
+from logger import Logger
+
+
+class BrowserPool(object):
+    """pool of extra browser sessions, the main session keeps paginating and
+    hands urls over to these so the slow page loads happen in parallel"""
+
+    def __init__(self, logger: Logger, size: int, factory: Callable[[], Any]):
+        # no try-except here because parent wrapped in try catch and will log
+        # and crash there if something goes wrong here
+        self.logger = logger
+        self.size = size
+        self.factory = factory
+        self.workers = queue.Queue()
+        self.executor = None
+
+    def open(self):
+        """opens the worker sessions and the thread pool that drives them
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to open a worker session
+        """
+        try:
+            for worker_index in range(self.size):
+                worker = self.factory()
+                worker.open_browser(url="about:blank")
+                self.workers.put(worker)
+                self.logger.info(f"worker session {worker_index + 1} opened")
+
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.size,
+                thread_name_prefix="news-browser-worker"
+            )
+        except Exception as e:
+            self.logger.exception(f"Failed to open browser pool, reason: {e}")
+            self.close()
+            raise Exception(
+                "Failed to open browser pool - see above for error info")
+
+    def map(self, func: Callable[[Any, Any], Any], items: Iterable[Any]) -> List[Any]:
+        """runs func(worker, item) for every item across the worker sessions
+
+        #### Parameters
+        ------
+        1. func : Callable[[Any, Any], Any]
+            - function taking a worker session and an item
+        2. items : Iterable[Any]
+            - items to process
+
+        #### Returns
+        ------
+        - List[Any]
+            - results in the same order as items (regardless of which worker
+                finished first)
+        """
+        # executor.map yields in submission order so card order is kept
+        return list(self.executor.map(
+            lambda item: self._run(func, item), items))
+
+    def _run(self, func: Callable[[Any, Any], Any], item: Any) -> Any:
+        # each session can only be driven by one thread at a time so we check
+        # one out for the duration of the task
+        worker = self.workers.get()
+        try:
+            return func(worker, item)
+        finally:
+            self.workers.put(worker)
+
+    def close(self):
+        """shuts down the thread pool and closes every worker session
+
+        #### Returns
+        ------
+            - None
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+        while not self.workers.empty():
+            worker = self.workers.get()
+            try:
+                worker.close_browsers()
+            except Exception:
+                # already logged by the worker, keep closing the others
+                pass
@@ -0,0 +1,84 @@
+# installed libs
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# project modules
+from logger import Logger
+
+
+# hides the consent/newsletter overlays as soon as they're added and clicks
+# through them in the background so they never sit on top of what we click.
+# registered before every document in the session so late popups get handled
+# without us probing for them on each interaction
+POPUP_SUPPRESSION_SCRIPT = """
+(() => {
+    if (window.__popupSuppression) { return; }
+    window.__popupSuppression = true;
+
+    const css = `
+        .fc-consent-root, .fc-dialog-overlay, .fc-dialog-container {
+            display: none !important;
+            visibility: hidden !important;
+        }
+        html, body { overflow: auto !important; }
+    `;
+    const dismissSelectors = [
+        'button.fc-cta-consent',
+        'button[title="Close"]'
+    ];
+
+    const addStyle = () => {
+        if (!document.head || document.getElementById('popup-suppression')) {
+            return;
+        }
+        const style = document.createElement('style');
+        style.id = 'popup-suppression';
+        style.textContent = css;
+        document.head.appendChild(style);
+    };
+    const dismiss = () => {
+        addStyle();
+        for (const selector of dismissSelectors) {
+            for (const button of document.querySelectorAll(selector)) {
+                button.click();
+            }
+        }
+    };
+
+    new MutationObserver(dismiss).observe(
+        document.documentElement, {childList: true, subtree: true});
+    document.addEventListener('DOMContentLoaded', dismiss);
+    dismiss();
+})();
+"""
+
+
+def suppress_popups(logger: Logger, driver: WebDriver):
+    """registers the popup suppression script for every document the session
+    loads and runs it on the current one
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. driver : WebDriver
+        - chrome webdriver instance
+
+    #### Returns
+    ------
+        - None
+
+    #### Raises
+    ------
+        - Exception
+            - when failing to register the script
+    """
+    try:
+        driver.execute_cdp_cmd(
+            "Page.addScriptToEvaluateOnNewDocument",
+            {"source": POPUP_SUPPRESSION_SCRIPT}
+        )
+        driver.execute_script(POPUP_SUPPRESSION_SCRIPT)
+    except Exception as e:
+        logger.exception(f"Failed to set up popup suppression, reason: {e}")
+        raise Exception(
+            "Failed to set up popup suppression - see above for error info")
@@ -0,0 +1,192 @@
+# built ins
+from typing import Dict, List, Optional
+
+# installed libs
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.network import open_blocked_tab
+from helpers.rate_control import rate_limits
+
+
+RELEASED_SCRIPT = "window.__prefetchReleased = true;"
+# whether the tab holds a parsed document that hasn't been read yet, tabs
+# start out blank (see helpers.network.open_blocked_tab) until the article
+# starts loading
+DOCUMENT_READY_SCRIPT = (
+    "return location.href !== 'about:blank' "
+    "&& document.readyState !== 'loading' && !window.__prefetchReleased;")
+
+class TabPrefetcher(object):
+    """keeps the next few article pages loading in background tabs while the
+    current one is read. the tabs are named windows opened from the search
+    tab, so loading a new article into a free tab reuses it instead of
+    closing and opening tabs. how many tabs are kept loading adapts to
+    whether the pages are ready by the time we get to them"""
+
+    def __init__(
+            self,
+            logger: Logger,
+            driver: WebDriver,
+            main_window: str,
+            max_tabs: int = settings.PREFETCH_MAX_TABS,
+            slow_read: float = settings.PREFETCH_SLOW_READ
+        ):
+        """
+        #### Parameters
+        ------
+        1. logger : Logger
+            - logger instance
+        2. driver : WebDriver
+            - chrome webdriver instance
+        3. main_window : str
+            - handle of the tab with the search results
+        4. max_tabs : int, (default defined at settings.PREFETCH_MAX_TABS)
+            - upper bound on the tabs loading at once
+        5. slow_read : float, (default defined at settings.PREFETCH_SLOW_READ)
+            - seconds a read can take before we count the page as not ready
+        """
+        self.logger = logger
+        self.driver = driver
+        self.main_window = main_window
+        self.max_tabs = max_tabs
+        self.slow_read = slow_read
+        # current lookahead, starts small and grows while pages aren't ready
+        self.size = 1
+        self.quick_reads = 0
+        # tab name -> handle, and tab name -> article loading in it
+        self.handles: Dict[str, str] = {}
+        self.links: Dict[str, Optional[str]] = {}
+
+    def _tab_of(self, link: str) -> Optional[str]:
+        for name, tab_link in self.links.items():
+            if tab_link == link:
+                return name
+        return None
+
+    def _free_tab(self) -> Optional[str]:
+        for name, tab_link in self.links.items():
+            if tab_link is None:
+                return name
+        if len(self.links) < self.size:
+            return f"prefetch-{len(self.links)}"
+        return None
+
+    def _discard(self, name: str):
+        # frees a tab whose article won't be read. its document gets marked
+        # like a released one so it can't pass for the next article loaded
+        # into the tab before that one replaces it
+        self.driver.switch_to.window(self.handles[name])
+        self.driver.execute_script(RELEASED_SCRIPT)
+        self.driver.switch_to.window(self.main_window)
+        self.links[name] = None
+
+    def _load(self, name: str, link: str):
+        # has to run on the search tab, a named window.open navigates the
+        # tab with that name. the tab is opened blank the first time so the
+        # block profile is on it before it loads anything
+        if name not in self.handles:
+            self.handles[name] = open_blocked_tab(
+                self.logger, self.driver, settings.BLOCK_PROFILE, name=name)
+            self.driver.switch_to.window(self.main_window)
+        self.driver.execute_script(
+            "window.open(arguments[0], arguments[1]);", link, name)
+        self.links[name] = link
+
+    def fill(self, links: List[str]):
+        """starts loading the upcoming articles in free tabs, call it from the
+        search tab
+
+        #### Parameters
+        ------
+        1. links : List[str]
+            - upcoming article links in the order they'll be read, starting
+                with the one about to be read. only the first self.size are
+                prefetched, and no more than the site's current rate limit
+
+        #### Returns
+        ------
+            - None
+        """
+        # tabs holding articles that aren't coming up any more (skipped or
+        # failed cards) are free again
+        upcoming = set(links[:self.max_tabs])
+        for name, tab_link in list(self.links.items()):
+            if tab_link is not None and tab_link not in upcoming:
+                self._discard(name)
+
+        size = self.size
+        if links:
+            size = min(size, rate_limits.get(links[0]).current_limit)
+        for link in links[:size]:
+            if self._tab_of(link) is not None:
+                continue
+            name = self._free_tab()
+            if name is None:
+                return
+            self._load(name, link)
+
+    def open(self, link: str):
+        """switches to the tab with the article, loading it first when it
+        wasn't prefetched
+
+        #### Parameters
+        ------
+        1. link : str
+            - article link
+
+        #### Returns
+        ------
+            - None
+        """
+        name = self._tab_of(link)
+        if name is None:
+            name = self._free_tab()
+            if name is None:
+                # every tab is busy with articles further ahead, one of them
+                # gets loaded again later
+                name = next(iter(self.links))
+                self._discard(name)
+            self._load(name, link)
+        self.driver.switch_to.window(self.handles[name])
+
+    def release(self, link: str, read_seconds: float):
+        """frees the article's tab for the next prefetch, adapts the
+        lookahead to how long the read took and switches back to the search
+        tab
+
+        #### Parameters
+        ------
+        1. link : str
+            - article link
+        2. read_seconds : float
+            - how long reading the article's date took after switching to it
+
+        #### Returns
+        ------
+            - None
+        """
+        name = self._tab_of(link)
+        if name is not None:
+            # marks the finished document, the next article loaded into the
+            # tab is only ready once this one has been replaced
+            self.driver.execute_script(RELEASED_SCRIPT)
+            self.links[name] = None
+
+        if read_seconds > self.slow_read:
+            # still waiting on the page, load further ahead
+            self.quick_reads = 0
+            if self.size < self.max_tabs:
+                self.size += 1
+                self.logger.debug(f"prefetching {self.size} articles ahead")
+        else:
+            # shrink again once a full window of pages was ready in time
+            self.quick_reads += 1
+            if self.quick_reads >= self.size and self.size > 1:
+                self.quick_reads = 0
+                self.size -= 1
+                self.logger.debug(f"prefetching {self.size} articles ahead")
+
+        self.driver.switch_to.window(self.main_window)
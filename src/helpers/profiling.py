@@ -0,0 +1,260 @@
+# built ins
+import functools
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# project modules
+from config import settings
+from logger import Logger
+
+
+class Span(object):
+    """durations recorded under one span name. count, total and max are
+    exact, the percentiles come from a bounded reservoir sample so long runs
+    don't grow memory"""
+
+    def __init__(self, sample_size: int):
+        self.sample_size = sample_size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.sample_size:
+            self.samples.append(seconds)
+        else:
+            # reservoir sampling, every duration has the same chance to stay
+            slot = random.randrange(self.count)
+            if slot < self.sample_size:
+                self.samples[slot] = seconds
+
+    def percentiles(self, *fractions: float) -> List[float]:
+        """percentiles of the sampled durations, 0.0 before any were recorded"""
+        if not self.samples:
+            return [0.0 for _ in fractions]
+        samples = sorted(self.samples)
+        return [
+            samples[min(int(fraction * len(samples)), len(samples) - 1)]
+            for fraction in fractions
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p95 = self.percentiles(0.50, 0.95)
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "p50_seconds": round(p50, 4),
+            "p95_seconds": round(p95, 4),
+            "max_seconds": round(self.max, 4)
+        }
+
+
+class Profiler(object):
+    """times named spans (helpers and the stages of a search) across every
+    thread of a run, cheap enough to leave on: a perf_counter pair and an
+    append under a lock per span"""
+
+    def __init__(
+            self,
+            enabled: bool = settings.PROFILING,
+            sample_size: int = settings.PROFILE_SAMPLE_SIZE
+        ):
+        self.enabled = enabled
+        self.sample_size = sample_size
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, started: Optional[float] = None):
+        """starts a new run
+
+        #### Parameters
+        ------
+        1. started : Optional[float], (default None)
+            - time.perf_counter() the milestones are measured from, defaults
+                to now
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.spans: Dict[str, Span] = {}
+            self.started = started if started is not None else time.perf_counter()
+            self.milestones: Dict[str, float] = {}
+            self.series: Dict[str, List[float]] = {}
+
+    def milestone(self, name: str):
+        """records how long after the start of the run name first happened,
+        later calls are ignored
+
+        #### Parameters
+        ------
+        1. name : str
+            - milestone name (e.g. "first_card")
+
+        #### Returns
+        ------
+            - None
+        """
+        if name in self.milestones:
+            return
+        seconds = time.perf_counter() - self.started
+        with self.lock:
+            self.milestones.setdefault(name, round(seconds, 3))
+
+    def sample(self, name: str, value: float):
+        """adds a reading to the named series (e.g. the page's dom size after
+        each batch), the first settings.PROFILE_SAMPLE_SIZE are kept
+
+        #### Parameters
+        ------
+        1. name : str
+            - series name
+        2. value : float
+            - the reading
+
+        #### Returns
+        ------
+            - None
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            series = self.series.setdefault(name, [])
+            if len(series) < self.sample_size:
+                series.append(value)
+
+    def record(self, name: str, seconds: float):
+        """records a duration that was timed elsewhere
+
+        #### Parameters
+        ------
+        1. name : str
+            - span name (e.g. "image_download")
+        2. seconds : float
+            - how long it took
+
+        #### Returns
+        ------
+            - None
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            span = self.spans.get(name)
+            if span is None:
+                span = self.spans[name] = Span(self.sample_size)
+            span.record(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """times the wrapped block under name, failures are timed too
+
+        #### Parameters
+        ------
+        1. name : str
+            - span name (e.g. "search.load_more")
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """decorator version of span for whole functions
+
+        #### Parameters
+        ------
+        1. name : str
+            - span name
+        """
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """histogram summary of every span so far
+
+        #### Returns
+        ------
+        - Dict[str, Dict[str, Any]]
+            - count, total, p50, p95 and max seconds per span name
+        """
+        with self.lock:
+            return {
+                name: span.summary()
+                for name, span in sorted(self.spans.items())
+            }
+
+    def write_report(
+            self,
+            logger: Logger,
+            path: str,
+            summary: Optional[Dict[str, Any]] = None
+        ):
+        """logs the milestones and slowest spans and writes the profile to
+        path as json
+
+        #### Parameters
+        ------
+        1. logger : Logger
+            - logger instance
+        2. path : str
+            - where to write the profile
+        3. summary : Optional[Dict[str, Any]], (default None)
+            - run level figures to write alongside the spans (e.g. the
+                helpers.waits.wait_stats report)
+
+        #### Returns
+        ------
+            - None
+        """
+        spans = self.report()
+        with self.lock:
+            milestones = dict(self.milestones)
+            series = {name: list(values) for name, values in self.series.items()}
+        for name, seconds in milestones.items():
+            logger.info(f"{name} after {seconds}s")
+        slowest = sorted(
+            spans.items(),
+            key=lambda item: item[1]["total_seconds"],
+            reverse=True
+        )[:5]
+        for name, span in slowest:
+            logger.info(
+                f"{name}: {span['count']} spans, {span['total_seconds']}s "
+                f"total, p95 {span['p95_seconds']}s")
+        try:
+            with open(path, "w") as profile_file:
+                json.dump(
+                    {
+                        "run": summary or {},
+                        "milestones": milestones,
+                        "spans": spans,
+                        "series": series
+                    },
+                    profile_file,
+                    indent=4
+                )
+        except Exception as e:
+            # the profile is informational, don't fail the run over it
+            logger.exception(f"Failed to write run profile, reason: {e}")
+
+
+profiler = Profiler()
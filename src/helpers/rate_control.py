@@ -0,0 +1,308 @@
+# built ins
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.profiling import profiler
+
+
+# the server asking us to slow down
+THROTTLED_STATUSES = {429, 503}
+
+# status and time to first byte of the page chrome loaded in the current tab
+NAVIGATION_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+return navigation ? {
+    status: navigation.responseStatus || null,
+    seconds: (navigation.responseStart - navigation.requestStart) / 1000
+} : null;
+"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """seconds to wait from a Retry-After header, which is either a number
+    of seconds or an http date
+
+    #### Parameters
+    ------
+    1. value : Optional[str]
+        - the header value
+
+    #### Returns
+    ------
+    - Optional[float]
+        - seconds to wait, None when there is no usable header
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateController(object):
+    """limits the fetches in flight to one host with AIMD feedback. every
+    successful fetch adds 1 / limit to the limit (so +1 per window of
+    fetches), throttled responses, errors and latency well above the best
+    seen multiply it by settings.RATE_DECREASE_FACTOR, at most once per
+    round trip so one burst of failures only counts once. a Retry-After
+    holds back every new fetch to the host until it has passed"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.enabled = settings.RATE_CONTROL
+        self.min_limit = settings.RATE_MIN_CONCURRENCY
+        self.max_limit = settings.RATE_MAX_CONCURRENCY
+        self.condition = threading.Condition()
+        self.limit = float(min(
+            max(settings.RATE_INITIAL_CONCURRENCY, self.min_limit),
+            self.max_limit))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        # moving average of the fetch latency and the lowest it has been
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self.stats: Dict[str, Any] = {
+            "fetches": 0,
+            "throttled": 0,
+            "errors": 0,
+            "decreases": 0,
+            "lowest_limit": int(self.limit),
+            "highest_limit": int(self.limit)
+        }
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit) if self.enabled else self.max_limit
+
+    def wait(self):
+        """blocks until a Retry-After for the host has passed
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.condition:
+            self._wait_until_open()
+
+    def _wait_until_open(self):
+        while True:
+            remaining = self.blocked_until - time.monotonic()
+            if remaining <= 0:
+                return
+            self.condition.wait(remaining)
+
+    def acquire(self) -> Callable[[], None]:
+        """takes one of the host's in-flight slots, waiting for one to free
+        up (and for any Retry-After) first
+
+        #### Returns
+        ------
+        - Callable[[], None]
+            - gives the slot back, only the first call does anything so it
+                can be hooked to several ways a fetch can end
+        """
+        if not self.enabled:
+            return lambda: None
+
+        started = time.perf_counter()
+        with self.condition:
+            while True:
+                self._wait_until_open()
+                if self.in_flight < int(self.limit):
+                    break
+                self.condition.wait()
+            self.in_flight += 1
+        waited = time.perf_counter() - started
+        if waited > 0.001:
+            profiler.record("rate_control.wait", waited)
+
+        released = threading.Event()
+
+        def release():
+            with self.condition:
+                if released.is_set():
+                    return
+                released.set()
+                self.in_flight -= 1
+                self.condition.notify_all()
+        return release
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """holds one of the host's in-flight slots for the wrapped fetch"""
+        release = self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+    def observe(
+            self,
+            seconds: Optional[float],
+            status: Optional[int] = None,
+            retry_after: Optional[str] = None,
+            error: bool = False
+        ):
+        """feeds the outcome of one fetch back into the limit
+
+        #### Parameters
+        ------
+        1. seconds : Optional[float]
+            - how long the server took to answer, None when unknown
+        2. status : Optional[int], (default None)
+            - http status, None when unknown (e.g. a page chrome loaded that
+                doesn't report it)
+        3. retry_after : Optional[str], (default None)
+            - the response's Retry-After header
+        4. error : bool, (default False)
+            - whether the fetch failed without a response (timeouts,
+                dropped connections)
+
+        #### Returns
+        ------
+            - None
+        """
+        if not self.enabled:
+            return
+
+        with self.condition:
+            now = time.monotonic()
+            self.stats["fetches"] += 1
+            if status in THROTTLED_STATUSES:
+                self.stats["throttled"] += 1
+                backoff = parse_retry_after(retry_after)
+                if backoff is None:
+                    backoff = settings.RATE_DEFAULT_BACKOFF
+                self.blocked_until = max(
+                    self.blocked_until,
+                    now + min(backoff, settings.RATE_MAX_RETRY_AFTER))
+                self._decrease(now)
+            elif error or (status is not None and status >= 500):
+                self.stats["errors"] += 1
+                self._decrease(now)
+            elif seconds is not None:
+                self.latency = (
+                    seconds if self.latency is None
+                    else 0.8 * self.latency + 0.2 * seconds)
+                self.best_latency = (
+                    self.latency if self.best_latency is None
+                    else min(self.best_latency, self.latency))
+                if self.latency > self.best_latency * settings.RATE_LATENCY_FACTOR:
+                    # queueing on the server side, back off before it errors
+                    self._decrease(now)
+                else:
+                    self._set_limit(self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def _decrease(self, now: float):
+        if now - self.last_decrease < (self.latency or 1.0):
+            return
+        self.last_decrease = now
+        self.stats["decreases"] += 1
+        self._set_limit(self.limit * settings.RATE_DECREASE_FACTOR)
+
+    def _set_limit(self, limit: float):
+        previous = int(self.limit)
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if int(self.limit) != previous:
+            self.stats["lowest_limit"] = min(
+                self.stats["lowest_limit"], int(self.limit))
+            self.stats["highest_limit"] = max(
+                self.stats["highest_limit"], int(self.limit))
+            profiler.sample(f"rate_limit.{self.host}", int(self.limit))
+
+    def report(self) -> Dict[str, Any]:
+        with self.condition:
+            return dict(
+                self.stats,
+                limit=int(self.limit),
+                latency_seconds=(
+                    round(self.latency, 4) if self.latency is not None else None)
+            )
+
+
+class RateLimits(object):
+    """one RateController per host, shared by every session of the run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """starts a new run, picking up the current settings
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.controllers: Dict[str, RateController] = {}
+
+    def get(self, url: str) -> RateController:
+        """the controller for the host of url
+
+        #### Parameters
+        ------
+        1. url : str
+            - url about to be fetched
+
+        #### Returns
+        ------
+        - RateController
+            - controller shared by every fetch to that host
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            controller = self.controllers.get(host)
+            if controller is None:
+                controller = self.controllers[host] = RateController(host)
+        return controller
+
+    def report(self, logger: Optional[Logger] = None) -> Dict[str, Dict[str, Any]]:
+        """current limit and counts per host, logged when a logger is passed
+
+        #### Parameters
+        ------
+        1. logger : Optional[Logger], (default None)
+            - logger instance
+
+        #### Returns
+        ------
+        - Dict[str, Dict[str, Any]]
+            - see RateController.report
+        """
+        with self.lock:
+            controllers = dict(self.controllers)
+        report = {
+            host: controller.report()
+            for host, controller in sorted(controllers.items())
+        }
+        if logger is not None:
+            for host, host_report in report.items():
+                logger.info(
+                    f"{host}: ended at {host_report['limit']} fetches in "
+                    f"flight ({host_report['lowest_limit']}-"
+                    f"{host_report['highest_limit']}), "
+                    f"{host_report['throttled']} throttled, "
+                    f"{host_report['errors']} errors")
+        return report
+
+
+rate_limits = RateLimits()
@@ -0,0 +1,353 @@
+# built ins
+import json
+from abc import ABC, abstractmethod
+import os
+import re
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Tuple
+
+# installed libs
+import xlsxwriter
+
+# project modules
+from config import settings
+from logger import Logger
+
+
+# same columns (and order) as the excel output has always had, typed so
+# the columnar formats don't need any guessing when they're read back. the
+# types are arrow type aliases, pyarrow is only imported for parquet output.
+# article_link is only carried along for the index, it isn't an output column
+OUTPUT_SCHEMA: List[Tuple[str, str]] = [
+    ("image_url", "string"),
+    ("image_name", "string"),
+    ("title", "string"),
+    ("description", "string"),
+    ("search_phrase_count", "int64"),
+    ("money_value_present", "bool"),
+    ("date_published", "timestamp[us]"),
+]
+OUTPUT_COLUMNS: List[str] = [name for name, _ in OUTPUT_SCHEMA]
+
+OUTPUT_FORMATS = ["xlsx", "parquet", "jsonl"]
+
+
+def typed_row(article_details: Dict[str, Any]) -> Dict[str, Any]:
+    """picks the output columns out of the article details and casts them to
+    their schema types
+
+    #### Parameters
+    ------
+    1. article_details : Dict[str, Any]
+        - processed article details with the image name resolved
+
+    #### Returns
+    ------
+    - Dict[str, Any]
+        - one value per output column, None where the article has none
+    """
+    row = {name: article_details.get(name) for name in OUTPUT_COLUMNS}
+    for name in ["image_url", "image_name", "title", "description"]:
+        if row[name] is not None:
+            row[name] = str(row[name])
+    if row["search_phrase_count"] is not None:
+        row["search_phrase_count"] = int(row["search_phrase_count"])
+    if row["money_value_present"] is not None:
+        row["money_value_present"] = bool(row["money_value_present"])
+    if isinstance(row["date_published"], str):
+        row["date_published"] = datetime.fromisoformat(row["date_published"])
+    return row
+
+
+def get_dataset_path(
+    search_term: str,
+    output_format: str,
+    run_started: datetime
+) -> str:
+    """path of this run's part file in the partitioned dataset, every run
+    adds a new file instead of overwriting the last one. each format has its
+    own dataset root so a reader of one never trips over the other's files
+
+    #### Parameters
+    ------
+    1. search_term : str
+        - search term, used as a partition
+    2. output_format : str
+        - "parquet" or "jsonl"
+    3. run_started : datetime
+        - when the run started, used for the date partition and file name
+
+    #### Returns
+    ------
+    - str
+        - e.g. output/articles_parquet/search_query=dog/run_date=2024-05-13/
+            part-20240513T223606.parquet
+    """
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", search_term).strip("_")
+    return (
+        f"{settings.OUTPUT_PATH}/"
+        f"{settings.OUTPUT_DATASET_FOLDER}_{output_format}/"
+        f"search_query={slug}/run_date={run_started:%Y-%m-%d}/"
+        f"part-{run_started:%Y%m%dT%H%M%S%f}.{output_format}"
+    )
+
+
+class RowSink(ABC):
+    """writes each article as soon as it is processed instead of building
+    everything up in memory first. rows waiting on their image download are
+    written in order once the download at the front is done, so the backlog
+    stays about as small as the download concurrency. formats whose file is
+    only valid once closed also keep a json lines journal that is flushed
+    every settings.OUTPUT_FLUSH_EVERY rows so the results survive a crash"""
+
+    # whether the format needs the journal to survive a crash
+    journaled = True
+
+    def __init__(
+            self,
+            logger: Logger,
+            path: str,
+            flush_every: int = settings.OUTPUT_FLUSH_EVERY
+        ):
+        # no try-except here because parent wrapped in try catch and will log
+        # and crash there if something goes wrong here
+        self.logger = logger
+        self.path = path
+        self.journal_path = f"{path}.partial.jsonl"
+        self.flush_every = flush_every
+        self.journal = None
+        self.count = 0
+        self.written = 0
+        self.pending: Deque[Dict[str, Any]] = deque()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def open(self):
+        """creates the output file (and journal)
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to create the output files
+        """
+        try:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._open_output()
+            if self.journaled:
+                self.journal = open(self.journal_path, "w")
+        except Exception as e:
+            self.logger.exception(f"Failed to open output sink, reason: {e}")
+            raise Exception(
+                "Failed to open output sink - see above for error info")
+
+    def append(self, article_details: Dict[str, Any]):
+        """queues the article for writing, it's written as soon as its image
+        name is known
+
+        #### Parameters
+        ------
+        1. article_details : Dict[str, Any]
+            - processed article details
+
+        #### Returns
+        ------
+            - None
+        """
+        self.pending.append(article_details)
+        self.count += 1
+        self._drain(block=False)
+
+    def close(self):
+        """writes the remaining rows and closes the output, the journal is
+        removed once the output is complete
+
+        #### Returns
+        ------
+            - None
+
+        #### Raises
+        ------
+            - Exception
+                - when failing to write the output
+        """
+        try:
+            try:
+                self._drain(block=True)
+            finally:
+                # closed even when the remaining rows fail so the file isn't
+                # left open, the journal is kept to recover what got written
+                self._close_output()
+                if self.journal is not None:
+                    self.journal.close()
+            if self.journal is not None:
+                os.remove(self.journal_path)
+            self.logger.info(f"{self.count} rows written to {self.path}")
+        except Exception as e:
+            self.logger.exception(f"Failed to output data, reason: {e}")
+            raise Exception(
+                "Failed to output data - see above for error info")
+
+    def _drain(self, block: bool):
+        while self.pending:
+            image_name = self.pending[0].get("image_name")
+            if isinstance(image_name, Future):
+                if not block and not image_name.done():
+                    return
+                self.pending[0]["image_name"] = image_name.result()
+            self._write(typed_row(self.pending.popleft()))
+
+    def _write(self, row: Dict[str, Any]):
+        self._write_row(row)
+        self.written += 1
+
+        if self.journal is not None:
+            self.journal.write(json.dumps(row, default=str) + "\n")
+        if self.written % self.flush_every == 0:
+            self._flush()
+
+    def _flush(self):
+        if self.journal is not None:
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+
+    @abstractmethod
+    def _open_output(self):
+        """creates the output file"""
+
+    @abstractmethod
+    def _write_row(self, row: Dict[str, Any]):
+        """writes (or buffers) one typed row"""
+
+    @abstractmethod
+    def _close_output(self):
+        """writes out anything buffered and closes the output file"""
+
+
+class ExcelRowSink(RowSink):
+    """xlsx output, xlsxwriter's constant_memory mode flushes every finished
+    row to disk so the workbook doesn't grow in memory"""
+
+    def _open_output(self):
+        # cells are written as plain values like pandas did, not turned into
+        # links or formulas
+        self.workbook = xlsxwriter.Workbook(self.path, {
+            "constant_memory": True,
+            "strings_to_urls": False,
+            "strings_to_formulas": False
+        })
+        self.worksheet = self.workbook.add_worksheet()
+        # matches the header and date formats pandas used to write
+        header_format = self.workbook.add_format(
+            {"bold": True, "border": 1, "align": "center"})
+        self.date_format = self.workbook.add_format(
+            {"num_format": "yyyy-mm-dd hh:mm:ss"})
+        for column, name in enumerate(OUTPUT_COLUMNS):
+            self.worksheet.write_string(0, column, name, header_format)
+        self.row = 1
+
+    def _write_row(self, row: Dict[str, Any]):
+        for column, name in enumerate(OUTPUT_COLUMNS):
+            value = row[name]
+            if isinstance(value, datetime):
+                self.worksheet.write_datetime(
+                    self.row, column, value, self.date_format)
+            elif value is not None:
+                self.worksheet.write(self.row, column, value)
+        self.row += 1
+
+    def _close_output(self):
+        self.workbook.close()
+
+
+class ParquetRowSink(RowSink):
+    """parquet output with the typed OUTPUT_SCHEMA, rows are written out as a
+    row group every settings.OUTPUT_FLUSH_EVERY rows. pyarrow is imported on
+    open so the other formats don't pay for it at startup"""
+
+    def _open_output(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([
+            (name, pa.type_for_alias(type_alias))
+            for name, type_alias in OUTPUT_SCHEMA
+        ])
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.buffer: List[Dict[str, Any]] = []
+
+    def _write_row(self, row: Dict[str, Any]):
+        self.buffer.append(row)
+
+    def _flush(self):
+        if self.buffer:
+            self.writer.write_table(
+                self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+        super()._flush()
+
+    def _close_output(self):
+        self._flush()
+        self.writer.close()
+
+
+class JsonlRowSink(RowSink):
+    """json lines output, every line is a complete record so the file itself
+    survives a crash and doesn't need the journal. dates are iso strings"""
+
+    journaled = False
+
+    def _open_output(self):
+        self.output = open(self.path, "w")
+
+    def _write_row(self, row: Dict[str, Any]):
+        self.output.write(json.dumps(row, default=datetime.isoformat) + "\n")
+
+    def _flush(self):
+        self.output.flush()
+        os.fsync(self.output.fileno())
+
+    def _close_output(self):
+        self.output.close()
+
+
+def create_sink(logger: Logger, path: str, output_format: str) -> RowSink:
+    """creates the sink for the output format
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. path : str
+        - path to write to
+    3. output_format : str
+        - one of OUTPUT_FORMATS
+
+    #### Returns
+    ------
+    - RowSink
+        - unopened sink for the format
+
+    #### Raises
+    ------
+    - ValueError
+        - when the output format doesn't exist
+    """
+    sinks = {
+        "xlsx": ExcelRowSink,
+        "parquet": ParquetRowSink,
+        "jsonl": JsonlRowSink
+    }
+    if output_format not in sinks:
+        raise ValueError(
+            f"Unknown output format {output_format}, expected one of "
+            f"{', '.join(OUTPUT_FORMATS)}")
+    return sinks[output_format](logger=logger, path=path)
@@ -2,53 +2,54 @@
 from datetime import datetime
 import re
 import time
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, List, Optional, Union
 
 # installed libs
-import pandas as pd
-from RPA.Browser.Selenium import WebDriverWait
+import requests
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.remote.webdriver import WebDriver, WebElement
-
-from RPA.Browser.Selenium import (
-    WebDriverWait,
-    expected_conditions as EC,
-    By
-)
+from selenium.webdriver.support.ui import WebDriverWait
 
 # project modules
 from logger import Logger
 from config import settings
+from helpers.http_cache import CachingAdapter, http_cache
+from helpers.profiling import profiler
+from helpers.waits import locators, wait_stats
 
 
-def output_excel_data(logger: Logger, path: str, data: List[Dict[str, str]]) -> None:
-    """Attempts to output data to an excel file
-    
+def create_http_session(pool_size: int = settings.HTTP_POOL_SIZE) -> requests.Session:
+    """creates a requests session with a connection pool big enough for the
+    worker pool so connections to gothamist get reused, GET requests go
+    through helpers.http_cache.http_cache when it's open
+
     #### Parameters
     ------
-    1. logger : Logger
-        - logger instance
-    2. path : str
-        - path to the excel file
-    3. data : List[Dict[str, str]]
-        - data to be output to the excel file
-    
+    1. pool_size : int, (default defined at settings.HTTP_POOL_SIZE)
+        - number of connections kept alive per host
+
     #### Returns
     ------
-        - None
-    
-    #### Raises
-    ------
-        - Exception
-            - when failing to output data to excel
+    - requests.Session
+        - session with pooled adapters mounted for http and https
     """
-    try:
-        df = pd.DataFrame(data)
-        df.to_excel(path, index=False)
-    except Exception as e:
-        logger.exception(f"Failed to output data to excel, reason: {e}")
-        raise Exception(
-            "Failed to output data to excel - see above for error info"
+    session = requests.Session()
+    adapter = CachingAdapter(
+        cache=http_cache,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=2
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        # the default python user agent gets served a different page
+        "User-Agent": (
+            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
         )
+    })
+    return session
 
 def wait_and_retrieve_item(
     logger: Logger,
@@ -57,12 +58,15 @@ def wait_and_retrieve_item(
     by: str,
     identifier: str,
     additional_params: List[Any] = [],
-    timeout=settings.DEFAULT_TIMEOUT,
-    sleep_duration=settings.DEFAULT_SLEEP
-) -> Union[WebElement, List[WebElement]]:
+    timeout: Optional[float] = None,
+    sleep_duration=settings.DEFAULT_SLEEP,
+    optional: bool = False
+) -> Optional[Union[WebElement, List[WebElement]]]:
     """Attempts to find the element(s) based on the expected condition and
-    locator. a default timeout of 20 seconds and sleep to simulate human delay
-    of 0.2 seconds are used.
+    locator. the timeout adapts to how long the locator has taken so far
+    (see helpers.waits.LocatorRegistry), the condition is polled every
+    settings.WAIT_POLL_FREQUENCY seconds and an optional sleep can simulate
+    human delay.
 
     #### Parameters
     ------
@@ -79,62 +83,93 @@ def wait_and_retrieve_item(
         - identifier for location (e.g. class name, id, etc.)
     6. additional_params : List[Any], (default [])
         - additional params for the expected condition
-    7. timeout : int, (default defined at settings.DEFAULT_TIMEOUT)
-        - timeout duration waiting for element
+    7. timeout : Optional[float], (default None)
+        - fixed timeout duration waiting for element, None adapts it to
+            the locator with settings.DEFAULT_TIMEOUT as the ceiling
     8. sleep_duration : float, (default defined at settings.DEFAULT_SLEEP)
         - time to sleep after element is located (to simulate human delay)
+    9. optional : bool, (default False)
+        - whether the element can legitimately be missing, a miss then
+            returns None quickly instead of raising
 
     #### Returns
     ------
     - Union[Callable[[WebDriver], WebElement], Callable[[WebDriver],
         List[WebElement]]]
         - Callable that takes a WebDriver and returns a WebElement or a List
-            of WebElements
+            of WebElements, None when an optional element is missing
 
     #### Raises
     ------
     - ValueError
         - when failing to locate element
     """
+    key = locators.key(expected_condition, by, identifier)
+    if timeout is None:
+        timeout = locators.timeout(
+            key, settings.DEFAULT_TIMEOUT, optional=optional)
+    started = time.perf_counter()
     try:
         element: Union[
             Callable[[WebDriver], WebElement],
             Callable[[WebDriver], List[WebElement]]
-        ] = WebDriverWait(driver, timeout).until(
-            expected_condition(
-                (by, identifier), *additional_params)
-        )
-        time.sleep(sleep_duration)
+        ]
+        with wait_stats.waiting("element"):
+            element = WebDriverWait(
+                driver,
+                timeout,
+                poll_frequency=settings.WAIT_POLL_FREQUENCY
+            ).until(
+                expected_condition(
+                    (by, identifier), *additional_params)
+            )
+        locators.record(
+            key, time.perf_counter() - started, found=True, optional=optional)
+        if sleep_duration:
+            time.sleep(sleep_duration)
         return element
+    except TimeoutException:
+        locators.record(
+            key, time.perf_counter() - started, found=False, optional=optional)
+        if optional:
+            # routine for optional fields, no traceback
+            logger.debug(f"no {identifier} after {round(timeout, 2)}s")
+            return None
+        logger.exception(
+            f"Failed to locate element {identifier} after "
+            f"{round(timeout, 2)}s")
+        raise Exception(
+            "Failed to locate element - see above for error info"
+        )
     except Exception as e:
         logger.exception(f"Failed to locate element, reason: {e}")
         raise Exception(
-            f"Failed to locate element - see above for error info"
+            "Failed to locate element - see above for error info"
         )
 
+@profiler.timed("interact_with_element")
 def interact_with_element(
     logger: Logger,
-    driver: WebDriver,
     element_interaction: Callable,
     params: List[Any] = [],
     sleep_duration=settings.DEFAULT_SLEEP
 ) -> None:
     """Attempts to interact with the element(s) based on the
-    element_interaction - useful because we bake in a sleep to emulate human
-    delay. Also attempts to close any popups that close via checking if the class they use for the close button is present on the page.
+    element_interaction - useful because we can bake in a sleep to emulate
+    human delay. popups are handled for the whole session by
+    helpers.popups.suppress_popups so nothing is probed for here.
 
     #### Parameters
     ------
     1. logger : Logger
         - logger instance
-    1. driver : WebDriver
-        - selenium webdriver instance
     2. element_interaction : Callable
         - function used to interact with the element
-            (for eg search_bar.click())s.DEFAULT_TIMEOUT)
-        - timeout duration waiting for element
-    3. sleep_duration : float, (default defined at settings.DEFAULT_SLEEP)
-        - time to sleep after element is located (to simulate human delay)
+            (for eg search_bar.click())
+    3. params : List[Any], (default [])
+        - params passed to the element_interaction
+    4. sleep_duration : float, (default defined at settings.DEFAULT_SLEEP)
+        - time to sleep after the interaction (to simulate human delay)
 
     #### Returns
     ------
@@ -146,41 +181,17 @@ def interact_with_element(
         - Exception
             - when failing to interact with the element
     """
-    try:
-        consent_button = WebDriverWait(driver, 0.1).until(
-            EC.presence_of_element_located(
-                (By.XPATH, '//button[@class="fc-button fc-cta-consent fc-primary-button"]')
-                )
-        )
-        
-        consent_button.click()
-        time.sleep(sleep_duration)
-    except Exception as e:
-        # We just want to close popups here, we don't actually care
-        # if there is an error
-        pass
-    try:
-        close_button = WebDriverWait(driver, 0.1).until(
-            EC.presence_of_element_located(
-                (By.XPATH, '//button[@title="Close"]')
-                )
-        )
-        
-        close_button.click()
-        time.sleep(sleep_duration)
-    except Exception as e:
-        # We just want to close popups here, we don't actually care
-        # if there is an error
-        pass
     try:
         element_interaction(*params)
-        time.sleep(sleep_duration)
+        if sleep_duration:
+            time.sleep(sleep_duration)
     except Exception as e:
         logger.exception(f"Failed to interact with element, reason: {e}")
         raise Exception(
             "Failed to interact with element - see above for error info"
         )
 
+@profiler.timed("extract_date")
 def extract_date(logger: Logger, published_string: str) -> datetime:
     """Attempts to extract the date from the published string
     
@@ -0,0 +1,358 @@
+# built ins
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# installed libs
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# project modules
+from config import settings
+from logger import Logger
+from helpers.profiling import Span, profiler
+
+
+LOAD_MORE_XPATH = "//button/span[contains(text(), 'Load More')]"
+
+# resolves as soon as the result list grows past the count we already have,
+# or once the list has been quiet with no "Load More" button left (end of the
+# results). the timeout is a hard upper bound so it can never spin forever
+WAIT_FOR_MORE_CARDS_SCRIPT = """
+const [selector, count, buttonXpath, timeoutMs, quietMs, done] = arguments;
+const current = () => document.querySelectorAll(selector).length;
+const hasMore = () => document.evaluate(
+    buttonXpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue !== null;
+
+let quietTimer = null;
+let finished = false;
+const observer = new MutationObserver(() => check());
+const finish = (result) => {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    clearTimeout(quietTimer);
+    clearTimeout(timeoutTimer);
+    done(result);
+};
+const check = () => {
+    const length = current();
+    if (length > count) {
+        finish({count: length, ended: false, timed_out: false});
+        return;
+    }
+    // the button can disappear for a moment while a batch loads so the end
+    // only counts once the dom has settled without it
+    clearTimeout(quietTimer);
+    if (!hasMore()) {
+        quietTimer = setTimeout(
+            () => finish({count: current(), ended: !hasMore(), timed_out: false}),
+            quietMs
+        );
+    }
+};
+const timeoutTimer = setTimeout(
+    () => finish({count: current(), ended: false, timed_out: true}),
+    timeoutMs
+);
+observer.observe(document.body, {childList: true, subtree: true});
+check();
+"""
+
+
+class WaitStats(object):
+    """keeps track of how much of the run is spent waiting on the page
+    compared to doing actual work"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """starts a new run
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.run_started = time.perf_counter()
+            self.waits: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def waiting(self, kind: str) -> Iterator[None]:
+        """times the wrapped block as waiting of the given kind
+
+        #### Parameters
+        ------
+        1. kind : str
+            - what is being waited on (e.g. "element", "more_cards")
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                wait = self.waits.setdefault(kind, {"count": 0, "seconds": 0.0})
+                wait["count"] += 1
+                wait["seconds"] += elapsed
+            profiler.record(f"wait.{kind}", elapsed)
+
+    def report(self) -> Dict[str, Any]:
+        """summary of the run so far
+
+        #### Returns
+        ------
+        - Dict[str, Any]
+            - wall, waiting and working seconds plus a breakdown per kind.
+                waits from pool workers overlap so waiting can exceed wall
+                time in pool mode
+        """
+        with self.lock:
+            wall_seconds = time.perf_counter() - self.run_started
+            waiting_seconds = sum(
+                wait["seconds"] for wait in self.waits.values())
+            return {
+                "wall_seconds": round(wall_seconds, 3),
+                "waiting_seconds": round(waiting_seconds, 3),
+                "working_seconds": round(
+                    max(wall_seconds - waiting_seconds, 0.0), 3),
+                "waits": {
+                    kind: {
+                        "count": wait["count"],
+                        "seconds": round(wait["seconds"], 3)
+                    }
+                    for kind, wait in self.waits.items()
+                }
+            }
+
+    def write_report(self, logger: Logger, path: str):
+        """logs the summary and writes it to path as json
+
+        #### Parameters
+        ------
+        1. logger : Logger
+            - logger instance
+        2. path : str
+            - where to write the report
+
+        #### Returns
+        ------
+            - None
+        """
+        report = self.report()
+        logger.info(
+            f"waited {report['waiting_seconds']}s of "
+            f"{report['wall_seconds']}s wall time")
+        try:
+            with open(path, "w") as report_file:
+                json.dump(report, report_file, indent=4)
+        except Exception as e:
+            # the report is informational, don't fail the run over it
+            logger.exception(f"Failed to write wait report, reason: {e}")
+
+
+wait_stats = WaitStats()
+
+
+class LocatorStats(object):
+    """how long one locator takes to resolve and how often it misses"""
+
+    def __init__(self, sample_size: int, optional: bool):
+        self.optional = optional
+        self.found = Span(sample_size)
+        self.misses = 0
+        self.miss_seconds = 0.0
+
+
+class LocatorRegistry(object):
+    """times every locator wait_and_retrieve_item waits on and derives its
+    timeout from what it has seen, p99 * settings.LOCATOR_TIMEOUT_FACTOR
+    between settings.LOCATOR_MIN_TIMEOUT and the caller's ceiling. until a
+    locator has settings.LOCATOR_MIN_SAMPLES hits it waits the full ceiling,
+    optional fields start at settings.OPTIONAL_FIELD_TIMEOUT instead so a
+    card without an image doesn't hold up the run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """starts a new run
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            self.locators: Dict[str, LocatorStats] = {}
+
+    def key(self, expected_condition: Callable, by: str, identifier: str) -> str:
+        """one entry per condition and locator, waiting for an element to
+        show up and for its text to render take very different times"""
+        condition = getattr(expected_condition, "__name__", str(expected_condition))
+        return f"{condition}({by}={identifier})"
+
+    def timeout(self, key: str, ceiling: float, optional: bool = False) -> float:
+        """how long to wait on the locator
+
+        #### Parameters
+        ------
+        1. key : str
+            - see LocatorRegistry.key
+        2. ceiling : float
+            - the most it may wait (e.g. settings.DEFAULT_TIMEOUT)
+        3. optional : bool, (default False)
+            - whether the page can legitimately not have the element
+
+        #### Returns
+        ------
+        - float
+            - timeout in seconds
+        """
+        with self.lock:
+            stats = self.locators.get(key)
+            samples = stats.found.count if stats is not None else 0
+            p99 = stats.found.percentiles(0.99)[0] if samples else 0.0
+
+        if samples < settings.LOCATOR_MIN_SAMPLES:
+            if optional:
+                return min(settings.OPTIONAL_FIELD_TIMEOUT, ceiling)
+            return ceiling
+        return min(
+            max(p99 * settings.LOCATOR_TIMEOUT_FACTOR, settings.LOCATOR_MIN_TIMEOUT),
+            ceiling)
+
+    def record(
+            self,
+            key: str,
+            seconds: float,
+            found: bool,
+            optional: bool = False
+        ):
+        """records one wait on the locator
+
+        #### Parameters
+        ------
+        1. key : str
+            - see LocatorRegistry.key
+        2. seconds : float
+            - how long the wait took
+        3. found : bool
+            - whether the element turned up before the timeout
+        4. optional : bool, (default False)
+            - whether the page can legitimately not have the element
+
+        #### Returns
+        ------
+            - None
+        """
+        with self.lock:
+            stats = self.locators.get(key)
+            if stats is None:
+                stats = self.locators[key] = LocatorStats(
+                    settings.LOCATOR_SAMPLE_SIZE, optional)
+            if found:
+                stats.found.record(seconds)
+            else:
+                stats.misses += 1
+                stats.miss_seconds += seconds
+
+    def report(self, logger: Optional[Logger] = None) -> Dict[str, Dict[str, Any]]:
+        """latency, timeout and misses of every locator, the ones that missed
+        are logged when a logger is passed
+
+        #### Parameters
+        ------
+        1. logger : Optional[Logger], (default None)
+            - logger instance
+
+        #### Returns
+        ------
+        - Dict[str, Dict[str, Any]]
+            - found and missed counts, p50/p99 seconds, seconds lost to
+                misses and the timeout the locator is on now
+        """
+        with self.lock:
+            locators = dict(self.locators)
+        report = {}
+        for key, stats in sorted(locators.items()):
+            with self.lock:
+                p50, p99 = stats.found.percentiles(0.50, 0.99)
+                found, misses = stats.found.count, stats.misses
+                miss_seconds = stats.miss_seconds
+                optional = stats.optional
+            report[key] = {
+                "optional": optional,
+                "found": found,
+                "misses": misses,
+                "p50_seconds": round(p50, 4),
+                "p99_seconds": round(p99, 4),
+                "miss_seconds": round(miss_seconds, 3),
+                "timeout_seconds": round(
+                    self.timeout(key, settings.DEFAULT_TIMEOUT, optional), 3)
+            }
+            if logger is not None and misses:
+                logger.info(
+                    f"{key} missed {misses} times, "
+                    f"{round(miss_seconds, 1)}s spent waiting on misses")
+        return report
+
+
+locators = LocatorRegistry()
+
+
+def wait_for_more_cards(
+    logger: Logger,
+    driver: WebDriver,
+    count: int,
+    timeout: float = settings.DEFAULT_TIMEOUT
+) -> Tuple[int, bool]:
+    """waits in the page for the result list to grow past count, returns as
+    soon as the dom changes instead of polling
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. driver : WebDriver
+        - selenium webdriver instance
+    3. count : int
+        - number of cards already retrieved
+    4. timeout : float, (default defined at settings.DEFAULT_TIMEOUT)
+        - upper bound on the wait in seconds, 0 just checks the current state
+
+    #### Returns
+    ------
+    - Tuple[int, bool]
+        - number of cards now loaded and whether the results have ended
+
+    #### Raises
+    ------
+    - Exception
+        - when failing to run the wait in the page
+    """
+    try:
+        # the async script has to be allowed to run longer than our own bound
+        driver.set_script_timeout(timeout + 5)
+        with wait_stats.waiting("more_cards"):
+            result = driver.execute_async_script(
+                WAIT_FOR_MORE_CARDS_SCRIPT,
+                "#resultList .gothamist-card",
+                count,
+                LOAD_MORE_XPATH,
+                int(timeout * 1000),
+                int(settings.END_OF_RESULTS_QUIET_PERIOD * 1000)
+            )
+        if result["timed_out"]:
+            logger.warning(
+                f"no new cards after {timeout}s, stopping without reaching "
+                "the end of results")
+        return result["count"], result["ended"]
+    except Exception as e:
+        logger.exception(f"Failed to wait for more cards, reason: {e}")
+        raise Exception(
+            "Failed to wait for more cards - see above for error info")
@@ -1,25 +1,98 @@
 import sys
-from typing import Type
+import threading
+from typing import Any, Dict, Type
 from loguru import logger
 from config import settings
 
 Logger = Type[logger.__class__]
 
+
+class CardLogSampler(object):
+    """thins out the messages logged while processing a card (the ones
+    carrying a "card" extra, see NewsBrowser._process_card). below WARNING
+    only every settings.LOGGING_CARD_SAMPLE_EVERY-th card gets through and
+    only the first settings.LOGGING_CARD_TRACEBACKS card errors keep their
+    traceback, the per-card record file has every card regardless"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tracebacks = 0
+        self.warning_level = logger.level("WARNING").no
+
+    def filter(self, record: Dict[str, Any]) -> bool:
+        extra = record["extra"]
+        if extra.get("card_record"):
+            return False
+        card = extra.get("card")
+        if card is None or record["level"].no >= self.warning_level:
+            return True
+        every = max(settings.LOGGING_CARD_SAMPLE_EVERY, 1)
+        return card % every == 0
+
+    def patch(self, record: Dict[str, Any]):
+        if record["exception"] is None or record["extra"].get("card") is None:
+            return
+        with self.lock:
+            self.tracebacks += 1
+            keep = self.tracebacks <= settings.LOGGING_CARD_TRACEBACKS
+        if not keep:
+            # the message still says what went wrong
+            record["exception"] = None
+
+
 def setup_logger() -> Logger:
     logger_format = "[{time:YYYY-MM-DD HH:mm:ss}][{level}]: {message}"
 
-    if 0 in logger._core.handlers:
-        logger.remove(0)
+    # drops the default handler, and ours from an earlier call when the
+    # queries are run more than once in a process (e.g. bench.benchmark)
+    logger.remove()
+
+    sampler = CardLogSampler()
+    logger.configure(patcher=sampler.patch)
 
+    # enqueue hands the records to a background thread so the writes are
+    # off the scraping threads
     logger.add(
         sink=sys.stderr,
         level=settings.LOGGING_LEVEL,
-        format=logger_format
+        format=logger_format,
+        filter=sampler.filter,
+        enqueue=settings.LOGGING_ENQUEUE
     )
 
     logger.add(
         sink=settings.LOGGING_FILE,
         level=settings.LOGGING_LEVEL,
-        format=logger_format
+        format=logger_format,
+        filter=sampler.filter,
+        enqueue=settings.LOGGING_ENQUEUE,
+        rotation=settings.LOGGING_ROTATION,
+        retention=settings.LOGGING_RETENTION,
+        compression=settings.LOGGING_COMPRESSION
     )
+
+    if settings.LOGGING_JSON_FILE:
+        # one json object per line with the message, level, time, thread
+        # and extras (card, query) for log tooling
+        logger.add(
+            sink=settings.LOGGING_JSON_FILE,
+            level=settings.LOGGING_LEVEL,
+            filter=sampler.filter,
+            serialize=True,
+            enqueue=settings.LOGGING_ENQUEUE,
+            rotation=settings.LOGGING_ROTATION,
+            retention=settings.LOGGING_RETENTION,
+            compression=settings.LOGGING_COMPRESSION
+        )
+
+    if settings.CARD_LOG_FILE:
+        # compact record of every card, see NewsBrowser.log_card
+        logger.add(
+            sink=f"{settings.OUTPUT_PATH}/{settings.CARD_LOG_FILE}",
+            level="INFO",
+            format="{message}",
+            filter=lambda record: record["extra"].get("card_record", False),
+            enqueue=settings.LOGGING_ENQUEUE,
+            mode="w"
+        )
     return logger
@@ -1,7 +1,13 @@
 # built ins
-import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+# before the installed libs so the time to first card includes importing them
+PROCESS_STARTED = time.perf_counter()
 
 # installed libs
 from robocorp.tasks import task
@@ -11,13 +17,166 @@ from robocorp import workitems
 # project modules
 from config import settings
 from helpers.browsing import NewsBrowser
-from helpers.util import output_excel_data
-from logger import setup_logger
+from helpers.downloads import ImageDownloader
+from helpers.http_browsing import HttpNewsBrowser
+from helpers.http_cache import http_cache
+from helpers.index import ArticleIndex
+from helpers.metadata import date_sources
+from helpers.pool import BrowserPool
+from helpers.profiling import profiler
+from helpers.rate_control import rate_limits
+from helpers.sinks import create_sink, get_dataset_path
+from helpers.waits import locators, wait_stats
+from logger import Logger, setup_logger
 
 
-# went with a plain non async setup as unfamiliar with robocorp and how it
-# plays with the async libraries
-def project(search_term, months=1):
+def get_browser_class() -> Type[NewsBrowser]:
+    """picks the NewsBrowser backend from settings.BROWSER_BACKEND"""
+    if settings.BROWSER_BACKEND == "http":
+        return HttpNewsBrowser
+    return NewsBrowser
+
+
+def get_output_path(
+    search_term: str,
+    query_index: int,
+    query_count: Optional[int],
+    run_started: datetime
+) -> str:
+    """output.xlsx for a single query, one file per query otherwise. when
+    the number of queries isn't known up front (work items) the first one
+    still writes output.xlsx. the columnar formats go into the partitioned
+    dataset"""
+    if settings.OUTPUT_FORMAT != "xlsx":
+        return get_dataset_path(
+            search_term, settings.OUTPUT_FORMAT, run_started)
+    if query_count == 1 or (query_count is None and query_index == 0):
+        return f"{settings.OUTPUT_PATH}/output.xlsx"
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", search_term).strip("_")
+    return f"{settings.OUTPUT_PATH}/output_{query_index + 1}_{slug}.xlsx"
+
+
+def create_news_browser(
+    logger: Logger,
+    shared: Dict[str, Any]
+) -> NewsBrowser:
+    """creates a session of the configured backend on the shared resources,
+    not opened yet
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. shared : Dict[str, Any]
+        - downloader, index and pool shared between the queries
+
+    #### Returns
+    ------
+    - NewsBrowser
+        - the session, open it with open_browser
+    """
+    logger.info(f"Instantiating {settings.BROWSER_BACKEND} NewsBrowser")
+    return get_browser_class()(
+        logger=logger,
+        downloader=shared["downloader"],
+        index=shared["index"],
+        pool=shared["pool"]
+    )
+
+
+def search(
+    logger: Logger,
+    search_term: str,
+    months: int,
+    path: str,
+    shared: Dict[str, Any],
+    news_browser: Optional[NewsBrowser] = None
+) -> Dict[str, Any]:
+    """runs one query on its own session using the shared downloader, index
+    and worker pool, failures are reported in the result rather than raised
+    so the other queries carry on
+
+    #### Parameters
+    ------
+    1. logger : Logger
+        - logger instance
+    2. search_term : str
+        - search term to search for
+    3. months : int
+        - number of months to search back for articles
+    4. path : str
+        - path to the output file for this query's results
+    5. shared : Dict[str, Any]
+        - downloader, index and pool shared between the queries
+    6. news_browser : Optional[NewsBrowser], (default None)
+        - an opened session to search on, left open for the next query.
+            when not given the query opens and closes its own
+
+    #### Returns
+    ------
+    - Dict[str, Any]
+        - search_query, months, status ("COMPLETE" or "FAILED"), articles,
+            output_path and error
+    """
+    result = {
+        "search_query": search_term,
+        "months": months,
+        "status": "COMPLETE",
+        "articles": 0,
+        "output_path": path,
+        "error": None
+    }
+    owns_browser = news_browser is None
+    try:
+        if owns_browser:
+            news_browser = create_news_browser(logger, shared)
+
+        # rows are written as the cards are processed, closing the sink even
+        # when the search fails keeps what we got that far
+        sink = create_sink(
+            logger=logger, path=path, output_format=settings.OUTPUT_FORMAT)
+        sink.open()
+        try:
+            if owns_browser:
+                news_browser.open_browser(url=settings.SEARCH_URL)
+            news_browser.search_articles(
+                query=search_term,
+                months=months,
+                sink=sink
+            )
+        finally:
+            if owns_browser:
+                news_browser.close_browsers()
+            sink.close()
+            result["articles"] = len(sink)
+
+    except Exception as e:
+        logger.exception(f"Search for {search_term} failed, reason: {e}")
+        result["status"] = "FAILED"
+        result["error"] = str(e)
+
+    return result
+
+
+@contextmanager
+def query_resources(
+    started: Optional[float] = None
+) -> Iterator[Tuple[Logger, Dict[str, Any]]]:
+    """sets up the logger and the http and browser resources shared by the
+    queries of a run, closes them and writes the run reports once the
+    queries are done
+
+    #### Parameters
+    ------
+    1. started : Optional[float], (default None)
+        - time.perf_counter() the startup milestones (e.g. first_card) are
+            measured from, defaults to when this module was imported
+
+    #### Returns
+    ------
+    - Iterator[Tuple[Logger, Dict[str, Any]]]
+        - the logger and the downloader, index and pool to pass to search
+    """
     try:
         logger = setup_logger()
         logger.info(f"Setting up {settings.PROJECT_TITLE}")
@@ -31,35 +190,156 @@ def project(search_term, months=1):
         print(f"error logged to {settings.STARTUP_FAIL_LOG_FILE_PATH}")
         exit(1)
 
+    wait_stats.reset()
+    locators.reset()
+    profiler.reset(
+        started=started if started is not None else PROCESS_STARTED)
+    date_sources.reset()
+    rate_limits.reset()
+    shared = {"downloader": None, "index": None, "pool": None}
     try:
-        logger.info("Instantiating NewsBrowser")
-        news_browser = NewsBrowser(
-            logger=logger
-        )
-        logger.info("Instantiating NewsBrowser")
+        # before anything creates an http session
+        http_cache.open(logger=logger)
+        # one set of these for the whole run instead of one per query
+        shared["downloader"] = ImageDownloader(logger=logger)
+        if settings.ARTICLE_INDEX_PATH:
+            shared["index"] = ArticleIndex(
+                logger=logger, path=settings.ARTICLE_INDEX_PATH)
+            shared["index"].open()
+        if settings.WORKER_POOL_SIZE > 0:
+            browser_class = get_browser_class()
+            shared["pool"] = BrowserPool(
+                logger=logger,
+                size=settings.WORKER_POOL_SIZE,
+                factory=lambda: browser_class(
+                    logger=logger,
+                    downloader=shared["downloader"]
+                )
+            )
+            shared["pool"].open()
 
-        news_browser.open_browser(url="https://gothamist.com/search")
+        yield logger, shared
 
-        output_data = news_browser.search_articles(
-            query=search_term,
-            months=months
+    except Exception as e:
+        logger.exception(f"Project failed to start, reason: {e}")
+        raise
+    finally:
+        if shared["pool"] is not None:
+            shared["pool"].close()
+        if shared["downloader"] is not None:
+            shared["downloader"].close()
+        # after the downloader so late image names still get indexed
+        if shared["index"] is not None:
+            shared["index"].close()
+        http_cache.close()
+        wait_stats.write_report(
+            logger=logger,
+            path=f"{settings.OUTPUT_PATH}/wait_report.json"
         )
-        news_browser.close_browsers()
-
-        path = f"{settings.OUTPUT_PATH}/output.xlsx"
-        output_excel_data(
+        profiler.write_report(
             logger=logger,
-            path=path,
-            data=output_data
+            path=f"{settings.OUTPUT_PATH}/profile.json",
+            summary=dict(
+                wait_stats.report(),
+                date_sources=date_sources.report(logger=logger),
+                http_cache=http_cache.report(logger=logger),
+                rate_limits=rate_limits.report(logger=logger),
+                locators=locators.report(logger=logger)
+            )
         )
+        # waits for the enqueued log records to be written
+        logger.complete()
+
+
+# went with a plain non async setup as unfamiliar with robocorp and how it
+# plays with the async libraries, concurrent queries run on threads
+def run_queries(
+    queries: List[Dict[str, Any]],
+    started: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """runs every query concurrently over one shared set of http and browser
+    resources
+
+    #### Parameters
+    ------
+    1. queries : List[Dict[str, Any]]
+        - dicts with the search_query and months of each query
+    2. started : Optional[float], (default None)
+        - see query_resources
+
+    #### Returns
+    ------
+    - List[Dict[str, Any]]
+        - the result of each query (see search), in the same order
+    """
+    run_started = datetime.now()
+    with query_resources(started=started) as (logger, shared):
+        logger.info(f"Running {len(queries)} queries")
+        with ThreadPoolExecutor(
+                max_workers=max(min(settings.QUERY_CONCURRENCY, len(queries)), 1),
+                thread_name_prefix="query") as executor:
+            futures = [
+                executor.submit(
+                    search,
+                    logger,
+                    query["search_query"],
+                    query["months"],
+                    get_output_path(
+                        query["search_query"],
+                        query_index,
+                        len(queries),
+                        run_started
+                    ),
+                    shared
+                )
+                for query_index, query in enumerate(queries)
+            ]
+            return [future.result() for future in futures]
+
+
+def project(search_term, months=1):
+    result = run_queries([{"search_query": search_term, "months": months}])[0]
+    if result["status"] == "FAILED":
+        raise Exception(f"Project failed, reason: {result['error']}")
 
-    except Exception as e:
-        logger.exception(f"Project failed to start, reason: {e}")
-        raise
 
 @task
 def minimal_task():
-    item = workitems.inputs.current
-    search_query = item.payload.get("search_query")
-    months = item.payload.get("months")
-    project(search_query, months)
+    run_started = datetime.now()
+    with query_resources() as (logger, shared):
+        # iterating reserves one input at a time and the next can't be
+        # reserved until this one is done or failed, so the inputs can't go
+        # through run_queries together. they share one opened session
+        # instead of each paying for chrome and the search page
+        news_browser = create_news_browser(logger, shared)
+        try:
+            news_browser.open_browser(url=settings.SEARCH_URL)
+            for query_index, item in enumerate(workitems.inputs):
+                search_term = item.payload.get(
+                    "search_query", settings.SEARCH_QUERY)
+                result = search(
+                    logger,
+                    search_term,
+                    item.payload.get("months", settings.MONTHS),
+                    get_output_path(
+                        search_term, query_index, None, run_started),
+                    shared,
+                    news_browser=news_browser
+                )
+
+                output = item.create_output()
+                output.payload = result
+                if result["status"] == "COMPLETE":
+                    output.add_file(result["output_path"])
+                output.save()
+
+                if result["status"] == "FAILED":
+                    item.fail(
+                        exception_type="APPLICATION",
+                        code="SEARCH_FAILED",
+                        message=result["error"]
+                    )
+                else:
+                    item.done()
+        finally:
+            news_browser.close_browsers()
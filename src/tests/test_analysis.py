@@ -0,0 +1,85 @@
+# project modules
+from helpers.analysis import ArticleAnalyser, TermMatcher
+
+
+def test_counts_like_str_count():
+    matcher = TermMatcher(["aa"])
+
+    assert matcher.count("aaaa aaa") == {"aa": "aaaa aaa".count("aa")}
+
+
+def test_counts_every_term_in_one_pass():
+    matcher = TermMatcher(["dog", "cat"])
+
+    assert matcher.count("dog and cat and dog") == {"dog": 2, "cat": 1}
+
+
+def test_case_insensitive():
+    matcher = TermMatcher(["Dog"], case_sensitive=False)
+
+    assert matcher.count("DOG dog Dog") == {"Dog": 3}
+    assert TermMatcher(["Dog"]).count("DOG dog Dog") == {"Dog": 1}
+
+
+def test_whole_words():
+    matcher = TermMatcher(["dog"], whole_words=True)
+
+    assert matcher.count("dog dogs hotdog dog_ (dog)") == {"dog": 2}
+
+
+def test_casefold_changing_the_term_length():
+    # "ß" casefolds to "ss", so it's two characters long in the folded text
+    matcher = TermMatcher(["ß"], case_sensitive=False, whole_words=True)
+
+    assert matcher.count("Straße ss SS") == {"ß": 2}
+
+
+def test_casefold_changing_the_text_length():
+    matcher = TermMatcher(["dog"], case_sensitive=False, whole_words=True)
+
+    assert matcher.count("Straße dog") == {"dog": 1}
+
+
+def test_overlapping_terms_only_count_the_longest():
+    matcher = TermMatcher(["dog", "dogs"])
+
+    assert matcher.count("dogs and a dog") == {"dog": 1, "dogs": 1}
+
+
+def test_overlapping_terms_count_the_leftmost():
+    matcher = TermMatcher(["new york", "york city"])
+
+    assert matcher.count("new york city") == {"new york": 1, "york city": 0}
+
+
+def test_empty_and_repeated_terms_are_ignored():
+    matcher = TermMatcher(["dog", "", "dog"])
+
+    assert matcher.count("dog") == {"dog": 1}
+
+
+def test_analyser_adds_counts_and_money():
+    analyser = ArticleAnalyser(
+        "dog", synonyms=["puppy"], case_sensitive=False, whole_words=True)
+    article_details = {
+        "title": "Dog adopts puppy",
+        "description": "the puppy cost $1,200.50"
+    }
+
+    analyser.analyse(article_details)
+
+    assert article_details["search_phrase_count"] == 3
+    assert article_details["money_value_present"] is True
+    assert article_details["term_counts"] == {"dog": 1, "puppy": 2}
+
+
+def test_analyser_matches_dont_run_from_title_into_description():
+    analyser = ArticleAnalyser(
+        "hot dog", synonyms=[], case_sensitive=True, whole_words=False)
+    article_details = {"title": "so hot", "description": "dog days"}
+
+    analyser.analyse(article_details)
+
+    assert article_details["search_phrase_count"] == 0
+    assert article_details["money_value_present"] is False
+    assert "term_counts" not in article_details
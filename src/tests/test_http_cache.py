@@ -0,0 +1,201 @@
+# built ins
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# installed libs
+import pytest
+import requests
+from loguru import logger
+
+# project modules
+from config import settings
+from helpers import http_cache as http_cache_module
+from helpers.http_browsing import HttpNewsBrowser
+from helpers.http_cache import CachingAdapter, HttpCache
+from helpers.rate_control import rate_limits
+
+
+PAGE = {"Content-Type": "text/html; charset=utf-8"}
+IMAGE = {"Content-Type": "image/jpeg"}
+
+
+class Clock(object):
+    """stands in for the time module in helpers.http_cache so entries can be
+    aged without waiting"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(http_cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(settings, "HTTP_ARCHIVE_PATH", str(tmp_path / "archive.sqlite"))
+    monkeypatch.setattr(settings, "HTTP_CACHE_TTL", 60)
+    monkeypatch.setattr(settings, "HTTP_CACHE_IMAGE_TTL", 3600)
+    monkeypatch.setattr(settings, "HTTP_CACHE_MAX_MB", 1)
+    monkeypatch.setattr(settings, "BROWSER_BACKEND", "http")
+
+
+@pytest.fixture
+def cache(cache_settings, clock):
+    cache = HttpCache()
+    cache.open(logger=logger, mode="cache")
+    yield cache
+    cache.close()
+
+
+def test_page_is_served_until_its_ttl_passes(cache, clock):
+    cache.put("https://gothamist.com/a", 200, PAGE, b"page")
+
+    clock.now += 59
+    assert cache.get("https://gothamist.com/a")["body"] == b"page"
+
+    clock.now += 2
+    assert cache.get("https://gothamist.com/a") is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_images_use_their_own_ttl(cache, clock):
+    cache.put("https://gothamist.com/a.jpg", 200, IMAGE, b"image")
+
+    clock.now += 61
+    assert cache.get("https://gothamist.com/a.jpg")["body"] == b"image"
+
+    clock.now += 3600
+    assert cache.get("https://gothamist.com/a.jpg") is None
+
+
+def test_least_recently_used_is_evicted_past_the_size_limit(cache, clock):
+    cache.max_bytes = 300
+    for name in ["a", "b", "c"]:
+        cache.put(f"https://gothamist.com/{name}", 200, PAGE, b"x" * 100)
+        clock.now += 1
+    # a is used again so b is now the least recently used
+    assert cache.get("https://gothamist.com/a") is not None
+    clock.now += 1
+
+    cache.put("https://gothamist.com/d", 200, PAGE, b"x" * 100)
+
+    assert cache.get("https://gothamist.com/b") is None
+    for name in ["a", "c", "d"]:
+        assert cache.get(f"https://gothamist.com/{name}") is not None
+    assert cache.stats["evicted"] == 1
+    assert cache.size == 300
+
+
+def test_replacing_an_entry_only_counts_its_new_size(cache):
+    cache.put("https://gothamist.com/a", 200, PAGE, b"x" * 100)
+    cache.put("https://gothamist.com/a", 200, PAGE, b"x" * 40)
+
+    assert cache.size == 40
+    assert cache.stats["evicted"] == 0
+
+
+def test_size_survives_reopening(cache):
+    cache.put("https://gothamist.com/a", 200, PAGE, b"x" * 100)
+    cache.close()
+
+    cache.open(logger=logger, mode="cache")
+
+    assert cache.size == 100
+
+
+def test_archive_never_expires_or_evicts(cache_settings, clock):
+    archive = HttpCache()
+    archive.open(logger=logger, mode="record")
+    archive.put("https://gothamist.com/a", 200, PAGE, b"x" * 2 * 1024 * 1024)
+    archive.close()
+
+    clock.now += 365 * 24 * 60 * 60
+    archive.open(logger=logger, mode="replay")
+    try:
+        assert archive.get("https://gothamist.com/a") is not None
+        assert archive.stats["evicted"] == 0
+    finally:
+        archive.close()
+
+
+def test_replay_needs_the_http_backend(cache_settings, monkeypatch):
+    monkeypatch.setattr(settings, "BROWSER_BACKEND", "selenium")
+
+    with pytest.raises(ValueError):
+        HttpCache().open(logger=logger, mode="replay")
+
+
+def test_unknown_mode_is_rejected(cache_settings):
+    with pytest.raises(ValueError):
+        HttpCache().open(logger=logger, mode="sometimes")
+
+
+def test_replay_does_not_fall_back_to_chrome(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_STORE_PATH", str(tmp_path / "images"))
+    monkeypatch.setattr(http_cache_module.http_cache, "mode", "replay")
+    news_browser = HttpNewsBrowser(logger=logger)
+    try:
+        with pytest.raises(Exception, match="replaying"):
+            news_browser.ensure_browser()
+        assert news_browser.browser is None
+    finally:
+        news_browser.session.close()
+        news_browser.downloader.close()
+
+
+class BodyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"x" * 100_000
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BodyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_streamed_body_holds_the_rate_slot(server_url, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_CONTROL", True)
+    rate_limits.reset()
+    session = requests.Session()
+    session.mount("http://", CachingAdapter(HttpCache()))
+    controller = rate_limits.get(server_url)
+    try:
+        response = session.get(server_url, stream=True)
+        assert controller.in_flight == 1
+        assert len(response.content) == 100_000
+        assert controller.in_flight == 0
+
+        response = session.get(server_url, stream=True)
+        response.close()
+        assert controller.in_flight == 0
+
+        session.get(server_url)
+        assert controller.in_flight == 0
+    finally:
+        session.close()
+        rate_limits.reset()
@@ -0,0 +1,93 @@
+# built ins
+import json
+from datetime import datetime
+
+# project modules
+from helpers.metadata import (
+    DateSourceStats,
+    date_from_metadata,
+    parse_metadata,
+    parse_published
+)
+
+
+def test_published_is_the_date_in_the_publishers_timezone():
+    # 11pm in new york is already the next day in utc
+    assert parse_published("2024-05-13T23:30:00-04:00") == datetime(2024, 5, 13)
+    assert parse_published("2024-05-13T03:30:00Z") == datetime(2024, 5, 13)
+    assert parse_published(" 2024-05-13 ") == datetime(2024, 5, 13)
+
+
+def test_unparseable_published():
+    assert parse_published(None) is None
+    assert parse_published("") is None
+    assert parse_published("May 13, 2024") is None
+
+
+def test_json_ld_object():
+    json_ld = [json.dumps({
+        "@type": "NewsArticle",
+        "datePublished": "2024-05-13T17:00:00-04:00"
+    })]
+
+    assert date_from_metadata(json_ld, {}) == (datetime(2024, 5, 13), "json_ld")
+
+
+def test_json_ld_list_and_graph():
+    as_list = [json.dumps([
+        {"@type": "Organization", "name": "Gothamist"},
+        {"@type": "NewsArticle", "datePublished": "2024-05-12T08:00:00Z"}
+    ])]
+    as_graph = [json.dumps({"@graph": [
+        {"@type": "WebPage"},
+        {"@type": "NewsArticle", "datePublished": "2024-05-11T08:00:00Z"}
+    ]})]
+
+    assert date_from_metadata(as_list, {})[0] == datetime(2024, 5, 12)
+    assert date_from_metadata(as_graph, {})[0] == datetime(2024, 5, 11)
+
+
+def test_broken_json_ld_falls_back_to_meta():
+    json_ld = [
+        "{not json",
+        json.dumps({"@type": "NewsArticle", "datePublished": ["2024"]})
+    ]
+    meta = {
+        "og:title": "a story",
+        "datePublished": "2024-05-10T08:00:00Z",
+        "article:published_time": "2024-05-09T08:00:00Z"
+    }
+
+    # article:published_time is preferred over datePublished
+    assert date_from_metadata(json_ld, meta) == (datetime(2024, 5, 9), "meta")
+
+
+def test_no_date_anywhere():
+    assert date_from_metadata([], {"og:title": "a story"}) == (None, None)
+
+
+def test_parse_metadata_from_html():
+    page = """
+    <html><head>
+        <meta property="og:title" content="a story">
+        <meta itemprop="datePublished" content="2024-05-08T10:00:00-04:00">
+        <script type="application/ld+json">
+            {"@type": "NewsArticle", "datePublished": "2024-05-07T10:00:00-04:00"}
+        </script>
+    </head><body><p>story</p></body></html>
+    """
+
+    assert parse_metadata(page) == (datetime(2024, 5, 7), "json_ld")
+    assert parse_metadata(page.replace("application/ld+json", "text/plain")) == (
+        datetime(2024, 5, 8), "meta")
+
+
+def test_date_source_counts():
+    stats = DateSourceStats()
+    for source in ["json_ld", "meta", "json_ld", "rendered"]:
+        stats.record(source)
+
+    assert stats.report() == {"json_ld": 2, "meta": 1, "rendered": 1}
+
+    stats.reset()
+    assert stats.report() == {}
@@ -0,0 +1,108 @@
+# built ins
+from datetime import datetime, timedelta
+
+# installed libs
+from loguru import logger
+
+# project modules
+from helpers.pagination import DateWindowPlanner, latest_possible_date
+
+
+NOW = datetime(2024, 5, 13, 22, 36)
+START = datetime(2024, 4, 13, 22, 36)
+
+
+def test_iso_hint_is_the_end_of_its_day():
+    assert latest_possible_date(
+        "2024-05-10T09:00:00-04:00", None, NOW) == datetime(2024, 5, 11)
+
+
+def test_relative_hint_allows_for_rounding():
+    assert latest_possible_date("3 days ago", None, NOW) == NOW - timedelta(days=2)
+    assert latest_possible_date("an hour ago", None, NOW) == NOW
+    assert latest_possible_date("Published 2 weeks ago", None, NOW) == (
+        NOW - timedelta(weeks=1))
+
+
+def test_yesterday_hint():
+    assert latest_possible_date("Yesterday", None, NOW) == NOW
+
+
+def test_absolute_hint():
+    assert latest_possible_date("May 3, 2024", None, NOW) == datetime(2024, 5, 4)
+    assert latest_possible_date(
+        "Published Sept. 30, 2023 at 5:00 p.m.", None, NOW) == datetime(2023, 10, 1)
+
+
+def test_falls_back_to_the_date_in_the_link():
+    assert latest_possible_date(
+        "Updated", "https://gothamist.com/news/2024/02/29/story", NOW
+    ) == datetime(2024, 3, 1)
+    assert latest_possible_date(
+        None, "https://gothamist.com/news/story-2023-12-31", NOW
+    ) == datetime(2024, 1, 1)
+
+
+def test_no_usable_hint():
+    assert latest_possible_date(None, None, NOW) is None
+    assert latest_possible_date("Breaking", "https://gothamist.com/news/a", NOW) is None
+    # not a real date
+    assert latest_possible_date(
+        "Feb 30, 2024", "https://gothamist.com/2024/13/01/a", NOW) is None
+
+
+def test_only_cards_before_the_window_are_skipped():
+    planner = DateWindowPlanner(logger, START, now=NOW)
+
+    assert planner.out_of_window({"date_hint": "Jan 2, 2024"})
+    assert not planner.out_of_window({"date_hint": "3 days ago"})
+    # the hint is rounded, the card might still be in the window
+    assert not planner.out_of_window({"date_hint": "Apr 13, 2024"})
+    assert not planner.out_of_window({"date_hint": None, "article_link": None})
+
+    planner.use_hints = False
+    assert not planner.out_of_window({"date_hint": "Jan 2, 2024"})
+
+
+def test_stops_after_the_overshoot():
+    planner = DateWindowPlanner(logger, START, overshoot=2, now=NOW)
+
+    assert planner.observe(False)
+    assert planner.observe(True)
+    assert planner.observe(False)
+    assert planner.observe(False, skipped=True)
+    assert not planner.observe(False)
+    assert planner.finished
+    assert planner.report() == {"loads_saved": 1}
+
+
+def test_whole_window_is_covered_when_nothing_failed():
+    planner = DateWindowPlanner(logger, START, overshoot=0, now=NOW)
+    planner.observe(True, published=NOW - timedelta(days=1))
+
+    assert planner.covered_from(ended=True) == START
+    # stopped short of the end of the results and the window
+    assert planner.covered_from(ended=False) == NOW - timedelta(days=1)
+
+    planner.observe(False, published=START - timedelta(days=1))
+    assert planner.covered_from(ended=False) == START
+
+
+def test_coverage_stops_at_the_first_failure():
+    planner = DateWindowPlanner(logger, START, overshoot=0, now=NOW)
+    planner.observe(True, published=NOW - timedelta(days=1))
+    planner.observe(True, published=NOW - timedelta(days=2))
+    planner.fail()
+    planner.observe(True, published=NOW - timedelta(days=3))
+    planner.observe(False, published=START - timedelta(days=1))
+
+    assert planner.finished
+    assert planner.covered_from(ended=True) == NOW - timedelta(days=2)
+
+
+def test_nothing_is_covered_when_the_first_card_failed():
+    planner = DateWindowPlanner(logger, START, now=NOW)
+    planner.fail()
+    planner.observe(True, published=NOW - timedelta(days=1))
+
+    assert planner.covered_from(ended=True) is None
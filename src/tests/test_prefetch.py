@@ -0,0 +1,77 @@
+# built ins
+from typing import List, Tuple
+
+# installed libs
+import pytest
+
+# project modules
+from helpers import prefetch as prefetch_module
+from helpers.prefetch import RELEASED_SCRIPT, TabPrefetcher
+
+
+class FakeSwitchTo(object):
+    def __init__(self, driver: "FakeDriver"):
+        self.driver = driver
+
+    def window(self, handle: str):
+        self.driver.current = handle
+
+
+class FakeDriver(object):
+    """records which tab each script ran in instead of driving chrome"""
+
+    def __init__(self):
+        self.current = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.scripts: List[Tuple[str, str]] = []
+
+    def execute_script(self, script: str, *args):
+        self.scripts.append((self.current, script))
+
+
+@pytest.fixture
+def prefetcher(monkeypatch) -> TabPrefetcher:
+    monkeypatch.setattr(
+        prefetch_module,
+        "open_blocked_tab",
+        lambda logger, driver, profile, name=None: f"handle-{name}"
+    )
+    return TabPrefetcher(
+        logger=None, driver=FakeDriver(), main_window="main", max_tabs=2)
+
+
+def released_in(prefetcher: TabPrefetcher) -> List[str]:
+    return [
+        tab for tab, script in prefetcher.driver.scripts
+        if script == RELEASED_SCRIPT
+    ]
+
+
+def test_fill_marks_tabs_it_frees(prefetcher):
+    prefetcher.fill(["a", "b"])
+    assert prefetcher.links == {"prefetch-0": "a"}
+    assert released_in(prefetcher) == []
+
+    # "a" was skipped, its tab gets "c" and the old document is marked
+    prefetcher.fill(["c"])
+    assert prefetcher.links == {"prefetch-0": "c"}
+    assert released_in(prefetcher) == ["handle-prefetch-0"]
+    assert prefetcher.driver.current == "main"
+
+
+def test_open_marks_the_busy_tab_it_takes(prefetcher):
+    prefetcher.fill(["a", "b"])
+    prefetcher.open("x")
+    assert prefetcher.links == {"prefetch-0": "x"}
+    assert released_in(prefetcher) == ["handle-prefetch-0"]
+    assert prefetcher.driver.current == "handle-prefetch-0"
+
+
+def test_released_tab_is_not_marked_again(prefetcher):
+    prefetcher.fill(["a"])
+    prefetcher.open("a")
+    prefetcher.release("a", read_seconds=0.0)
+    prefetcher.fill(["b"])
+    # only release marked it, taking the already free tab doesn't
+    assert released_in(prefetcher) == ["handle-prefetch-0"]
+    assert prefetcher.links == {"prefetch-0": "b"}
@@ -0,0 +1,189 @@
+# built ins
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+# installed libs
+import pytest
+
+# project modules
+from config import settings
+from helpers import rate_control as rate_control_module
+from helpers.rate_control import RateController, RateLimits, parse_retry_after
+
+
+class Clock(object):
+    """stands in for the time module in helpers.rate_control so the once
+    per round trip decrease can be tested without waiting"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def rate_settings(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_CONTROL", True)
+    monkeypatch.setattr(settings, "RATE_MIN_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "RATE_INITIAL_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "RATE_MAX_CONCURRENCY", 8)
+    monkeypatch.setattr(settings, "RATE_DECREASE_FACTOR", 0.5)
+    monkeypatch.setattr(settings, "RATE_LATENCY_FACTOR", 3.0)
+    monkeypatch.setattr(settings, "RATE_DEFAULT_BACKOFF", 5.0)
+    monkeypatch.setattr(settings, "RATE_MAX_RETRY_AFTER", 120.0)
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rate_control_module, "time", clock)
+    return clock
+
+
+def test_retry_after_seconds():
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after("1.5") == 1.5
+    assert parse_retry_after("-5") == 0.0
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+    assert 55 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 60
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_unusable_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+
+
+def test_successes_add_about_one_per_window(rate_settings, clock):
+    controller = RateController("gothamist.com")
+
+    for _ in range(4):
+        controller.observe(0.1, status=200)
+    assert controller.current_limit == 4
+
+    controller.observe(0.1, status=200)
+    assert controller.current_limit == 5
+    assert controller.stats["highest_limit"] == 5
+
+
+def test_limit_stays_within_bounds(rate_settings, clock):
+    controller = RateController("gothamist.com")
+
+    for _ in range(100):
+        controller.observe(0.1, status=200)
+    assert controller.current_limit == 8
+
+    for _ in range(10):
+        clock.now += 10
+        controller.observe(None, error=True)
+    assert controller.current_limit == 1
+    assert controller.stats["lowest_limit"] == 1
+
+
+def test_throttled_response_halves_the_limit_and_holds_back(rate_settings, clock):
+    controller = RateController("gothamist.com")
+
+    controller.observe(0.1, status=429, retry_after="30")
+
+    assert controller.current_limit == 2
+    assert controller.blocked_until == clock.now + 30
+    assert controller.stats["throttled"] == 1
+
+
+def test_retry_after_is_capped_and_defaulted(rate_settings, clock):
+    controller = RateController("gothamist.com")
+
+    controller.observe(None, status=503, retry_after="100000")
+    assert controller.blocked_until == clock.now + 120
+
+    other = RateController("gothamist.com")
+    other.observe(None, status=503)
+    assert other.blocked_until == clock.now + 5
+
+
+def test_burst_of_failures_decreases_once_per_round_trip(rate_settings, clock):
+    controller = RateController("gothamist.com")
+    controller.observe(0.5, status=200)
+
+    controller.observe(None, status=500)
+    controller.observe(None, error=True)
+    assert controller.stats["decreases"] == 1
+
+    clock.now += 1
+    controller.observe(None, error=True)
+    assert controller.stats["decreases"] == 2
+    assert controller.stats["errors"] == 3
+
+
+def test_latency_well_above_the_best_backs_off(rate_settings, clock):
+    controller = RateController("gothamist.com")
+    controller.observe(0.1, status=200)
+    limit = controller.limit
+
+    # the moving average has to climb past 3x the best
+    for _ in range(10):
+        clock.now += 10
+        controller.observe(2.0, status=200)
+
+    assert controller.limit < limit
+    assert controller.stats["decreases"] >= 1
+
+
+def test_disabled_controller_does_nothing(rate_settings, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_CONTROL", False)
+    controller = RateController("gothamist.com")
+
+    controller.observe(None, status=429, retry_after="30")
+
+    assert controller.current_limit == 8
+    assert controller.blocked_until == 0.0
+    assert controller.stats["fetches"] == 0
+
+
+def test_wait_blocks_until_retry_after_passes(rate_settings):
+    controller = RateController("gothamist.com")
+    controller.observe(None, status=429, retry_after="0.2")
+
+    started = time.monotonic()
+    with controller.slot():
+        pass
+
+    assert time.monotonic() - started >= 0.15
+
+
+def test_slots_are_held_until_the_fetch_is_done(rate_settings):
+    controller = RateController("gothamist.com")
+
+    with controller.slot(), controller.slot():
+        assert controller.in_flight == 2
+    assert controller.in_flight == 0
+
+
+def test_one_controller_per_host(rate_settings):
+    rate_limits = RateLimits()
+
+    first = rate_limits.get("https://gothamist.com/a")
+
+    assert rate_limits.get("https://gothamist.com/b?page=2") is first
+    assert rate_limits.get("https://cdn.gothamist.com/a.jpg") is not first
+    assert set(rate_limits.report()) == {"gothamist.com", "cdn.gothamist.com"}
+
+
+def test_released_slot_only_counts_once(rate_settings):
+    controller = RateController("gothamist.com")
+
+    release = controller.acquire()
+    assert controller.in_flight == 1
+    release()
+    release()
+    assert controller.in_flight == 0
@@ -0,0 +1,60 @@
+# built ins
+import json
+import os
+from concurrent.futures import Future
+from datetime import datetime
+
+# installed libs
+import pytest
+from loguru import logger
+
+# project modules
+from helpers.sinks import ExcelRowSink, RowSink, create_sink
+
+
+ARTICLE = {
+    "image_url": "https://example.com/image.jpg",
+    "image_name": "image.jpg",
+    "title": "a title",
+    "description": "a description",
+    "search_phrase_count": 2,
+    "money_value_present": False,
+    "date_published": datetime(2024, 5, 13, 22, 36),
+    "article_link": "https://example.com/article",
+}
+
+
+def test_row_sink_needs_the_format_hooks(tmp_path):
+    with pytest.raises(TypeError):
+        RowSink(logger=logger, path=str(tmp_path / "output"))
+
+
+def test_jsonl_rows_are_written_on_close(tmp_path):
+    path = tmp_path / "part.jsonl"
+    sink = create_sink(logger=logger, path=str(path), output_format="jsonl")
+    sink.open()
+    sink.append(dict(ARTICLE))
+    sink.close()
+
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(sink) == 1
+    assert rows[0]["title"] == "a title"
+    assert "article_link" not in rows[0]
+
+
+def test_failed_close_still_closes_the_output(tmp_path):
+    path = tmp_path / "output.xlsx"
+    sink = ExcelRowSink(logger=logger, path=str(path), flush_every=1)
+    sink.open()
+    sink.append(dict(ARTICLE))
+    failed_download = Future()
+    sink.append(dict(ARTICLE, image_name=failed_download))
+    failed_download.set_exception(OSError("download failed"))
+
+    with pytest.raises(Exception, match="Failed to output data"):
+        sink.close()
+    # the workbook was written out and the journal kept the row before it
+    assert sink.journal.closed
+    assert os.path.getsize(path) > 0
+    with open(sink.journal_path) as journal:
+        assert len(journal.readlines()) == 1